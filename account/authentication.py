@@ -0,0 +1,165 @@
+# account/authentication.py
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from core.cache import LocalTTLCache, TwoTierCache
+from .models import UserAuth
+from .revocation import is_revoked
+from .tokens import CLAIM, decode_claims
+
+# request.user is built from, in order:
+#   1. the "usr" claim embedded at login (account/tokens.py), if the user
+#      hasn't changed since (a per-user change stamp, checked locally first,
+#      then in the cache);
+#   2. a two-tier (process LRU -> Redis) snapshot of the same fields;
+#   3. the database, which refills (2).
+# A token whose "v" is older than the user's token_version is rejected; the
+# version is only compared when the stamp says something changed. Single
+# tokens (logout, rotated refresh tokens) are revoked by jti, see
+# account/revocation.py.
+# The result is a real UserAuth with every other field deferred, so it can
+# be assigned to foreign keys and saved; reading a field outside the
+# snapshot loads it on first access.
+
+SNAPSHOT_FIELDS = (
+    "user_id", "role", "is_active", "is_verified", "is_superuser", "is_subscribed", "username", "token_version",
+)
+# changing these revokes the user's tokens ("log out everywhere")
+REVOKING_FIELDS = ("role", "is_active", "is_superuser", "password")
+
+AUTH_SNAPSHOT_TTL = getattr(settings, "AUTH_SNAPSHOT_TTL", 5 * 60)
+AUTH_LOCAL_TTL = getattr(settings, "AUTH_LOCAL_TTL", 5)
+
+# claims outlive the access token: a refresh copies them into new access tokens
+_STAMP_TTL = int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+
+user_snapshots = TwoTierCache(prefix="auth:snapshot", shared_ttl=AUTH_SNAPSHOT_TTL, local_ttl=AUTH_LOCAL_TTL, local_maxsize=10000)
+_local_stamps = LocalTTLCache(maxsize=10000, ttl=AUTH_LOCAL_TTL)
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _stamp_key(user_id) -> str:
+    return f"auth:user:{user_id}:changed"
+
+
+# ----------------------------
+# Invalidation
+# ----------------------------
+def changed_at(user_id) -> int:
+    """Last write to the user (ms), or 0 if none within the claim lifetime."""
+    key = _stamp_key(user_id)
+    stamp = _local_stamps.get(key)
+    if stamp is None:
+        # a miss is remembered locally too but never written back to the shared
+        # cache, where it could overwrite a concurrent writer's stamp
+        stamp = cache.get(key) or 0
+        _local_stamps.set(key, stamp)
+    return stamp
+
+
+def mark_user_changed(user_id) -> None:
+    """Run after a committed write: older claims and snapshots stop being trusted."""
+    key = _stamp_key(user_id)
+    stamp = _now_ms()
+    cache.set(key, stamp, timeout=_STAMP_TTL)
+    _local_stamps.set(key, stamp)
+    user_snapshots.delete(user_id)
+
+
+def on_user_saved(user_id, update_fields=None) -> None:
+    if update_fields is not None and not set(update_fields) & set(SNAPSHOT_FIELDS):
+        return  # e.g. last_login, profile picture
+    transaction.on_commit(lambda: mark_user_changed(user_id))
+
+
+def remember_privileges(instance: UserAuth) -> None:
+    """post_init: keep the loaded REVOKING_FIELDS to compare against on save."""
+    instance._token_privileges = {name: instance.__dict__[name] for name in REVOKING_FIELDS if name in instance.__dict__}
+
+
+def privileges_changed(instance: UserAuth, update_fields=None) -> bool:
+    if update_fields is not None and not set(update_fields) & set(REVOKING_FIELDS):
+        return False
+    before = getattr(instance, "_token_privileges", {})
+    # a field that was deferred at load time and assigned since can't be compared
+    return any(
+        name not in before or before[name] != instance.__dict__[name]
+        for name in REVOKING_FIELDS
+        if name in instance.__dict__
+    )
+
+
+def revoke_tokens(user_id) -> None:
+    """
+    Reject every token issued to the user so far. Saves changing
+    REVOKING_FIELDS do this from signals.py; QuerySet.update() sends no
+    signals, so call it for those rows.
+    """
+    UserAuth.objects.filter(pk=user_id).update(token_version=F("token_version") + 1)
+    transaction.on_commit(lambda: mark_user_changed(user_id))
+
+
+# ----------------------------
+# Snapshot -> user
+# ----------------------------
+def load_snapshot(user_id) -> Optional[Dict[str, Any]]:
+    return UserAuth.objects.filter(pk=user_id).values(*SNAPSHOT_FIELDS).first()
+
+
+# from_db() expects the loaded values in model field order
+_FIELD_ORDER = tuple(f.attname for f in UserAuth._meta.concrete_fields if f.attname in SNAPSHOT_FIELDS)
+
+
+def user_from_snapshot(values: Dict[str, Any]) -> UserAuth:
+    """UserAuth instance with only the snapshot fields loaded; no query."""
+    return UserAuth.from_db("default", _FIELD_ORDER, [values[name] for name in _FIELD_ORDER])
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    Drop-in for simplejwt's JWTAuthentication (same token checks, same
+    errors) without its per-request SELECT on UserAuth.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if is_revoked(token.get(api_settings.JTI_CLAIM)):
+            raise AuthenticationFailed("Token has been revoked", code="token_revoked")
+        return token
+
+    def get_user(self, validated_token):
+        try:
+            # simplejwt writes the id as a string; request.user.pk must be the int
+            user_id = UserAuth._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, ValidationError):
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        raw = validated_token.get(CLAIM)
+        claims = decode_claims(raw)
+        if claims is not None and raw["at"] >= changed_at(user_id):
+            values = {**claims, "user_id": user_id}
+        else:
+            values = user_snapshots.get(user_id, loader=lambda: load_snapshot(user_id))
+            if values is None:
+                raise AuthenticationFailed("User not found", code="user_not_found")
+            # tokens issued before claims existed count as version 0
+            if (claims["token_version"] if claims else 0) < values["token_version"]:
+                raise AuthenticationFailed("Token has been revoked", code="token_revoked")
+
+        if not values["is_active"]:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return user_from_snapshot(values)
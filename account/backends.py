@@ -1,20 +1,96 @@
+import hashlib
+import re
+
+from django.conf import settings
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db.models import Q
+from django.db.models.functions import Lower
 
 User = get_user_model()
 
+PHONE_RE = re.compile(r"^\+?\d{6,15}$")
+
+# Unknown identifiers are remembered briefly so credential-stuffing bursts stay off the DB.
+NEGATIVE_CACHE_TTL = getattr(settings, "AUTH_NEGATIVE_CACHE_TTL", 30)
+
+
+def classify_identifier(identifier):
+    """
+    Return (kind, normalized value) with kind in {"email", "phone", "username"}.
+    """
+    value = identifier.strip()
+    if "@" in value:
+        return "email", value.lower()
+    if PHONE_RE.match(value):
+        return "phone", value
+    return "username", value.lower()
+
+
+def _negative_cache_key(kind, value):
+    digest = hashlib.sha1(value.encode()).hexdigest()
+    return f"auth:unknown:{kind}:{digest}"
+
+
+def forget_unknown_identifiers(*identifiers):
+    """Drop negative-cache entries, e.g. right after a user with these identifiers is saved."""
+    keys = []
+    for identifier in identifiers:
+        if identifier:
+            kind, value = classify_identifier(identifier)
+            keys.append(_negative_cache_key(kind, value))
+            if kind == "phone":  # digit-only usernames are looked up together with phones
+                keys.append(_negative_cache_key("username", value))
+    if keys:
+        cache.delete_many(keys)
+
+
+def _identifier_queryset(kind, value):
+    if kind == "email":
+        return User.objects.alias(email_lower=Lower("email")).filter(email_lower=value)
+    if kind == "phone":
+        return User.objects.alias(username_lower=Lower("username")).filter(
+            Q(phone=value) | Q(username_lower=value)
+        )
+    return User.objects.alias(username_lower=Lower("username")).filter(username_lower=value)
+
+
+def find_user_by_identifier(identifier):
+    """
+    Resolve an email/phone/username with a single query on one indexed column
+    (lower(email), phone, lower(username)); misses are negatively cached.
+    """
+    kind, value = classify_identifier(identifier)
+    neg_key = _negative_cache_key(kind, value)
+    if cache.get(neg_key):
+        return None
+
+    user = _identifier_queryset(kind, value).first()
+    if user is None:
+        cache.set(neg_key, 1, NEGATIVE_CACHE_TTL)
+    return user
+
+
+async def afind_user_by_identifier(identifier):
+    kind, value = classify_identifier(identifier)
+    neg_key = _negative_cache_key(kind, value)
+    if await cache.aget(neg_key):
+        return None
+
+    user = await _identifier_queryset(kind, value).afirst()
+    if user is None:
+        await cache.aset(neg_key, 1, NEGATIVE_CACHE_TTL)
+    return user
+
 
 class EmailPhoneUsernameBackend(ModelBackend):
     def authenticate(self, request, username=None, password=None, **kwargs):
         if username is None or password is None:
             return None
 
-        try:
-            user = User.objects.get(
-                Q(email__iexact=username) | Q(phone=username) | Q(username__iexact=username)
-            )
-        except User.DoesNotExist:
+        user = find_user_by_identifier(username)
+        if user is None:
             return None
 
         if user.check_password(password) and self.user_can_authenticate(user):
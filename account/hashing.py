@@ -0,0 +1,154 @@
+# account/hashing.py
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+from core.metrics import register_gauge, registry
+
+logger = logging.getLogger(__name__)
+
+# Per-worker limits. hashlib/argon2 release the GIL, so a small thread pool
+# keeps PBKDF2 work off the event loop without a process pool's IPC cost.
+PASSWORD_HASH_WORKERS = getattr(settings, "PASSWORD_HASH_WORKERS", 2)
+PASSWORD_HASH_MAX_QUEUE = getattr(settings, "PASSWORD_HASH_MAX_QUEUE", 32)
+
+
+class HashingPoolFull(Exception):
+    """Every worker and queue slot is taken; the API answers 503 (account/views.py)."""
+
+
+class HashingPool:
+    """
+    Bounded executor for password hashing.
+
+    At most `workers` hashes run at once and at most `max_queue` wait behind
+    them; anything beyond that is rejected immediately instead of piling up.
+    """
+
+    def __init__(self, workers: int, max_queue: int) -> None:
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {"submitted": 0, "completed": 0, "rejected": 0, "max_pending": 0, "wait_seconds": 0.0}
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="password-hash"
+                    )
+        return self._executor
+
+    def _release(self, _future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+            self._stats["completed"] += 1
+        self._slots.release()
+
+    def _timed(self, submitted: float, fn: Callable[..., Any], *args: Any) -> Any:
+        wait = time.perf_counter() - submitted
+        with self._lock:
+            self._stats["wait_seconds"] += wait
+        registry.observe("", "", [("password_hash_wait_seconds", wait)])
+        return fn(*args)
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats["rejected"] += 1
+            registry.inc("password_hash_rejected_total", "", "")
+            logger.warning("Password hashing pool saturated (%s pending)", self._pending)
+            raise HashingPoolFull()
+
+        with self._lock:
+            self._pending += 1
+            self._stats["submitted"] += 1
+            self._stats["max_pending"] = max(self._stats["max_pending"], self._pending)
+
+        future = self.executor.submit(self._timed, time.perf_counter(), fn, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def run_sync(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return self.submit(fn, *args).result()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            pending = self._pending
+            return {
+                **self._stats,
+                "pending": pending,
+                "queued": max(pending - self.workers, 0),
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+            }
+
+
+hashing_pool = HashingPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE)
+
+register_gauge(
+    "password_hash_queue_depth", "Password hashes waiting for a hashing pool thread.",
+    lambda: hashing_pool.stats()["queued"],
+)
+register_gauge(
+    "password_hash_in_flight", "Password hashes running or queued on the hashing pool.",
+    lambda: hashing_pool.stats()["pending"],
+)
+
+
+def _verify(raw_password: str, encoded: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """
+    Check a password and, if the stored hash uses an outdated hasher or work
+    factor, return a fresh hash for it (rehash-on-login).
+    """
+    if not check_password(raw_password, encoded):
+        return False, None
+
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return True, None
+
+    preferred = get_hasher("default")
+    if hasher.algorithm != preferred.algorithm or preferred.must_update(encoded):
+        return True, make_password(raw_password)
+    return True, None
+
+
+async def acheck_password(user: Any, raw_password: str) -> bool:
+    valid, new_encoded = await hashing_pool.run(_verify, raw_password, user.password)
+    if new_encoded:
+        user.password = new_encoded
+        await type(user)._default_manager.filter(pk=user.pk).aupdate(password=new_encoded)
+    return valid
+
+
+def check_password_bounded(user: Any, raw_password: str) -> bool:
+    valid, new_encoded = hashing_pool.run_sync(_verify, raw_password, user.password)
+    if new_encoded:
+        user.password = new_encoded
+        type(user)._default_manager.filter(pk=user.pk).update(password=new_encoded)
+    return valid
+
+
+async def amake_password(raw_password: Optional[str]) -> str:
+    return await hashing_pool.run(make_password, raw_password)
+
+
+def make_password_bounded(raw_password: Optional[str]) -> str:
+    return hashing_pool.run_sync(make_password, raw_password)
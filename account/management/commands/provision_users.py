@@ -0,0 +1,39 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from account.provisioning import PROVISION_BATCH_SIZE, PROVISION_HASH_WORKERS, provision_users
+from core.streaming import detect_format, iter_records
+
+
+class Command(BaseCommand):
+    help = "Bulk-create user accounts from a CSV or JSON Lines file, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or .jsonl file; columns as in account.provisioning.PROVISION_FIELDS.")
+        parser.add_argument("--format", dest="file_format", choices=["csv", "ndjson", "jsonl"], help="Default: from the file extension.")
+        parser.add_argument("--batch-size", type=int, default=PROVISION_BATCH_SIZE)
+        parser.add_argument("--hash-workers", type=int, default=PROVISION_HASH_WORKERS, help="Processes hashing given passwords.")
+        parser.add_argument("--no-otp", action="store_true", help="Don't queue verification emails.")
+        parser.add_argument("--dry-run", action="store_true", help="Validate and check conflicts only.")
+
+    def handle(self, *args, **options):
+        file_format = detect_format(options["path"], options["file_format"])
+        if file_format is None:
+            raise CommandError("Can't tell the format from the file name, pass --format.")
+
+        with open(options["path"], "rb") as fh:
+            report = provision_users(
+                iter_records(fh, file_format),
+                batch_size=options["batch_size"],
+                send_otp=not options["no_otp"],
+                dry_run=options["dry_run"],
+                hash_workers=options["hash_workers"],
+            )
+
+        for error in report["errors"]:
+            self.stderr.write(json.dumps(error))
+        self.stdout.write(
+            f"created={report['created']} failed={report['failed']}"
+            + (" (errors truncated)" if report["errors_truncated"] else "")
+        )
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from account.outbox import OUTBOX_BATCH_SIZE, dispatch_batch, purge_outbox
+
+PURGE_INTERVAL_SECONDS = 600
+
+
+class Command(BaseCommand):
+    help = "Deliver queued OTP emails/SMS from the outbox table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=OUTBOX_BATCH_SIZE)
+        parser.add_argument("--interval", type=float, default=1.0, help="Idle poll interval in seconds.")
+        parser.add_argument("--once", action="store_true", help="Drain due messages once and exit.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        interval = options["interval"]
+        last_purge = None
+
+        while True:
+            close_old_connections()
+            counts = dispatch_batch(batch_size)
+            if counts["claimed"]:
+                self.stdout.write(
+                    "claimed={claimed} sent={sent} retrying={retrying} failed={failed}".format(**counts)
+                )
+                continue
+
+            # Idle: drop delivered/failed rows past the retention window
+            if last_purge is None or time.monotonic() - last_purge >= PURGE_INTERVAL_SECONDS:
+                purged = purge_outbox()
+                last_purge = time.monotonic()
+                if purged:
+                    self.stdout.write(f"purged={purged}")
+
+            if options["once"]:
+                return
+            time.sleep(interval)
@@ -2,7 +2,8 @@ from django.contrib.auth.base_user import BaseUserManager
 from django.db import transaction
 from django.utils.translation import gettext_lazy as _
 
-from .utils import generate_username
+from .hashing import make_password_bounded
+from .utils import generate_unique_usernames
 
 
 class CustomUserManager(BaseUserManager):
@@ -18,7 +19,7 @@ class CustomUserManager(BaseUserManager):
 
         # Auto-generate username if missing
         if not extra_fields.get("username"):
-            extra_fields["username"] = generate_username(email)
+            extra_fields["username"] = generate_unique_usernames([email])[0]
 
         with transaction.atomic():
             user = self.model(
@@ -26,7 +27,7 @@ class CustomUserManager(BaseUserManager):
                 full_name=full_name,
                 **extra_fields,
             )
-            user.set_password(password)
+            user.password = make_password_bounded(password)
             user.save(using=self._db)
 
         return user
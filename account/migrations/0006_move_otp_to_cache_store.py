@@ -0,0 +1,25 @@
+# Generated by Django 5.2.9 on 2026-10-17 21:35
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0005_outboundmessage'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='userauth',
+            name='account_use_otp_63c8f2_idx',
+        ),
+        migrations.RemoveField(
+            model_name='userauth',
+            name='otp',
+        ),
+        migrations.RemoveField(
+            model_name='userauth',
+            name='otp_expired_at',
+        ),
+    ]
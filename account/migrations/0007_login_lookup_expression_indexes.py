@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-17 21:38
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0006_move_otp_to_cache_store'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userauth',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='account_email_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userauth',
+            index=models.Index(django.db.models.functions.text.Lower('username'), name='account_username_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.9 on 2026-10-17 21:52
+
+from django.db import migrations, models
+
+
+def queue_existing_profile_pics(apps, schema_editor):
+    UserAuth = apps.get_model("account", "UserAuth")
+    UserAuth.objects.exclude(profile_pic="").exclude(profile_pic__isnull=True).update(profile_pic_status="pending")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0007_login_lookup_expression_indexes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userauth',
+            name='profile_pic_status',
+            field=models.CharField(blank=True, choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], max_length=10),
+        ),
+        migrations.AddField(
+            model_name='userauth',
+            name='profile_pic_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddIndex(
+            model_name='userauth',
+            index=models.Index(fields=['profile_pic_status'], name='account_pic_status_idx'),
+        ),
+        migrations.RunPython(queue_existing_profile_pics, migrations.RunPython.noop),
+    ]
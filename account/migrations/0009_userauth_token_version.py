@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-17 22:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0008_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userauth',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-17 22:39
+
+import account.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0009_userauth_token_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userauth',
+            name='profile_pic',
+            field=models.ImageField(blank=True, null=True, upload_to='profile/', validators=[account.utils.validate_image_field]),
+        ),
+    ]
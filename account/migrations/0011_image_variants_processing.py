@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-17 22:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0010_image_field_validator'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userauth',
+            name='profile_pic_status',
+            field=models.CharField(blank=True, choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], max_length=10),
+        ),
+    ]
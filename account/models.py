@@ -1,8 +1,11 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
+from django.db.models.functions import Lower
 from django.utils import timezone
 from .managers import CustomUserManager
-from .utils import get_otp_expiry, validate_image, generate_otp
+from .utils import validate_image_field
+from core.images import VariantStatus
+from .otp import PURPOSE_VERIFY, OTP_TTL_SECONDS, issue_otp, verify_otp, revoke_otp
 
 
 
@@ -20,8 +23,11 @@ class UserAuth(AbstractBaseUser, PermissionsMixin):
             models.Index(fields=["email"]),
             models.Index(fields=["phone"]),
             models.Index(fields=["is_active", "is_verified"]),
-            models.Index(fields=["otp"]),
             models.Index(fields=["is_subscribed"]),
+            models.Index(fields=["profile_pic_status"], name="account_pic_status_idx"),
+            # case-insensitive login lookups (account.backends.find_user_by_identifier)
+            models.Index(Lower("email"), name="account_email_lower_idx"),
+            models.Index(Lower("username"), name="account_username_lower_idx"),
         ]
 
     user_id = models.BigAutoField(primary_key=True)
@@ -36,8 +42,11 @@ class UserAuth(AbstractBaseUser, PermissionsMixin):
         # default="profile/profile.png",
         null=True,
         blank=True,
-        validators=[validate_image],
+        validators=[validate_image_field],
     )
+    # resized copies of profile_pic, see core/images.py and `manage.py process_images`
+    profile_pic_variants = models.JSONField(default=dict, blank=True)
+    profile_pic_status = models.CharField(max_length=10, choices=VariantStatus.choices, blank=True)
     
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='Client')
     
@@ -50,15 +59,14 @@ class UserAuth(AbstractBaseUser, PermissionsMixin):
     country = models.CharField(max_length=100, null=True, blank=True)
     city = models.CharField(max_length=100, null=True, blank=True)
 
-    otp = models.CharField(max_length=6, null=True, blank=True)
-    otp_expired_at = models.DateTimeField(null=True, blank=True)
-
 
     is_verified = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     
     is_subscribed = models.BooleanField(default=False)
+    # bumped when role, is_active, is_superuser or password change; older tokens are rejected (account/authentication.py)
+    token_version = models.PositiveIntegerField(default=0)
 
     date_joined = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
@@ -72,22 +80,50 @@ class UserAuth(AbstractBaseUser, PermissionsMixin):
     def __str__(self) -> str:
         return self.email
 
-    def set_otp(self, otp: str | None = None, expiry_minutes: int = 30) -> None:
-        self.otp = otp or generate_otp()
-        self.otp_expired_at = get_otp_expiry(expiry_minutes)
-        self.save(update_fields=["otp", "otp_expired_at"])
+    # OTPs live in the cache-backed store (account/otp.py), keyed by email + purpose
+    def set_otp(self, purpose: str = PURPOSE_VERIFY, expiry_minutes: int = OTP_TTL_SECONDS // 60) -> str:
+        return issue_otp(self.email, purpose, ttl=expiry_minutes * 60)
 
-    def is_otp_valid(self, otp: str) -> bool:
-        return (
-            self.otp == otp
-            and self.otp_expired_at
-            and timezone.now() <= self.otp_expired_at
-        )
+    def is_otp_valid(self, otp: str, purpose: str = PURPOSE_VERIFY) -> bool:
+        return verify_otp(self.email, purpose, otp)
 
-    def clear_otp(self) -> None:
-        self.otp = None
-        self.otp_expired_at = None
-        self.save(update_fields=["otp", "otp_expired_at"])
+    def clear_otp(self, purpose: str = PURPOSE_VERIFY) -> None:
+        revoke_otp(self.email, purpose)
 
     def get_full_name(self) -> str:
         return self.full_name
+
+
+#outbox for email/sms delivery (written in the same transaction as the caller)
+class OutboundMessage(models.Model):
+    class Channel(models.TextChoices):
+        EMAIL = "email", "Email"
+        SMS = "sms", "SMS"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SENDING = "sending", "Sending"
+        SENT = "sent", "Sent"
+        FAILED = "failed", "Failed"
+
+    channel = models.CharField(max_length=10, choices=Channel.choices, default=Channel.EMAIL)
+    recipient = models.CharField(max_length=255)
+    subject = models.CharField(max_length=255, blank=True)
+    body = models.TextField()
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)  # also used as the claim lease while sending
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.channel}:{self.recipient} ({self.status})"
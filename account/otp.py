@@ -0,0 +1,140 @@
+# account/otp.py
+from __future__ import annotations
+
+import hashlib
+import hmac
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .utils import generate_otp
+
+# OTP purposes; a code issued for one purpose never verifies another.
+PURPOSE_VERIFY = "verify"
+PURPOSE_RESET = "reset"
+
+OTP_TTL_SECONDS = getattr(settings, "OTP_TTL_SECONDS", 30 * 60)
+OTP_MAX_ATTEMPTS = getattr(settings, "OTP_MAX_ATTEMPTS", 5)
+
+
+# ----------------------------
+# Keys & hashing
+# ----------------------------
+def _code_key(email: str, purpose: str) -> str:
+    return f"otp:{purpose}:{email.strip().lower()}"
+
+
+def _attempts_key(email: str, purpose: str) -> str:
+    return f"otp:{purpose}:{email.strip().lower()}:attempts"
+
+
+def _hash_code(email: str, purpose: str, code: str) -> str:
+    msg = f"{purpose}:{email.strip().lower()}:{code}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), msg, hashlib.sha256).hexdigest()
+
+
+# ----------------------------
+# Store API
+# ----------------------------
+def issue_otp(email: str, purpose: str, ttl: int = OTP_TTL_SECONDS, code: Optional[str] = None) -> str:
+    """
+    Create (or replace) the OTP for (email, purpose) and return the plain code.
+
+    Only an HMAC of the code is stored; both keys expire on their own, so
+    nothing ever has to be written back to the user row.
+    """
+    code = code or generate_otp()
+    cache.set_many(
+        {
+            _code_key(email, purpose): _hash_code(email, purpose, code),
+            _attempts_key(email, purpose): 0,
+        },
+        timeout=ttl,
+    )
+    return code
+
+
+def issue_otps(emails: Iterable[str], purpose: str, ttl: int = OTP_TTL_SECONDS) -> Dict[str, str]:
+    """issue_otp() for many addresses in one cache write; returns {email: code}."""
+    codes = {email: generate_otp() for email in emails}
+    values = {}
+    for email, code in codes.items():
+        values[_code_key(email, purpose)] = _hash_code(email, purpose, code)
+        values[_attempts_key(email, purpose)] = 0
+    if values:
+        cache.set_many(values, timeout=ttl)
+    return codes
+
+
+def verify_otp(email: str, purpose: str, code: str, consume: bool = True) -> bool:
+    """
+    Check `code` against the stored OTP for (email, purpose).
+
+    Every check counts as an attempt; once OTP_MAX_ATTEMPTS is exceeded the code
+    is dropped and a new one has to be issued.
+    """
+    stored = cache.get(_code_key(email, purpose))
+    if stored is None:
+        return False
+
+    try:
+        attempts = cache.incr(_attempts_key(email, purpose))
+    except ValueError:  # attempts key expired together with the code
+        return False
+
+    if attempts > OTP_MAX_ATTEMPTS:
+        revoke_otp(email, purpose)
+        return False
+
+    if not hmac.compare_digest(stored, _hash_code(email, purpose, code)):
+        return False
+
+    if consume:
+        revoke_otp(email, purpose)
+    return True
+
+
+def revoke_otp(email: str, purpose: str) -> None:
+    cache.delete_many([_code_key(email, purpose), _attempts_key(email, purpose)])
+
+
+# ----------------------------
+# Async variants (for AsyncAPIView handlers)
+# ----------------------------
+async def aissue_otp(email: str, purpose: str, ttl: int = OTP_TTL_SECONDS, code: Optional[str] = None) -> str:
+    code = code or generate_otp()
+    await cache.aset_many(
+        {
+            _code_key(email, purpose): _hash_code(email, purpose, code),
+            _attempts_key(email, purpose): 0,
+        },
+        timeout=ttl,
+    )
+    return code
+
+
+async def averify_otp(email: str, purpose: str, code: str, consume: bool = True) -> bool:
+    stored = await cache.aget(_code_key(email, purpose))
+    if stored is None:
+        return False
+
+    try:
+        attempts = await cache.aincr(_attempts_key(email, purpose))
+    except ValueError:
+        return False
+
+    if attempts > OTP_MAX_ATTEMPTS:
+        await arevoke_otp(email, purpose)
+        return False
+
+    if not hmac.compare_digest(stored, _hash_code(email, purpose, code)):
+        return False
+
+    if consume:
+        await arevoke_otp(email, purpose)
+    return True
+
+
+async def arevoke_otp(email: str, purpose: str) -> None:
+    await cache.adelete_many([_code_key(email, purpose), _attempts_key(email, purpose)])
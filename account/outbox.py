@@ -0,0 +1,235 @@
+# account/outbox.py
+from __future__ import annotations
+
+import logging
+import random
+from datetime import timedelta
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutboundMessage
+from .otp import OTP_TTL_SECONDS
+from .utils import send_sms
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = getattr(settings, "OUTBOX_BATCH_SIZE", 50)
+OUTBOX_MAX_ATTEMPTS = getattr(settings, "OUTBOX_MAX_ATTEMPTS", 6)
+OUTBOX_RETRY_BASE_SECONDS = getattr(settings, "OUTBOX_RETRY_BASE_SECONDS", 15)
+OUTBOX_RETRY_MAX_SECONDS = getattr(settings, "OUTBOX_RETRY_MAX_SECONDS", 3600)
+OUTBOX_LEASE_SECONDS = getattr(settings, "OUTBOX_LEASE_SECONDS", 120)
+OUTBOX_RETENTION_SECONDS = getattr(settings, "OUTBOX_RETENTION_SECONDS", 7 * 24 * 3600)
+
+OTP_EMAIL_SUBJECT = "Verify Your Email"
+
+
+# ----------------------------
+# Enqueue helpers
+# ----------------------------
+def enqueue_email(recipient_email: str, subject: str, message: str) -> OutboundMessage:
+    """
+    Queue an email for the outbox dispatcher.
+
+    The row is written on the caller's connection, so it commits (or rolls back)
+    together with whatever the caller is doing.
+    """
+    return OutboundMessage.objects.create(
+        channel=OutboundMessage.Channel.EMAIL,
+        recipient=recipient_email,
+        subject=subject,
+        body=message,
+    )
+
+
+def enqueue_sms(phone: str, message: str) -> OutboundMessage:
+    return OutboundMessage.objects.create(
+        channel=OutboundMessage.Channel.SMS,
+        recipient=phone,
+        body=message,
+    )
+
+
+def _otp_email_body(otp: str, expiry_minutes: int) -> str:
+    return f"Your verification code is {otp}. It expires in {expiry_minutes} minutes."
+
+
+def enqueue_otp_email(recipient_email: str, otp: str, expiry_minutes: int = OTP_TTL_SECONDS // 60) -> OutboundMessage:
+    return enqueue_email(recipient_email, subject=OTP_EMAIL_SUBJECT, message=_otp_email_body(otp, expiry_minutes))
+
+
+def enqueue_otp_emails(codes: Dict[str, str], expiry_minutes: int = OTP_TTL_SECONDS // 60) -> List[OutboundMessage]:
+    """enqueue_otp_email() for {email: otp} with one bulk INSERT."""
+    return OutboundMessage.objects.bulk_create(
+        OutboundMessage(
+            channel=OutboundMessage.Channel.EMAIL,
+            recipient=email,
+            subject=OTP_EMAIL_SUBJECT,
+            body=_otp_email_body(otp, expiry_minutes),
+        )
+        for email, otp in codes.items()
+    )
+
+
+def enqueue_otp_sms(phone: str, otp: str) -> OutboundMessage:
+    return enqueue_sms(phone, f"Your OTP is: {otp}")
+
+
+async def aenqueue_email(recipient_email: str, subject: str, message: str) -> OutboundMessage:
+    return await OutboundMessage.objects.acreate(
+        channel=OutboundMessage.Channel.EMAIL,
+        recipient=recipient_email,
+        subject=subject,
+        body=message,
+    )
+
+
+async def aenqueue_otp_email(recipient_email: str, otp: str, expiry_minutes: int = OTP_TTL_SECONDS // 60) -> OutboundMessage:
+    return await aenqueue_email(recipient_email, subject=OTP_EMAIL_SUBJECT, message=_otp_email_body(otp, expiry_minutes))
+
+
+# ----------------------------
+# Dispatcher
+# ----------------------------
+def get_retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff with jitter, capped at OUTBOX_RETRY_MAX_SECONDS."""
+    delay = min(OUTBOX_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)), OUTBOX_RETRY_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim_batch(batch_size: int = OUTBOX_BATCH_SIZE) -> List[OutboundMessage]:
+    """
+    Claim due messages for this worker.
+
+    Rows are locked with SKIP LOCKED so several dispatchers can run side by side.
+    A claimed row gets a lease in `next_attempt_at`; if the worker dies mid-send
+    the row becomes due again once the lease runs out.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        messages = list(
+            OutboundMessage.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=OutboundMessage.Status.PENDING) | Q(status=OutboundMessage.Status.SENDING),
+                next_attempt_at__lte=now,
+            )
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        if not messages:
+            return []
+
+        lease_until = now + timedelta(seconds=OUTBOX_LEASE_SECONDS)
+        OutboundMessage.objects.filter(pk__in=[m.pk for m in messages]).update(
+            status=OutboundMessage.Status.SENDING,
+            next_attempt_at=lease_until,
+        )
+    return messages
+
+
+def _mark_sent(message: OutboundMessage) -> None:
+    message.status = OutboundMessage.Status.SENT
+    message.attempts += 1
+    message.sent_at = timezone.now()
+    message.last_error = ""
+    message.body = ""  # OTP bodies hold live codes; don't keep them once delivered
+
+
+def _mark_failed(message: OutboundMessage, error: str) -> None:
+    message.attempts += 1
+    message.last_error = error[:1000]
+    if message.attempts >= OUTBOX_MAX_ATTEMPTS:
+        message.status = OutboundMessage.Status.FAILED
+        message.body = ""
+        logger.error("Giving up on outbound %s to %s: %s", message.channel, message.recipient, error)
+    else:
+        message.status = OutboundMessage.Status.PENDING
+        message.next_attempt_at = timezone.now() + get_retry_delay(message.attempts)
+
+
+def _send_emails(messages: List[OutboundMessage]) -> None:
+    from_email = getattr(settings, "EMAIL_HOST_USER", None) or getattr(
+        settings, "DEFAULT_FROM_EMAIL", None
+    )
+    # One SMTP session for the whole batch instead of connect/login/quit per message.
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        for message in messages:
+            _mark_failed(message, f"connection error: {exc}")
+        return
+
+    try:
+        for message in messages:
+            try:
+                EmailMessage(
+                    subject=message.subject,
+                    body=message.body,
+                    from_email=from_email,
+                    to=[message.recipient],
+                    connection=connection,
+                ).send(fail_silently=False)
+                _mark_sent(message)
+            except Exception as exc:
+                _mark_failed(message, str(exc))
+    finally:
+        try:
+            connection.close()
+        except Exception:  # pragma: no cover
+            logger.warning("Error closing SMTP connection", exc_info=True)
+
+
+def _send_sms(messages: List[OutboundMessage]) -> None:
+    for message in messages:
+        if send_sms(message.recipient, message.body):
+            _mark_sent(message)
+        else:
+            _mark_failed(message, "sms delivery failed")
+
+
+def dispatch_batch(batch_size: int = OUTBOX_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Claim and deliver one batch. Returns per-state counts for the batch.
+    """
+    messages = claim_batch(batch_size)
+    if not messages:
+        return {"claimed": 0, "sent": 0, "retrying": 0, "failed": 0}
+
+    emails = [m for m in messages if m.channel == OutboundMessage.Channel.EMAIL]
+    sms = [m for m in messages if m.channel == OutboundMessage.Channel.SMS]
+    if emails:
+        _send_emails(emails)
+    if sms:
+        _send_sms(sms)
+
+    OutboundMessage.objects.bulk_update(
+        messages,
+        ["status", "attempts", "next_attempt_at", "last_error", "sent_at", "body"],
+    )
+
+    counts = {"claimed": len(messages), "sent": 0, "retrying": 0, "failed": 0}
+    for message in messages:
+        if message.status == OutboundMessage.Status.SENT:
+            counts["sent"] += 1
+        elif message.status == OutboundMessage.Status.FAILED:
+            counts["failed"] += 1
+        else:
+            counts["retrying"] += 1
+    return counts
+
+
+def purge_outbox(retention_seconds: int = OUTBOX_RETENTION_SECONDS) -> int:
+    """
+    Delete sent and failed messages older than `retention_seconds`.
+    Returns the number of rows deleted.
+    """
+    cutoff = timezone.now() - timedelta(seconds=retention_seconds)
+    deleted, _ = OutboundMessage.objects.filter(
+        status__in=[OutboundMessage.Status.SENT, OutboundMessage.Status.FAILED],
+        created_at__lt=cutoff,
+    ).delete()
+    return deleted
@@ -1,13 +1,36 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
+from .tokens import token_claims
+
+
+# Role and is_superuser come from the token's "usr" claim when there is one
+# (revoked on change, see account/tokens.py), so these checks never need
+# the user row; other authentication falls back to request.user.
+def _claim(request, name):
+    claims = token_claims(getattr(request, "auth", None))
+    if claims is not None:
+        return claims[name]
+    return getattr(request.user, name, None)
+
+
+def _authenticated(request) -> bool:
+    return bool(request.user and request.user.is_authenticated)
+
+
 class IsOwnerOrSuperuser(BasePermission):
     __slots__ = ()
 
     def has_object_permission(self, request, view, obj):
-        user = request.user
-        if not user or not user.is_authenticated:
+        if not _authenticated(request):
             return False
-        return user.is_superuser or obj.owner_id == user.id
+        return bool(_claim(request, "is_superuser")) or obj.owner_id == request.user.pk
+
+
+class IsSuperuser(BasePermission):
+    __slots__ = ()
+
+    def has_permission(self, request, view):
+        return _authenticated(request) and bool(_claim(request, "is_superuser"))
 
 
 class IsSuperuserOrReadOnly(BasePermission):
@@ -16,24 +39,14 @@ class IsSuperuserOrReadOnly(BasePermission):
     def has_permission(self, request, view):
         if request.method in SAFE_METHODS:
             return True
-        user = request.user
-        return bool(user and user.is_authenticated and user.is_superuser)
-from rest_framework.permissions import BasePermission
+        return _authenticated(request) and bool(_claim(request, "is_superuser"))
 
 
 class IsAgent(BasePermission):
     def has_permission(self, request, view):
-        return (
-            request.user
-            and request.user.is_authenticated
-            and request.user.role == "Agent"
-        )
+        return _authenticated(request) and _claim(request, "role") == "Agent"
 
 
 class IsClient(BasePermission):
     def has_permission(self, request, view):
-        return (
-            request.user
-            and request.user.is_authenticated
-            and request.user.role == "Client"
-        )
+        return _authenticated(request) and _claim(request, "role") == "Client"
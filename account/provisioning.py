@@ -0,0 +1,259 @@
+# account/provisioning.py
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Tuple
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+
+from core.streaming import parse_bool
+from .backends import forget_unknown_identifiers
+from .models import UserAuth
+from .otp import PURPOSE_VERIFY, issue_otps
+from .outbox import enqueue_otp_emails
+from .utils import generate_unique_usernames
+
+# Bulk account creation for agency onboarding and data migrations. Per batch:
+# validate with the model fields, resolve email/phone/username conflicts with
+# one IN query each, hash passwords in a process pool, bulk_create, then queue
+# the verification OTP emails with one cache write and one INSERT.
+#
+# Rows may carry `password` (hashed here), `password_hash` (an encoded hash
+# from another Django install, kept as is) or neither, which gives an
+# unusable password: the user sets one through the forgot-password OTP flow.
+# Hashing dominates when passwords are given (PBKDF2 at Django's default work
+# factor is ~0.4 s per core), so large runs should come without them.
+
+PROVISION_BATCH_SIZE = getattr(settings, "PROVISION_BATCH_SIZE", 1000)
+PROVISION_MAX_ERRORS = getattr(settings, "PROVISION_MAX_ERRORS", 500)
+PROVISION_HASH_WORKERS = getattr(settings, "PROVISION_HASH_WORKERS", None) or os.cpu_count() or 1
+
+PROVISION_FIELDS = (
+    "email", "full_name", "role", "phone", "username", "is_verified",
+    "company", "agency_name", "website", "country", "city", "bio",
+)
+
+_FIELDS = {name: UserAuth._meta.get_field(name) for name in PROVISION_FIELDS}
+
+
+# ----------------------------
+# Validation
+# ----------------------------
+def clean_record(record: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, List[str]]]:
+    """
+    Validate one row with the model fields' own clean(). Returns (values,
+    errors); values also hold "password" or "password_hash" if given.
+    """
+    values: Dict[str, Any] = {}
+    errors: Dict[str, List[str]] = {}
+    for name, field in _FIELDS.items():
+        raw = record.get(name)
+        if isinstance(raw, str):
+            raw = raw.strip()
+        if raw in (None, ""):
+            if field.has_default():
+                values[name] = field.get_default()
+            elif not field.blank:
+                errors[name] = ["This field is required."]
+            else:
+                values[name] = None if field.null else ""
+            continue
+        if name == "is_verified":
+            raw = parse_bool(raw)
+        elif name == "email":
+            raw = raw.lower()
+        try:
+            values[name] = field.clean(raw, None)
+        except ValidationError as exc:
+            errors[name] = exc.messages
+
+    password, password_hash = record.get("password") or None, record.get("password_hash") or None
+    if password and password_hash:
+        errors["password"] = ["Give either password or password_hash."]
+    elif password_hash:
+        try:
+            identify_hasher(password_hash)
+            values["password_hash"] = password_hash
+        except ValueError:
+            errors["password_hash"] = ["Unknown password hash format."]
+    elif password:
+        values["password"] = str(password)
+    return values, errors
+
+
+def _existing(field: str, values: Iterable[str]) -> set:
+    """
+    Which of `values` are in use. Email and username compare lowercased,
+    matching the login lookups and their expression indexes.
+    """
+    values = {value.lower() for value in values if value}
+    if not values:
+        return set()
+    if field == "phone":
+        return set(UserAuth.objects.filter(phone__in=values).values_list("phone", flat=True))
+    lookup = f"{field}_lower"
+    return set(
+        UserAuth.objects.annotate(**{lookup: Lower(field)})
+        .filter(**{f"{lookup}__in": values})
+        .values_list(lookup, flat=True)
+    )
+
+
+def resolve_conflicts(rows: List[Dict[str, Any]]) -> Dict[int, Dict[str, List[str]]]:
+    """
+    Reject rows whose email, phone or username exists already or earlier in
+    the batch, and give generated usernames to rows without one. Returns
+    {row index: errors}.
+    """
+    errors: Dict[int, Dict[str, List[str]]] = {}
+    for field in ("email", "phone", "username"):
+        taken = _existing(field, (row[field] for row in rows))
+        for index, row in enumerate(rows):
+            value = row[field]
+            if not value or index in errors:
+                continue
+            if value.lower() in taken:
+                errors[index] = {field: [f"{field.capitalize()} already registered."]}
+            else:
+                taken.add(value.lower())
+
+    missing = [index for index, row in enumerate(rows) if not row["username"] and index not in errors]
+    if missing:
+        requested = [row["username"] for row in rows if row["username"]]
+        for index, username in zip(missing, generate_unique_usernames([rows[i]["email"] for i in missing], requested)):
+            rows[index]["username"] = username
+    return errors
+
+
+# ----------------------------
+# Hashing
+# ----------------------------
+_executors: Dict[int, ProcessPoolExecutor] = {}
+
+
+def _hash_executor(workers: int) -> ProcessPoolExecutor:
+    # processes, not hashing.py's request-sized thread pool: this is pure
+    # throughput, and not every hasher releases the GIL
+    if workers not in _executors:
+        _executors[workers] = ProcessPoolExecutor(max_workers=workers, initializer=django.setup)
+    return _executors[workers]
+
+
+def hash_passwords(passwords: List[str], workers: int = PROVISION_HASH_WORKERS) -> List[str]:
+    if workers <= 1 or len(passwords) < 2:
+        return [make_password(password) for password in passwords]
+    chunksize = max(1, len(passwords) // (workers * 4))
+    return list(_hash_executor(workers).map(make_password, passwords, chunksize=chunksize))
+
+
+# ----------------------------
+# Provisioning
+# ----------------------------
+def _build_users(rows: List[Dict[str, Any]], workers: int) -> List[UserAuth]:
+    to_hash = [index for index, row in enumerate(rows) if "password" in row]
+    hashes = dict(zip(to_hash, hash_passwords([rows[index]["password"] for index in to_hash], workers)))
+    users = []
+    for index, row in enumerate(rows):
+        values = {name: row[name] for name in PROVISION_FIELDS}
+        user = UserAuth(**values)
+        user.password = hashes.get(index) or row.get("password_hash") or make_password(None)
+        users.append(user)
+    return users
+
+
+def _insert(users: List[UserAuth], batch_size: int) -> Tuple[List[UserAuth], List[Tuple[UserAuth, str]]]:
+    """
+    bulk_create the batch. If a concurrent signup took an email or username
+    since the check, fall back to row-by-row inserts so only that row fails.
+    """
+    try:
+        with transaction.atomic():
+            return UserAuth.objects.bulk_create(users, batch_size=batch_size), []
+    except IntegrityError:
+        pass
+    created, failed = [], []
+    for user in users:
+        try:
+            with transaction.atomic():
+                user.save(force_insert=True)
+            created.append(user)
+        except IntegrityError as exc:
+            failed.append((user, str(exc)))
+    return created, failed
+
+
+def provision_users(
+    records: Iterable[Tuple[int, Any]],
+    batch_size: int = PROVISION_BATCH_SIZE,
+    send_otp: bool = True,
+    dry_run: bool = False,
+    hash_workers: int = PROVISION_HASH_WORKERS,
+) -> Dict[str, Any]:
+    """
+    Create users from (row number, record dict) pairs, e.g. iter_records()
+    of a CSV/JSON Lines file. Invalid or conflicting rows are skipped and
+    reported; batches commit independently. Unverified users get a
+    verification OTP email through the outbox unless send_otp is False.
+
+    Returns {"created", "failed", "errors": [{"row", "errors"}], "errors_truncated"}.
+    """
+    report: Dict[str, Any] = {"created": 0, "failed": 0, "errors": [], "errors_truncated": False}
+
+    def fail(line_no: int, errors: Dict[str, List[str]]) -> None:
+        report["failed"] += 1
+        if len(report["errors"]) < PROVISION_MAX_ERRORS:
+            report["errors"].append({"row": line_no, "errors": errors})
+        else:
+            report["errors_truncated"] = True
+
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, batch_size))
+        if not chunk:
+            break
+
+        rows, line_numbers = [], []
+        for line_no, record in chunk:
+            if isinstance(record, ValidationError):
+                fail(line_no, {"non_field_errors": record.messages})
+                continue
+            values, errors = clean_record(record)
+            if errors:
+                fail(line_no, errors)
+                continue
+            rows.append(values)
+            line_numbers.append(line_no)
+
+        conflicts = resolve_conflicts(rows)
+        for index, errors in conflicts.items():
+            fail(line_numbers[index], errors)
+        rows = [row for index, row in enumerate(rows) if index not in conflicts]
+        line_numbers = [line_no for index, line_no in enumerate(line_numbers) if index not in conflicts]
+        if not rows:
+            continue
+        if dry_run:
+            report["created"] += len(rows)
+            continue
+
+        users = _build_users(rows, hash_workers)
+        line_of = {id(user): line_no for user, line_no in zip(users, line_numbers)}
+        with transaction.atomic():
+            created, failed = _insert(users, batch_size)
+            unverified = [user.email for user in created if not user.is_verified]
+            if send_otp and unverified:
+                enqueue_otp_emails(issue_otps(unverified, PURPOSE_VERIFY))
+
+        # bulk_create sends no post_save: clear what the signal would have
+        forget_unknown_identifiers(*(value for user in created for value in (user.email, user.phone, user.username)))
+        report["created"] += len(created)
+        for user, error in failed:
+            fail(line_of[id(user)], {"non_field_errors": [error]})
+    return report
+
@@ -0,0 +1,120 @@
+# account/revocation.py
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.settings import api_settings
+
+from core.bloom import BloomFilter
+from core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Revoked token ids (jti) are cache keys living until the token would have
+# expired anyway. Every worker keeps a Bloom filter of them, so the common
+# "not revoked" answer costs no round trip: only a filter hit (a revoked
+# token, or a rare false positive) reads the cache. With Redis, revocations
+# are also appended to a sorted set that each worker pulls into its filter
+# every AUTH_REVOCATION_SYNC_INTERVAL seconds, and the filter is rebuilt from
+# it every AUTH_REVOCATION_REBUILD_INTERVAL seconds to drop expired entries.
+# Revoking all of a user's tokens is UserAuth.token_version
+# (account/authentication.py), not a jti per token.
+
+AUTH_REVOCATION_SYNC_INTERVAL = getattr(settings, "AUTH_REVOCATION_SYNC_INTERVAL", 1)
+AUTH_REVOCATION_REBUILD_INTERVAL = getattr(settings, "AUTH_REVOCATION_REBUILD_INTERVAL", 10 * 60)
+AUTH_REVOCATION_CAPACITY = getattr(settings, "AUTH_REVOCATION_CAPACITY", 200_000)
+
+REDIS_KEY = "auth:revocations"
+_SYNC_OVERLAP_MS = 2000  # re-read this much history per sync: clock skew between workers
+_MAX_LIFETIME_MS = int(max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME).total_seconds() * 1000)
+
+
+def _key(jti: str) -> str:
+    return f"auth:revoked:{jti}"
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _remaining(token: Any) -> int:
+    """Seconds until `token` expires, at least 1."""
+    return max(1, int(token["exp"] - time.time()))
+
+
+class RevocationFilter:
+    """This worker's Bloom filter of revoked jtis, kept in step with Redis."""
+
+    def __init__(self, capacity: int = AUTH_REVOCATION_CAPACITY) -> None:
+        self.capacity = capacity
+        self.bloom = BloomFilter(capacity)
+        self._lock = threading.Lock()
+        self._synced_ms = 0
+        self._next_sync = 0.0
+        self._next_rebuild = 0.0
+
+    def add(self, jti: str) -> None:
+        self.bloom.add(jti)
+
+    def might_contain(self, jti: str) -> bool:
+        if time.monotonic() >= self._next_sync:
+            self.sync()
+        return jti in self.bloom
+
+    def sync(self) -> None:
+        # one thread syncs; the others keep reading the current filter
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic()
+            self._next_sync = now + AUTH_REVOCATION_SYNC_INTERVAL
+            client = get_redis()
+            if client is None:
+                return  # locmem cache: revocations are this process's own
+            started_ms = _now_ms()
+            if now >= self._next_rebuild:
+                client.zremrangebyscore(REDIS_KEY, "-inf", started_ms - _MAX_LIFETIME_MS)
+                bloom = BloomFilter(self.capacity)
+                for jti in client.zrange(REDIS_KEY, 0, -1):
+                    bloom.add(jti.decode())
+                self.bloom = bloom
+                self._next_rebuild = now + AUTH_REVOCATION_REBUILD_INTERVAL
+            else:
+                # a local revoke racing a rebuild is in the overlap window of the next sync
+                for jti in client.zrangebyscore(REDIS_KEY, self._synced_ms - _SYNC_OVERLAP_MS, "+inf"):
+                    self.bloom.add(jti.decode())
+            self._synced_ms = started_ms
+        except Exception:
+            logger.warning("Revocation filter sync failed", exc_info=True)
+        finally:
+            self._lock.release()
+
+
+revocations = RevocationFilter()
+
+
+def revoke_token(token: Any) -> bool:
+    """
+    Revoke one validated token (access or refresh) until it expires.
+    Returns False if it was already revoked, which refresh rotation treats
+    as reuse.
+    """
+    jti = token[api_settings.JTI_CLAIM]
+    added = cache.add(_key(jti), 1, timeout=_remaining(token))
+    revocations.add(jti)
+    if added:
+        client = get_redis()
+        if client is not None:
+            client.zadd(REDIS_KEY, {jti: _now_ms()})
+    return added
+
+
+def is_revoked(jti: Optional[str]) -> bool:
+    if not jti or not revocations.might_contain(jti):
+        return False
+    return cache.get(_key(jti)) is not None
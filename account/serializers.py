@@ -1,24 +1,31 @@
 #account/serialziers.py
 from rest_framework import serializers
 from .models import UserAuth
-from django.utils import timezone
 
 from rest_framework import serializers
-from django.contrib.auth.hashers import make_password
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 
 from django.contrib.auth import get_user_model
 User = get_user_model()
 
 from .utils import (
-    generate_username,
-    send_otp_email,
+    generate_unique_usernames,
     generate_tokens_for_user,
-    generate_otp,
-    get_otp_expiry,
 )
+from .outbox import enqueue_otp_email, aenqueue_otp_email
+from .backends import afind_user_by_identifier
+from .hashing import acheck_password, make_password_bounded
+from .authentication import revoke_tokens
+from .revocation import revoke_token
+from .tokens import CLAIM_FIELDS, UserRefreshToken, token_claims
+from .otp import PURPOSE_VERIFY, PURPOSE_RESET, issue_otp, aissue_otp, averify_otp
+from core.images import variant_urls
+from core.streaming import detect_format
 
 class UserInfoSerializer(serializers.ModelSerializer):
     profile_pic_url = serializers.SerializerMethodField()
+    profile_pic_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = UserAuth
@@ -35,6 +42,7 @@ class UserInfoSerializer(serializers.ModelSerializer):
             "country",
             "city",
             "profile_pic_url",
+            "profile_pic_variants",
             "is_verified",
             "is_active",
             "is_staff",
@@ -53,6 +61,12 @@ class UserInfoSerializer(serializers.ModelSerializer):
         url = obj.profile_pic.url
         return request.build_absolute_uri(url) if request else url
 
+    def get_profile_pic_variants(self, obj: UserAuth):
+        # empty until `manage.py process_images` has rendered them; clients fall back to profile_pic_url
+        if not obj.profile_pic:
+            return []
+        return variant_urls(obj.profile_pic_variants, obj.profile_pic.storage, self.context.get("request"))
+
 
 
 class SignupSerializer(serializers.Serializer):
@@ -92,81 +106,70 @@ class SignupSerializer(serializers.Serializer):
 
     def create(self, validated_data):
         raw_password = validated_data.pop("password")
+        # async signup hashes on the bounded pool first and passes the result in
+        password_hash = validated_data.pop("password_hash", None)
 
-        # Generate username if missing
+        # Generate username if missing (checked against existing ones: the column is unique)
         if not validated_data.get("username"):
-            validated_data["username"] = generate_username(validated_data["email"])
+            validated_data["username"] = generate_unique_usernames([validated_data["email"]])[0]
 
         user = User(**validated_data)
-        user.password = make_password(raw_password)
-
-        # OTP fields (match your model: otp + otp_expired_at)
-        user.otp = generate_otp()
-        user.otp_expired_at = get_otp_expiry(30)  # 30 minutes
+        user.password = password_hash or make_password_bounded(raw_password)
         user.is_verified = False
 
         user.save()
 
-        # Send OTP
-        message = f"Your verification code is {user.otp}. It expires in 30 minutes."
-        send_otp_email(user.email, message)
+        # Queue OTP; delivered by the outbox dispatcher after commit
+        otp = issue_otp(user.email, PURPOSE_VERIFY)
+        enqueue_otp_email(user.email, otp)
 
         return user
 
 
 
 class VerifyOTPSerializer(serializers.Serializer):
+    email = serializers.EmailField(required=True)
     otp = serializers.CharField(max_length=6, write_only=True)
 
     def validate(self, data):
+        data["email"] = data["email"].lower().strip()
+        return data
+
+    async def asave(self):
+        data = self.validated_data
         try:
-            user = User.objects.get(otp=data["otp"], otp_expired_at__gte=timezone.now())
+            user = await User.objects.aget(email=data["email"])
         except User.DoesNotExist:
-            raise serializers.ValidationError({"otp": "Invalid or expired OTP."})
+            raise serializers.ValidationError({"otp": ["Invalid or expired OTP."]})
 
         if user.is_verified:
-            raise serializers.ValidationError({"otp": "User already verified."})
+            raise serializers.ValidationError({"otp": ["User already verified."]})
 
-        data["user"] = user
-        return data
+        if not await averify_otp(user.email, PURPOSE_VERIFY, data["otp"]):
+            raise serializers.ValidationError({"otp": ["Invalid or expired OTP."]})
 
-    def save(self, **kwargs):
-        user = self.validated_data["user"]
-        from django.db import transaction
-        with transaction.atomic():
-            user.is_verified = True
-            user.otp = None
-            user.otp_expired = None
-            user.save(update_fields=["is_verified", "otp", "otp_expired_at"])
+        user.is_verified = True
+        await user.asave(update_fields=["is_verified"])
         return user
 
 
 class ResendVerifyOTPSerializer(serializers.Serializer):
     email = serializers.EmailField(required=True)
 
-    def validate(self, data):
+    async def asave(self):
         try:
-            user = User.objects.get(email=data["email"])
+            user = await User.objects.only('user_id', 'email', 'is_verified').aget(email=self.validated_data["email"])
         except User.DoesNotExist:
-            raise serializers.ValidationError({"email": "Email not registered."})
+            raise serializers.ValidationError({"email": ["Email not registered."]})
 
         if user.is_verified:
-            raise serializers.ValidationError({"email": "User already verified."})
-
-        data["user"] = user
-        return data
-
-    def save(self, **kwargs):
-        user = self.validated_data["user"]
+            raise serializers.ValidationError({"email": ["User already verified."]})
 
-        # Generate new OTP
-        user.otp = generate_otp()
-        user.otp_expired_at = get_otp_expiry()
-        user.save(update_fields=["otp", "otp_expired_at"])
+        # Generate new OTP (replaces any previous code and resets attempts)
+        otp = await aissue_otp(user.email, PURPOSE_VERIFY)
 
-        # Send SMS
-        message = f"Your new verification code is {user.otp}. It expires in 30 minutes."
-        send_otp_email(user.email, message)
+        # Queue OTP; delivered by the outbox dispatcher
+        await aenqueue_otp_email(user.email, otp)
 
         return user
     
@@ -185,57 +188,58 @@ class LoginSerializer(serializers.Serializer):
                 "password": "Password is required."
             })
 
-        user = User.objects.filter(email__iexact=email).first()
-        if not user or not user.check_password(password):
-            raise serializers.ValidationError({"detail": "Invalid credentials."})
+        return attrs
+
+    async def aauthenticate(self):
+        """Password check runs on the bounded hashing pool, off the event loop."""
+        user = await afind_user_by_identifier(self.validated_data['email'])
+        if not user or not await acheck_password(user, self.validated_data['password']):
+            raise serializers.ValidationError({"detail": ["Invalid credentials."]})
 
         if not user.is_active:
-            raise serializers.ValidationError({"detail": "This account is inactive."})
+            raise serializers.ValidationError({"detail": ["This account is inactive."]})
 
-        attrs['user'] = user
-        return attrs
+        return user
 
 
 class ForgetPasswordSerializer(serializers.Serializer):
     email = serializers.EmailField()
 
-    def validate_email(self, value):
+    async def asave(self):
         try:
-            user = User.objects.only('email', 'otp', 'otp_expired_at').get(email=value)
+            user = await User.objects.only('user_id', 'email').aget(email=self.validated_data['email'])
         except User.DoesNotExist:
-            raise serializers.ValidationError("user account not found.")
+            raise serializers.ValidationError({"email": ["user account not found."]})
 
-        self.context['user'] = user
-        return value
-
-    def save(self):
-        user = self.context['user']
-        user.set_otp()
-        user.save(update_fields=['otp', 'otp_expired_at'])
-        send_otp_email(user.email, user.otp)
+        otp = await aissue_otp(user.email, PURPOSE_RESET)
+        await aenqueue_otp_email(user.email, otp)
         return user
     
     
     
 class VerifyForgetPasswordOTPSerializer(serializers.Serializer):
+    email = serializers.EmailField(required=True)
     otp = serializers.CharField(max_length=6, write_only=True)
 
-    def validate_otp(self, value):
+    async def averify(self):
+        attrs = self.validated_data
         try:
-            user = User.objects.only(
-                'user_id', 'email', 'otp', 'otp_expired_at', 'is_verified'
-            ).get(otp=value)
+            # every claim field too: the token is issued on the event loop,
+            # where a deferred field can't be loaded
+            user = await User.objects.only(
+                'user_id', 'email', *CLAIM_FIELDS
+            ).aget(email=attrs['email'])
         except User.DoesNotExist:
-            raise serializers.ValidationError("Invalid or expired OTP.")
+            raise serializers.ValidationError({"otp": ["Invalid or expired OTP."]})
 
         if not user.is_verified:
-            raise serializers.ValidationError("user account is not verified. Please, verify your email first.")
+            raise serializers.ValidationError({"otp": ["user account is not verified. Please, verify your email first."]})
 
-        if user.otp_expired_at is None or user.otp_expired_at < timezone.now():
-            raise serializers.ValidationError("OTP has expired.")
+        if not await averify_otp(user.email, PURPOSE_RESET, attrs['otp']):
+            raise serializers.ValidationError({"otp": ["Invalid or expired OTP."]})
 
         self.context['user'] = user
-        return value
+        return user
 
     def create_access_token(self):
         user = self.context['user']
@@ -274,8 +278,67 @@ class ResetPasswordSerializer(serializers.Serializer):
         attrs["user"] = user
         return attrs
 
-    def save(self):
+    def save(self, password_hash=None):
         user = self.validated_data["user"]
-        user.set_password(self.validated_data["new_password"])
+        user.password = password_hash or make_password_bounded(self.validated_data["new_password"])
         user.save(update_fields=["password"])
-        return user
\ No newline at end of file
+        return user
+
+class TokenRefreshSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+
+    def rotate(self):
+        """
+        Exchange a refresh token for a new access/refresh pair; the old one is
+        revoked. Presenting an already rotated refresh token means it leaked,
+        so every token of that user is revoked.
+        """
+        try:
+            refresh = UserRefreshToken(self.validated_data["refresh"])
+        except TokenError:
+            raise InvalidToken("Refresh token is invalid or expired.")
+
+        user = User.objects.filter(pk=refresh.get(jwt_settings.USER_ID_CLAIM)).first()
+        if user is None or not user.is_active:
+            raise InvalidToken("Refresh token is invalid or expired.")
+
+        claims = token_claims(refresh)
+        if (claims["token_version"] if claims else 0) < user.token_version:
+            raise InvalidToken("Token has been revoked.", code="token_revoked")
+
+        if not revoke_token(refresh):
+            revoke_tokens(user.pk)
+            raise InvalidToken("Token has been revoked.", code="token_reused")
+
+        return generate_tokens_for_user(user)
+
+
+class LogoutSerializer(serializers.Serializer):
+    refresh = serializers.CharField(required=False)
+
+    def save(self):
+        """Revoke the request's access token and, if given, the user's refresh token."""
+        request = self.context["request"]
+        raw = self.validated_data.get("refresh")
+        if raw:
+            try:
+                refresh = UserRefreshToken(raw)
+            except TokenError:
+                raise serializers.ValidationError({"refresh": "Refresh token is invalid or expired."})
+            if str(refresh.get(jwt_settings.USER_ID_CLAIM)) != str(request.user.pk):  # the claim is a string
+                raise serializers.ValidationError({"refresh": "Refresh token belongs to another user."})
+            revoke_token(refresh)
+        revoke_token(request.auth)
+
+
+class ProvisionUsersSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(choices=["csv", "ndjson", "jsonl"], required=False)
+    send_otp = serializers.BooleanField(default=True)
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        attrs["file_format"] = detect_format(attrs["file"].name, attrs.get("file_format"))
+        if attrs["file_format"] is None:
+            raise serializers.ValidationError({"file_format": "Use a .csv or .jsonl file, or set file_format."})
+        return attrs
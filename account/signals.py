@@ -0,0 +1,44 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from core.images import track_image_change
+from .authentication import on_user_saved, privileges_changed, remember_privileges, revoke_tokens
+from .backends import forget_unknown_identifiers
+from .models import UserAuth
+
+
+@receiver(pre_save, sender=UserAuth)
+def queue_profile_pic_variants(sender, instance, **kwargs):
+    track_image_change(instance, "profile_pic", "profile_pic_variants", "profile_pic_status", kwargs.get("update_fields"))
+
+
+@receiver(post_save, sender=UserAuth)
+def clear_unknown_identifier_cache(sender, instance, **kwargs):
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and not {"email", "phone", "username"} & set(update_fields):
+        return  # also keeps deferred identifiers of a token-built request.user unloaded
+    forget_unknown_identifiers(instance.email, instance.phone, instance.username)
+
+
+@receiver(post_init, sender=UserAuth)
+def remember_token_privileges(sender, instance, **kwargs):
+    remember_privileges(instance)
+
+
+@receiver(post_save, sender=UserAuth)
+def revoke_tokens_on_privilege_change(sender, instance, created, **kwargs):
+    if created or not privileges_changed(instance, kwargs.get("update_fields")):
+        return
+    revoke_tokens(instance.pk)
+    instance.__dict__.pop("token_version", None)  # deferred: reloads the bumped value on access
+    remember_privileges(instance)
+
+
+@receiver(post_save, sender=UserAuth)
+def invalidate_auth_snapshot(sender, instance, **kwargs):
+    on_user_saved(instance.pk, kwargs.get("update_fields"))
+
+
+@receiver(post_delete, sender=UserAuth)
+def invalidate_auth_snapshot_on_delete(sender, instance, **kwargs):
+    on_user_saved(instance.pk)
@@ -0,0 +1,261 @@
+# account/social.py
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import jwt
+import requests
+from asgiref.sync import sync_to_async
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from django.conf import settings
+
+from core.cache import LocalTTLCache
+
+logger = logging.getLogger(__name__)
+
+HTTP_TIMEOUT = 3
+HTTP_POOL_SIZE = getattr(settings, "SOCIAL_HTTP_POOL_SIZE", 20)
+JWKS_TTL = getattr(settings, "SOCIAL_JWKS_TTL", 60 * 60)
+JWKS_MIN_REFRESH_INTERVAL = 60  # don't hammer the IdP when tokens carry unknown kids
+VERIFIED_TOKEN_TTL = getattr(settings, "SOCIAL_TOKEN_CACHE_TTL", 5 * 60)
+
+FACEBOOK_ME_URL = "https://graph.facebook.com/me"
+
+
+# ----------------------------
+# Pooled HTTP client
+# ----------------------------
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Process-wide keep-alive session, so IdP calls reuse TLS connections."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=4,
+                    pool_maxsize=HTTP_POOL_SIZE,
+                    max_retries=Retry(
+                        total=2,
+                        backoff_factor=0.2,
+                        status_forcelist=(502, 503, 504),
+                        allowed_methods=("GET",),
+                    ),
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+# ----------------------------
+# JWKS
+# ----------------------------
+class JWKSCache:
+    """
+    Signing keys of one identity provider, keyed by `kid`.
+
+    Keys are refetched after JWKS_TTL, or early when a token names a kid we
+    don't know yet (the provider rotated), at most once per
+    JWKS_MIN_REFRESH_INTERVAL.
+    """
+
+    def __init__(self, url: str, ttl: int = JWKS_TTL) -> None:
+        self.url = url
+        self.ttl = ttl
+        self._keys: Dict[str, Any] = {}
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        response = get_http_session().get(self.url, timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+        keys = {}
+        for jwk in response.json().get("keys", []):
+            try:
+                keys[jwk["kid"]] = jwt.PyJWK(jwk).key
+            except (KeyError, jwt.PyJWKError):
+                continue
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+
+    def get_key(self, kid: str) -> Any:
+        age = time.monotonic() - self._fetched_at
+        key = self._keys.get(kid)
+        if key is not None and age < self.ttl:
+            return key
+
+        with self._lock:
+            age = time.monotonic() - self._fetched_at
+            if age >= self.ttl or (kid not in self._keys and age >= JWKS_MIN_REFRESH_INTERVAL):
+                self._refresh()
+
+        key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unknown signing key: {kid}")
+        return key
+
+
+# ----------------------------
+# Providers
+# ----------------------------
+def _microsoft_issuer_ok(claims: Dict[str, Any]) -> bool:
+    return claims.get("iss") == f"https://login.microsoftonline.com/{claims.get('tid')}/v2.0"
+
+
+@dataclass
+class IdentityProvider:
+    name: str
+    jwks: JWKSCache
+    audiences_setting: str
+    issuers: Sequence[str] = ()
+    issuer_check: Optional[Callable[[Dict[str, Any]], bool]] = None
+
+    @property
+    def audiences(self) -> Sequence[str]:
+        return getattr(settings, self.audiences_setting, ())
+
+
+PROVIDERS: Dict[str, IdentityProvider] = {
+    "google": IdentityProvider(
+        name="google",
+        jwks=JWKSCache("https://www.googleapis.com/oauth2/v3/certs"),
+        audiences_setting="GOOGLE_CLIENT_IDS",
+        issuers=("accounts.google.com", "https://accounts.google.com"),
+    ),
+    "apple": IdentityProvider(
+        name="apple",
+        jwks=JWKSCache("https://appleid.apple.com/auth/keys"),
+        audiences_setting="APPLE_CLIENT_IDS",
+        issuers=("https://appleid.apple.com",),
+    ),
+    "microsoft": IdentityProvider(
+        name="microsoft",
+        jwks=JWKSCache("https://login.microsoftonline.com/common/discovery/v2.0/keys"),
+        audiences_setting="MICROSOFT_CLIENT_IDS",
+        issuer_check=_microsoft_issuer_ok,
+    ),
+}
+
+# Already-verified tokens -> claims. A retried or repeated login with the same
+# token is answered from memory without any signature work or network I/O.
+_verified_tokens = LocalTTLCache(maxsize=10_000, ttl=VERIFIED_TOKEN_TTL)
+
+
+def _token_cache_key(provider: str, token: str) -> str:
+    return f"{provider}:{hashlib.sha256(token.encode()).hexdigest()}"
+
+
+def verify_id_token(provider_name: str, token: str) -> Dict[str, Any]:
+    """
+    Verify an OIDC id_token locally against the provider's cached JWKS.
+
+    Raises jwt.InvalidTokenError (or requests.RequestException while fetching
+    keys) when the token can't be trusted.
+    """
+    provider = PROVIDERS[provider_name]
+    cache_key = _token_cache_key(provider_name, token)
+    claims = _verified_tokens.get(cache_key)
+    if claims is not None:
+        return claims
+
+    audiences = list(provider.audiences)
+    if not audiences:
+        raise jwt.InvalidTokenError(f"{provider.audiences_setting} is not configured")
+
+    header = jwt.get_unverified_header(token)
+    algorithm = header.get("alg")
+    if algorithm not in ("RS256", "ES256"):
+        raise jwt.InvalidTokenError(f"Unexpected signing algorithm: {algorithm}")
+
+    claims = jwt.decode(
+        token,
+        provider.jwks.get_key(header.get("kid", "")),
+        algorithms=[algorithm],
+        audience=audiences,
+        options={"require": ["exp", "iat", "iss", "aud", "sub"]},
+        leeway=30,
+    )
+    if provider.issuer_check is not None:
+        if not provider.issuer_check(claims):
+            raise jwt.InvalidIssuerError("Invalid issuer")
+    elif claims["iss"] not in provider.issuers:
+        raise jwt.InvalidIssuerError("Invalid issuer")
+
+    ttl = min(VERIFIED_TOKEN_TTL, claims["exp"] - time.time())
+    if ttl > 0:
+        _verified_tokens.set(cache_key, claims, ttl=ttl)
+    return claims
+
+
+def _profile(email: Optional[str], full_name: str, picture: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    if not email:
+        return None
+    return {"email": email, "full_name": full_name, "profile_pic_url": picture}
+
+
+def decode_social_token(provider_name: str, token: str) -> Optional[Dict[str, Any]]:
+    """
+    Return {"email", "full_name", "profile_pic_url"} for a valid social token,
+    or None. Facebook tokens are opaque, so they still go to the Graph API (and
+    the raw /me payload is returned), but over the pooled session and with the
+    result cached like verified id_tokens.
+    """
+    try:
+        if provider_name == "facebook":
+            return _facebook_profile(token)
+
+        claims = verify_id_token(provider_name, token)
+    except (jwt.PyJWTError, requests.RequestException, ValueError) as exc:
+        logger.info("Rejected %s token: %s", provider_name, exc)
+        return None
+
+    email = claims.get("email")
+    if provider_name == "google":
+        if claims.get("email_verified") in (False, "false"):
+            return None
+        return _profile(email, claims.get("name", ""), claims.get("picture"))
+    if provider_name == "apple":
+        return _profile(email, claims.get("name", email.split("@")[0] if email else ""))
+    # Microsoft: accounts are matched by email, and in multi-tenant apps both
+    # "email" and "preferred_username" can be set by the user. Only accept an
+    # email the tenant verified (the xms_edov optional claim).
+    if not (_claim_true(claims.get("xms_edov")) or _claim_true(claims.get("email_verified"))):
+        return None
+    return _profile(email, claims.get("name", ""))
+
+
+def _claim_true(value: Any) -> bool:
+    return value in (True, 1, "true", "True", "1")
+
+
+async def adecode_social_token(provider_name: str, token: str) -> Optional[Dict[str, Any]]:
+    # network I/O only (no ORM), so it doesn't need the thread-sensitive executor
+    return await sync_to_async(decode_social_token, thread_sensitive=False)(provider_name, token)
+
+
+def _facebook_profile(access_token: str) -> Optional[Dict[str, Any]]:
+    cache_key = _token_cache_key("facebook", access_token)
+    data = _verified_tokens.get(cache_key)
+    if data is None:
+        response = get_http_session().get(
+            FACEBOOK_ME_URL,
+            params={"fields": "id,name,email", "access_token": access_token},
+            timeout=HTTP_TIMEOUT,
+        )
+        data = response.json()
+        if "error" in data:
+            return None
+        _verified_tokens.set(cache_key, data)
+    return data
@@ -1,3 +1,775 @@
-from django.test import TestCase
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+import jwt
+from asgiref.sync import async_to_sync
+from cryptography.hazmat.primitives.asymmetric import rsa
+from datetime import timedelta
+
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from core.metrics import MetricsRegistry, render
+from core.ratelimit import limiter
+from . import outbox, provisioning, revocation, social, utils
+from .authentication import CachedJWTAuthentication
+from .backends import afind_user_by_identifier, classify_identifier, find_user_by_identifier
+from .hashing import HashingPool, HashingPoolFull
+from .models import OutboundMessage, UserAuth
+from .otp import (
+    OTP_MAX_ATTEMPTS, OTP_TTL_SECONDS, PURPOSE_RESET, PURPOSE_VERIFY, _code_key, aissue_otp, averify_otp, issue_otp,
+    issue_otps, verify_otp,
+)
+from .tokens import UserRefreshToken
+from .utils import generate_tokens_for_user
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+def reset_limits():
+    limiter.blocked.clear()
+    limiter.local.states.clear()
+
+
+class OTPStoreTests(SimpleTestCase):
+    email = "store@example.com"
+
+    def setUp(self):
+        cache.clear()
+
+    def wrong(self, code):
+        return "000000" if code != "000000" else "111111"
+
+    def test_only_a_hash_is_stored(self):
+        code = issue_otp(self.email, PURPOSE_VERIFY)
+        stored = cache.get(_code_key(self.email, PURPOSE_VERIFY))
+        self.assertTrue(stored)
+        self.assertNotIn(code, stored)
+        codes = issue_otps(["a@example.com", "b@example.com"], PURPOSE_VERIFY)
+        for email, bulk_code in codes.items():
+            self.assertNotIn(bulk_code, cache.get(_code_key(email, PURPOSE_VERIFY)))
+            self.assertTrue(verify_otp(email, PURPOSE_VERIFY, bulk_code))
+
+    def test_code_is_revoked_after_a_successful_verify(self):
+        code = issue_otp(self.email, PURPOSE_VERIFY)
+        self.assertTrue(verify_otp(self.email, PURPOSE_VERIFY, code))
+        self.assertFalse(verify_otp(self.email, PURPOSE_VERIFY, code))
+
+    def test_lockout_after_max_attempts(self):
+        code = issue_otp(self.email, PURPOSE_VERIFY)
+        for _ in range(OTP_MAX_ATTEMPTS - 1):
+            self.assertFalse(verify_otp(self.email, PURPOSE_VERIFY, self.wrong(code)))
+        self.assertTrue(verify_otp(self.email, PURPOSE_VERIFY, code, consume=False))  # last allowed attempt
+        # the correct code no longer works once the attempts are used up
+        self.assertFalse(verify_otp(self.email, PURPOSE_VERIFY, code))
+        self.assertIsNone(cache.get(_code_key(self.email, PURPOSE_VERIFY)))
+
+    def test_reissuing_resets_the_attempts(self):
+        code = issue_otp(self.email, PURPOSE_VERIFY)
+        for _ in range(OTP_MAX_ATTEMPTS):
+            verify_otp(self.email, PURPOSE_VERIFY, self.wrong(code))
+        code = issue_otp(self.email, PURPOSE_VERIFY)
+        self.assertTrue(verify_otp(self.email, PURPOSE_VERIFY, code))
+
+    def test_purposes_are_separate(self):
+        code = issue_otp(self.email, PURPOSE_VERIFY)
+        self.assertFalse(verify_otp(self.email, PURPOSE_RESET, code))
+        reset = issue_otp(self.email, PURPOSE_RESET, code=code)  # same digits, other purpose
+        self.assertTrue(verify_otp(self.email, PURPOSE_RESET, reset))
+        self.assertTrue(verify_otp(self.email, PURPOSE_VERIFY, code))
+
+    def test_email_is_case_insensitive(self):
+        code = issue_otp(" Store@Example.com", PURPOSE_VERIFY)
+        self.assertTrue(verify_otp(self.email, PURPOSE_VERIFY, code))
+
+    def test_codes_expire(self):
+        code = issue_otp(self.email, PURPOSE_VERIFY, ttl=1)
+        time.sleep(1.1)
+        self.assertFalse(verify_otp(self.email, PURPOSE_VERIFY, code))
+
+    async def test_async_variants_share_the_store(self):
+        code = await aissue_otp(self.email, PURPOSE_RESET)
+        self.assertFalse(await averify_otp(self.email, PURPOSE_VERIFY, code))
+        self.assertTrue(verify_otp(self.email, PURPOSE_RESET, code, consume=False))
+        self.assertTrue(await averify_otp(self.email, PURPOSE_RESET, code))
+        self.assertFalse(await averify_otp(self.email, PURPOSE_RESET, code))
+
+
+class PasswordResetOTPTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_limits()
+        self.user = UserAuth.objects.create_user(email="reset@example.com", full_name="Reset User", is_verified=True)
+
+    async def test_verify_otp_returns_access_token(self):
+        otp = await aissue_otp(self.user.email, PURPOSE_RESET)
+        response = await self.async_client.post(
+            "/v1/account/password/verify-otp/", {"email": self.user.email, "otp": otp}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()["data"]
+        self.assertEqual(data["user"]["user_id"], self.user.pk)
+        self.assertTrue(data["access_token"])
+
+    async def test_wrong_otp_keeps_the_code(self):
+        otp = await aissue_otp(self.user.email, PURPOSE_RESET)
+        response = await self.async_client.post(
+            "/v1/account/password/verify-otp/", {"email": self.user.email, "otp": "000000" if otp != "000000" else "111111"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(verify_otp(self.user.email, PURPOSE_RESET, otp, consume=False))
+
+    async def test_errors_keep_the_list_shape(self):
+        unverified = await UserAuth.objects.acreate(email="new@example.com", full_name="New")
+        cases = [
+            ("/v1/account/verify-otp/registration/", {"email": unverified.email, "otp": "000000"},
+             {"otp": ["Invalid or expired OTP."]}),
+            ("/v1/account/verify-otp/registration/", {"email": self.user.email, "otp": "000000"},
+             {"otp": ["User already verified."]}),
+            ("/v1/account/resend-otp/", {"email": "nobody@example.com"}, {"email": ["Email not registered."]}),
+            ("/v1/account/resend-otp/", {"email": self.user.email}, {"email": ["User already verified."]}),
+            ("/v1/account/forget-password/", {"email": "nobody@example.com"}, {"email": ["user account not found."]}),
+            ("/v1/account/password/verify-otp/", {"email": self.user.email, "otp": "000000"},
+             {"otp": ["Invalid or expired OTP."]}),
+            ("/v1/account/password/verify-otp/", {"email": unverified.email, "otp": "000000"},
+             {"otp": ["user account is not verified. Please, verify your email first."]}),
+        ]
+        for url, payload, errors in cases:
+            with self.subTest(url=url, payload=payload):
+                response = await self.async_client.post(url, payload, content_type="application/json")
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), errors)
+
+class LoginTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_limits()
+        self.user = UserAuth.objects.create_user(email="login@example.com", full_name="Login", password="correct-horse")
+
+    async def test_bad_credentials_keep_the_list_shape(self):
+        for email, password in (("login@example.com", "wrong-horse"), ("nobody@example.com", "correct-horse")):
+            with self.subTest(email=email):
+                response = await self.async_client.post(
+                    "/v1/account/login/", {"email": email, "password": password}, content_type="application/json"
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {"detail": ["Invalid credentials."]})
+
+    async def test_login(self):
+        response = await self.async_client.post(
+            "/v1/account/login/", {"email": "login@example.com", "password": "correct-horse"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+    async def test_saturated_hashing_pool_is_a_503(self):
+        with mock.patch("account.hashing.hashing_pool.submit", side_effect=HashingPoolFull):
+            response = await self.async_client.post(
+                "/v1/account/login/", {"email": "login@example.com", "password": "correct-horse"},
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["detail"], "Server is busy, please try again shortly.")
+
+
+class HashingPoolMetricsTests(SimpleTestCase):
+    def test_wait_time_rejections_and_queue_depth_are_exported(self):
+        pool = HashingPool(workers=1, max_queue=1)
+        release = threading.Event()
+        metrics = MetricsRegistry()
+        with mock.patch("account.hashing.registry", metrics):
+            running = pool.submit(release.wait)
+            queued = pool.submit(int)
+            with self.assertRaises(HashingPoolFull):
+                pool.submit(int)
+            self.assertEqual(pool.stats()["queued"], 1)
+            release.set()
+            running.result()
+            queued.result()
+
+        stats = pool.stats()
+        self.assertEqual((stats["completed"], stats["rejected"], stats["queued"]), (2, 1, 0))
+        self.assertGreater(stats["wait_seconds"], 0)
+        with mock.patch("core.metrics.get_redis", return_value=None):  # this process's values only
+            text = render(metrics.snapshot())
+        self.assertIn("password_hash_wait_seconds_count 2\n", text)
+        self.assertIn("password_hash_rejected_total 1\n", text)
+        self.assertIn("# TYPE password_hash_queue_depth gauge\npassword_hash_queue_depth 0\n", text)
+
+
+class OutboxTests(TestCase):
+    def enqueue(self, count=1):
+        return [outbox.enqueue_email(f"user{index}@example.com", "Subject", f"Body {index}") for index in range(count)]
+
+    def test_claim_batch_leases_due_messages(self):
+        due = self.enqueue(3)
+        later = outbox.enqueue_email("later@example.com", "Subject", "Body")
+        OutboundMessage.objects.filter(pk=later.pk).update(next_attempt_at=timezone.now() + timedelta(minutes=5))
+
+        claimed = outbox.claim_batch(batch_size=2)
+        self.assertEqual([m.pk for m in claimed], [m.pk for m in due[:2]])
+        for message in OutboundMessage.objects.filter(pk__in=[m.pk for m in claimed]):
+            self.assertEqual(message.status, OutboundMessage.Status.SENDING)
+            self.assertGreater(message.next_attempt_at, timezone.now())
+
+        # leased rows are not claimed again until the lease runs out
+        self.assertEqual([m.pk for m in outbox.claim_batch()], [due[2].pk])
+        self.assertEqual(outbox.claim_batch(), [])
+
+    def test_batch_is_sent_over_one_connection(self):
+        self.enqueue(3)
+        with mock.patch.object(outbox, "get_connection", wraps=outbox.get_connection) as get_connection:
+            counts = outbox.dispatch_batch()
+        get_connection.assert_called_once()
+        self.assertEqual(counts, {"claimed": 3, "sent": 3, "retrying": 0, "failed": 0})
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [f"user{i}@example.com" for i in range(3)])
+        for message in OutboundMessage.objects.all():
+            self.assertEqual(message.status, OutboundMessage.Status.SENT)
+            self.assertEqual(message.attempts, 1)
+            self.assertIsNotNone(message.sent_at)
+
+    def test_failed_send_is_retried_with_backoff(self):
+        message = self.enqueue()[0]
+        with mock.patch("django.core.mail.EmailMessage.send", side_effect=OSError("connection reset")):
+            counts = outbox.dispatch_batch()
+        self.assertEqual(counts["retrying"], 1)
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboundMessage.Status.PENDING)
+        self.assertEqual(message.attempts, 1)
+        self.assertEqual(message.last_error, "connection reset")
+        self.assertEqual(message.body, "Body 0")
+        delay = (message.next_attempt_at - timezone.now()).total_seconds()
+        self.assertGreater(delay, outbox.OUTBOX_RETRY_BASE_SECONDS * 0.7)
+        self.assertLessEqual(delay, outbox.OUTBOX_RETRY_BASE_SECONDS * 1.2)
+
+        # not due yet, then delivered once the backoff has passed
+        self.assertEqual(outbox.dispatch_batch()["claimed"], 0)
+        OutboundMessage.objects.filter(pk=message.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(outbox.dispatch_batch()["sent"], 1)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts, message.last_error), (OutboundMessage.Status.SENT, 2, ""))
+
+    def test_backoff_doubles_up_to_the_cap(self):
+        with mock.patch.object(outbox.random, "uniform", return_value=1.0):
+            delays = [outbox.get_retry_delay(attempts).total_seconds() for attempts in range(1, 12)]
+        self.assertEqual(delays[:3], [outbox.OUTBOX_RETRY_BASE_SECONDS * factor for factor in (1, 2, 4)])
+        self.assertEqual(delays[-1], outbox.OUTBOX_RETRY_MAX_SECONDS)
+
+    def test_last_attempt_marks_the_message_failed(self):
+        message = self.enqueue()[0]
+        OutboundMessage.objects.filter(pk=message.pk).update(attempts=outbox.OUTBOX_MAX_ATTEMPTS - 1)
+        with mock.patch("django.core.mail.EmailMessage.send", side_effect=OSError("mailbox unavailable")):
+            counts = outbox.dispatch_batch()
+        self.assertEqual(counts["failed"], 1)
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboundMessage.Status.FAILED)
+        self.assertEqual(message.attempts, outbox.OUTBOX_MAX_ATTEMPTS)
+        self.assertEqual(message.last_error, "mailbox unavailable")
+        self.assertEqual(message.body, "")
+        self.assertEqual(outbox.claim_batch(), [])
+
+    def test_connection_error_fails_the_whole_batch(self):
+        self.enqueue(2)
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.open", side_effect=OSError("refused")):
+            counts = outbox.dispatch_batch()
+        self.assertEqual(counts["retrying"], 2)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(set(OutboundMessage.objects.values_list("last_error", flat=True)), {"connection error: refused"})
+
+    def test_otp_emails_state_the_store_ttl(self):
+        expiry = f"expires in {OTP_TTL_SECONDS // 60} minutes"
+        self.assertIn(expiry, outbox.enqueue_otp_email("otp@example.com", "123456").body)
+        self.assertIn(expiry, outbox.enqueue_otp_emails({"bulk@example.com": "654321"})[0].body)
+
+    def test_delivered_otp_bodies_are_blanked(self):
+        message = outbox.enqueue_otp_email("otp@example.com", "123456")
+        self.assertIn("123456", message.body)
+        outbox.dispatch_batch()
+        self.assertIn("123456", mail.outbox[0].body)
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboundMessage.Status.SENT)
+        self.assertEqual(message.body, "")
+
+    def test_purge_drops_only_old_finished_rows(self):
+        old = timezone.now() - timedelta(seconds=outbox.OUTBOX_RETENTION_SECONDS + 60)
+        for status in OutboundMessage.Status.values:
+            message = outbox.enqueue_email("old@example.com", "Subject", "Body")
+            OutboundMessage.objects.filter(pk=message.pk).update(status=status, created_at=old)
+        recent = outbox.enqueue_email("recent@example.com", "Subject", "Body")
+        OutboundMessage.objects.filter(pk=recent.pk).update(status=OutboundMessage.Status.SENT)
+
+        self.assertEqual(outbox.purge_outbox(), 2)
+        remaining = set(OutboundMessage.objects.values_list("recipient", "status"))
+        self.assertEqual(
+            remaining,
+            {
+                ("old@example.com", OutboundMessage.Status.PENDING),
+                ("old@example.com", OutboundMessage.Status.SENDING),
+                ("recent@example.com", OutboundMessage.Status.SENT),
+            },
+        )
+
+
+class IdentifierLookupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserAuth.objects.create_user(
+            email="Mixed.Case@Example.com", full_name="Lookup", phone="+15550100", username="MixedUser"
+        )
+
+    def test_classify_identifier(self):
+        cases = {
+            " Someone@Example.COM ": ("email", "someone@example.com"),
+            "+15550100": ("phone", "+15550100"),
+            "5550100": ("phone", "5550100"),
+            "12345": ("username", "12345"),  # too short for a phone number
+            "+1 555 0100": ("username", "+1 555 0100"),
+            " Some_User ": ("username", "some_user"),
+        }
+        for identifier, expected in cases.items():
+            with self.subTest(identifier):
+                self.assertEqual(classify_identifier(identifier), expected)
+
+    def test_lookups_are_case_insensitive(self):
+        for identifier in ("mixed.case@example.com", "MIXED.CASE@EXAMPLE.COM", "+15550100", "mixeduser", "MIXEDUSER"):
+            with self.subTest(identifier):
+                with self.assertNumQueries(1):
+                    self.assertEqual(find_user_by_identifier(identifier), self.user)
+
+    def test_digit_only_usernames_resolve(self):
+        user = UserAuth.objects.create_user(email="digits@example.com", full_name="Digits", username="24681357")
+        self.assertEqual(find_user_by_identifier("24681357"), user)
+
+    def test_misses_are_negatively_cached(self):
+        self.assertIsNone(find_user_by_identifier("ghost@example.com"))
+        self.assertIsNone(async_to_sync(afind_user_by_identifier)("ghost-too@example.com"))
+        with self.assertNumQueries(0):
+            self.assertIsNone(async_to_sync(afind_user_by_identifier)("Ghost@Example.com"))
+            self.assertIsNone(find_user_by_identifier("ghost-too@example.com"))
+
+    def test_signup_clears_the_negative_cache(self):
+        for identifier in ("new@example.com", "+15550199", "newcomer"):
+            self.assertIsNone(find_user_by_identifier(identifier))
+        user = UserAuth.objects.create_user(
+            email="New@Example.com", full_name="New", phone="+15550199", username="Newcomer"
+        )
+        for identifier in ("new@example.com", "+15550199", "newcomer"):
+            with self.subTest(identifier):
+                self.assertEqual(find_user_by_identifier(identifier), user)
+
+    def test_changing_an_identifier_clears_the_negative_cache(self):
+        self.assertIsNone(find_user_by_identifier("renamed"))
+        self.user.username = "Renamed"
+        self.user.save(update_fields=["username"])
+        self.assertEqual(find_user_by_identifier("renamed"), self.user)
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserAuth.objects.create_user(email="auth@example.com", full_name="Auth User")
+
+    def test_user_pk_is_an_int_on_the_claim_path(self):
+        token = UserRefreshToken.for_user(self.user).access_token
+        with self.assertNumQueries(0):
+            user = CachedJWTAuthentication().get_user(token)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertIsInstance(user.pk, int)
+
+    def test_user_pk_is_an_int_on_the_snapshot_path(self):
+        token = AccessToken.for_user(self.user)  # no "usr" claim
+        user = CachedJWTAuthentication().get_user(token)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertIsInstance(user.pk, int)
+
+    def test_logout_accepts_own_refresh_token_on_the_snapshot_path(self):
+        refresh = RefreshToken.for_user(self.user)
+        response = self.client.post(
+            "/v1/account/logout/", {"refresh": str(refresh)}, content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserAuth.objects.create_user(email="revoke@example.com", full_name="Revoke User")
+        self.tokens = generate_tokens_for_user(self.user)
+
+    def get(self, access):
+        return self.client.get("/v1/jobs/dashboard/", HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def refresh(self, token):
+        return self.client.post("/v1/account/token/refresh/", {"refresh": token}, content_type="application/json")
+
+    def test_logged_out_tokens_are_rejected(self):
+        self.assertEqual(self.get(self.tokens["access"]).status_code, 200)
+        response = self.client.post(
+            "/v1/account/logout/", {"refresh": self.tokens["refresh"]}, content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        self.assertEqual(self.get(self.tokens["access"]).status_code, 401)
+        self.assertEqual(self.refresh(self.tokens["refresh"]).status_code, 401)
+        other = generate_tokens_for_user(self.user)  # another device is still logged in
+        self.assertEqual(self.get(other["access"]).status_code, 200)
+
+    def test_logout_rejects_someone_elses_refresh_token(self):
+        other = UserAuth.objects.create_user(email="other-revoke@example.com", full_name="Other")
+        theirs = generate_tokens_for_user(other)
+        response = self.client.post(
+            "/v1/account/logout/", {"refresh": theirs["refresh"]}, content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.refresh(theirs["refresh"]).status_code, 200)
+
+    def test_a_rotated_refresh_token_cannot_be_reused(self):
+        response = self.refresh(self.tokens["refresh"])
+        self.assertEqual(response.status_code, 200, response.content)
+        rotated = response.json()["data"]["tokens"]
+        self.assertEqual(self.get(rotated["access"]).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reused = self.refresh(self.tokens["refresh"])
+        self.assertEqual(reused.status_code, 401)
+        self.assertEqual(reused.json()["code"], "token_reused")
+        # reuse means the token leaked: the rotated pair dies with it
+        self.assertEqual(self.get(rotated["access"]).status_code, 401)
+        self.assertEqual(self.refresh(rotated["refresh"]).status_code, 401)
+
+    def test_logout_all_invalidates_every_token(self):
+        devices = [self.tokens, generate_tokens_for_user(self.user)]
+        for tokens in devices:
+            self.assertEqual(self.get(tokens["access"]).status_code, 200)  # warms the claim and snapshot paths
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/v1/account/logout-all/", HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+        self.assertEqual(response.status_code, 200, response.content)
+
+        for tokens in devices:
+            self.assertEqual(self.get(tokens["access"]).status_code, 401)
+            self.assertEqual(self.refresh(tokens["refresh"]).status_code, 401)
+        fresh = generate_tokens_for_user(UserAuth.objects.get(pk=self.user.pk))
+        self.assertEqual(self.get(fresh["access"]).status_code, 200)
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is not installed")
+class RevocationFilterTests(SimpleTestCase):
+    """Two workers' filters kept in step through the Redis sorted set."""
+
+    def setUp(self):
+        cache.clear()
+        self.redis = fakeredis.FakeRedis()
+        self.local = revocation.RevocationFilter(capacity=1000)  # this worker, revoking
+        self.remote = revocation.RevocationFilter(capacity=1000)  # another worker, syncing
+        for patcher in (
+            mock.patch.object(revocation, "get_redis", return_value=self.redis),
+            mock.patch.object(revocation, "revocations", self.local),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def revoke(self):
+        token = AccessToken()
+        revocation.revoke_token(token)
+        return token["jti"]
+
+    def sync(self, rebuild=False):
+        self.remote._next_sync = 0
+        if rebuild:
+            self.remote._next_rebuild = 0
+
+    def test_revocations_reach_other_workers(self):
+        first = self.revoke()
+        self.assertTrue(revocation.is_revoked(first))
+        self.assertTrue(self.remote.might_contain(first))  # first read rebuilds from the set
+
+        second = self.revoke()
+        self.assertFalse(self.remote.might_contain(second))  # until the next sync interval
+        self.sync()
+        self.assertTrue(self.remote.might_contain(second))
+        self.assertTrue(self.remote.might_contain(first))
+        self.assertEqual(self.redis.zcard(revocation.REDIS_KEY), 2)
+
+    def test_rebuild_drops_expired_entries_only(self):
+        live = [self.revoke() for _ in range(20)]
+        expired = [f"expired-{index}" for index in range(20)]
+        self.redis.zadd(revocation.REDIS_KEY, {jti: 1 for jti in expired})  # revoked long before any token could live
+        self.sync(rebuild=True)
+        self.assertTrue(all(self.remote.might_contain(jti) for jti in live))
+
+        self.assertEqual(self.redis.zcard(revocation.REDIS_KEY), len(live))
+        self.assertLessEqual(sum(jti in self.remote.bloom for jti in expired), 1)  # false positives only
+        self.assertEqual(self.remote.bloom.count, len(live))
+
+    def test_unrevoked_tokens_cost_no_cache_read(self):
+        self.revoke()
+        with mock.patch.object(revocation.cache, "get") as get:
+            self.assertFalse(revocation.is_revoked("never-revoked"))
+        get.assert_not_called()
+
+    def test_a_failed_sync_keeps_the_filter(self):
+        jti = self.revoke()
+        self.assertTrue(self.remote.might_contain(jti))
+        self.sync(rebuild=True)
+        with mock.patch.object(self.redis, "zremrangebyscore", side_effect=ConnectionError), \
+                self.assertLogs(revocation.logger, "WARNING"):
+            self.assertTrue(self.remote.might_contain(jti))
+
+
+class StubIdentityProvider:
+    """Serves a JWKS over HTTP on localhost and signs id_tokens with its keys."""
+
+    def __init__(self):
+        self.keys = {}
+        self.published = []
+        self.requests = 0
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                provider.requests += 1
+                body = json.dumps({"keys": [provider.jwk(kid) for kid in provider.published]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/keys"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def add_key(self, kid, publish=True):
+        self.keys[kid] = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        if publish:
+            self.published.append(kid)
+
+    def jwk(self, kid):
+        jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(self.keys[kid].public_key()))
+        return {**jwk, "kid": kid, "alg": "RS256", "use": "sig"}
+
+    def token(self, kid="key-1", key=None, algorithm="RS256", **claims):
+        now = int(time.time())
+        payload = {
+            "iss": "https://accounts.google.com", "aud": "client-id", "sub": "123",
+            "iat": now, "exp": now + 600, "email": "social@example.com", "email_verified": True, "name": "Social",
+        }
+        payload.update(claims)
+        return jwt.encode(payload, key or self.keys[kid], algorithm=algorithm, headers={"kid": kid})
+
+
+@override_settings(GOOGLE_CLIENT_IDS=["client-id"], MICROSOFT_CLIENT_IDS=["client-id"])
+class SocialTokenTests(SimpleTestCase):
+    def setUp(self):
+        self.idp = StubIdentityProvider()
+        self.addCleanup(self.idp.close)
+        self.idp.add_key("key-1")
+        social._verified_tokens.clear()
+        providers = {
+            name: social.IdentityProvider(
+                name=name, jwks=social.JWKSCache(self.idp.url), audiences_setting=provider.audiences_setting,
+                issuers=provider.issuers, issuer_check=provider.issuer_check,
+            )
+            for name, provider in social.PROVIDERS.items()
+        }
+        patcher = mock.patch.dict(social.PROVIDERS, providers)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_valid_token(self):
+        profile = social.decode_social_token("google", self.idp.token())
+        self.assertEqual(profile, {"email": "social@example.com", "full_name": "Social", "profile_pic_url": None})
+
+    def test_rejected_tokens(self):
+        self.idp.add_key("unpublished", publish=False)
+        cases = {
+            "signature": self.idp.token(key=self.idp.keys["unpublished"]),
+            "audience": self.idp.token(aud="another-client"),
+            "issuer": self.idp.token(iss="https://evil.example.com"),
+            "expired": self.idp.token(exp=int(time.time()) - 120),
+            "unverified email": self.idp.token(email_verified=False),
+            "symmetric algorithm": jwt.encode(
+                {"iss": "https://accounts.google.com", "aud": "client-id", "sub": "1", "iat": 0, "exp": 2**31},
+                "secret", algorithm="HS256", headers={"kid": "key-1"},
+            ),
+            "no signature": jwt.encode({"sub": "1"}, None, algorithm="none", headers={"kid": "key-1"}),
+        }
+        for case, token in cases.items():
+            with self.subTest(case):
+                self.assertIsNone(social.decode_social_token("google", token))
+
+    def test_unknown_kid_refetches_keys_once_per_interval(self):
+        self.assertIsNotNone(social.decode_social_token("google", self.idp.token()))
+        self.assertEqual(self.idp.requests, 1)
+
+        self.idp.add_key("key-2")  # the provider rotates
+        rotated = self.idp.token(kid="key-2")
+        self.assertIsNone(social.decode_social_token("google", rotated))  # fetched less than a minute ago
+        self.assertEqual(self.idp.requests, 1)
+
+        with mock.patch.object(social, "JWKS_MIN_REFRESH_INTERVAL", 0):
+            self.assertIsNotNone(social.decode_social_token("google", rotated))
+        self.assertEqual(self.idp.requests, 2)
+
+    def test_verified_tokens_are_cached(self):
+        token = self.idp.token()
+        social.verify_id_token("google", token)
+        with mock.patch.object(social.jwt, "decode") as decode:
+            claims = social.verify_id_token("google", token)
+        decode.assert_not_called()
+        self.assertEqual(claims["sub"], "123")
+        self.assertEqual(self.idp.requests, 1)
+
+    def test_microsoft_requires_a_verified_email(self):
+        tenant = "00000000-0000-0000-0000-000000000001"
+
+        def token(**claims):
+            claims = {"iss": f"https://login.microsoftonline.com/{tenant}/v2.0", "tid": tenant, "email_verified": None, **claims}
+            return self.idp.token(**claims)
+
+        cases = {
+            "preferred_username only": (token(email=None, preferred_username="ceo@example.com"), None),
+            "unverified email": (token(), None),
+            "xms_edov": (token(xms_edov=True), "social@example.com"),
+            "email_verified": (token(email_verified=True), "social@example.com"),
+        }
+        for case, (id_token, email) in cases.items():
+            with self.subTest(case):
+                profile = social.decode_social_token("microsoft", id_token)
+                self.assertEqual(profile and profile["email"], email)
+
+
+class ProvisioningTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def row(self, **values):
+        values, errors = provisioning.clean_record({"full_name": "Someone", **values})
+        self.assertEqual(errors, {})
+        return values
+
+    def test_clean_record(self):
+        values, errors = provisioning.clean_record(
+            {"email": " New@Example.COM ", "full_name": "New", "is_verified": "yes", "role": "Agent"}
+        )
+        self.assertEqual(errors, {})
+        self.assertEqual((values["email"], values["is_verified"], values["role"]), ("new@example.com", True, "Agent"))
+        self.assertIsNone(values["phone"])
+        self.assertNotIn("password", values)
+
+        cases = {
+            "required": ({"email": ""}, {"email", "full_name"}),
+            "bad email": ({"email": "nope", "full_name": "X"}, {"email"}),
+            "bad role": ({"email": "a@example.com", "full_name": "X", "role": "Boss"}, {"role"}),
+            "both passwords": (
+                {"email": "a@example.com", "full_name": "X", "password": "pw", "password_hash": "md5$x$y"}, {"password"}
+            ),
+            "unknown hash": ({"email": "a@example.com", "full_name": "X", "password_hash": "plain"}, {"password_hash"}),
+        }
+        for case, (record, fields) in cases.items():
+            with self.subTest(case):
+                self.assertEqual(set(provisioning.clean_record(record)[1]), fields)
+
+    def test_resolve_conflicts(self):
+        UserAuth.objects.create_user(email="Taken@Example.com", full_name="Taken", phone="+100", username="TakenName")
+        rows = [
+            self.row(email="taken@example.com"),                     # 0: in the database, other case
+            self.row(email="first@example.com", username="Fresh"),   # 1
+            self.row(email="FIRST@example.com"),                     # 2: earlier in the batch
+            self.row(email="phone@example.com", phone="+100"),       # 3: phone in the database
+            self.row(email="name@example.com", username="takenname"),  # 4: username in the database
+            self.row(email="dupname@example.com", username="FRESH"),   # 5: username earlier in the batch
+            self.row(email="generated@example.com"),                 # 6: gets a username
+        ]
+        errors = provisioning.resolve_conflicts(rows)
+        self.assertEqual(
+            {index: list(fields) for index, fields in errors.items()},
+            {0: ["email"], 2: ["email"], 3: ["phone"], 4: ["username"], 5: ["username"]},
+        )
+        self.assertTrue(rows[6]["username"].startswith("generate"))
+        self.assertEqual(rows[1]["username"], "Fresh")
+
+    def test_insert_falls_back_to_row_by_row(self):
+        UserAuth.objects.create_user(email="raced@example.com", full_name="Raced")
+        users = [
+            UserAuth(email=email, full_name="X", username=email.split("@")[0])
+            for email in ("one@example.com", "raced@example.com", "two@example.com")
+        ]
+        created, failed = provisioning._insert(users, batch_size=100)
+        self.assertEqual([user.email for user in created], ["one@example.com", "two@example.com"])
+        self.assertEqual([user.email for user, _ in failed], ["raced@example.com"])
+        self.assertEqual(UserAuth.objects.filter(full_name="X").count(), 2)
+
+    def test_unique_usernames_retry_collisions(self):
+        UserAuth.objects.create_user(email="old@example.com", full_name="Old", username="TAKEN1")
+        names = iter(["taken1", "reserved", "same", "same", "free1", "free2", "free3"])
+        with mock.patch.object(utils, "generate_username", side_effect=lambda email: next(names)):
+            with self.assertNumQueries(2):  # one IN query per round
+                result = utils.generate_unique_usernames(["a@x.com", "b@x.com", "c@x.com", "d@x.com"], ["Reserved"])
+        # round one: a collides with the database, b with `reserved`, d with c
+        self.assertEqual(result, ["free1", "free2", "same", "free3"])
+
+    def test_unique_usernames_give_up_after_five_rounds(self):
+        UserAuth.objects.create_user(email="old@example.com", full_name="Old", username="taken")
+        with mock.patch.object(utils, "generate_username", return_value="taken"):
+            with self.assertRaises(RuntimeError):
+                utils.generate_unique_usernames(["a@x.com"])
+
+    def upload(self, user, content, **data):
+        return self.client.post(
+            "/v1/account/users/provision/",
+            {"file": SimpleUploadedFile("users.csv", content, content_type="text/csv"), **data},
+            HTTP_AUTHORIZATION=f"Bearer {generate_tokens_for_user(user)['access']}",
+        )
+
+    def test_provision_endpoint(self):
+        admin = UserAuth.objects.create_user(email="admin@example.com", full_name="Admin", is_superuser=True)
+        content = (
+            b"email,full_name,role,is_verified\n"
+            b"one@example.com,One,Agent,false\n"
+            b"two@example.com,Two,Client,true\n"
+            b"admin@example.com,Again,Client,false\n"
+            b"bad,Bad,Client,false\n"
+        )
+        response = self.upload(admin, content, dry_run="true")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual((response.json()["data"]["created"], UserAuth.objects.count()), (2, 1))
+
+        response = self.upload(admin, content)
+        self.assertEqual(response.status_code, 201, response.content)
+        data = response.json()["data"]
+        self.assertEqual((data["created"], data["failed"]), (2, 2))
+        self.assertEqual(sorted(error["row"] for error in data["errors"]), [4, 5])
+        self.assertEqual(UserAuth.objects.get(email="one@example.com").role, "Agent")
+        self.assertFalse(UserAuth.objects.get(email="one@example.com").has_usable_password())
+        # only the unverified user gets a verification email
+        self.assertEqual(list(OutboundMessage.objects.values_list("recipient", flat=True)), ["one@example.com"])
+
+    def test_provision_endpoint_requires_a_superuser(self):
+        agent = UserAuth.objects.create_user(email="agent@example.com", full_name="Agent", role="Agent")
+        response = self.upload(agent, b"email,full_name\nnew@example.com,New\n")
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(UserAuth.objects.filter(email="new@example.com").exists())
@@ -0,0 +1,65 @@
+# account/tokens.py
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Optional
+
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import UserAuth
+
+# Tokens carry a compact "usr" claim (copied into every access token derived
+# from the refresh token):
+#   {"r": role, "f": flag bits, "v": token_version, "u": username, "at": ms}
+# Changing a user's role, is_active, is_superuser or password bumps
+# token_version, and CachedJWTAuthentication rejects tokens carrying an older
+# "v", so the role, is_active and is_superuser of an accepted token are
+# current and permission checks can read them from the token
+# (account/permissions.py).
+
+CLAIM = "usr"
+FLAGS = ("is_active", "is_verified", "is_superuser", "is_subscribed")
+
+
+# ----------------------------
+# Claims
+# ----------------------------
+CLAIM_FIELDS = ("role", *FLAGS, "token_version", "username")
+
+
+def encode_claims(user: UserAuth) -> Dict[str, Any]:
+    deferred = user.get_deferred_fields() & set(CLAIM_FIELDS)
+    if deferred:  # users loaded with .only(): one query instead of one per field
+        user.refresh_from_db(fields=deferred)
+    bits = 0
+    for index, name in enumerate(FLAGS):
+        if getattr(user, name):
+            bits |= 1 << index
+    return {"r": user.role, "f": bits, "v": user.token_version, "u": user.username, "at": int(time.time() * 1000)}
+
+
+def decode_claims(claims: Any) -> Optional[Dict[str, Any]]:
+    """Field values from a "usr" claim, or None if it is missing or malformed."""
+    if not isinstance(claims, dict) or not all(key in claims for key in ("r", "f", "v", "u", "at")):
+        return None
+    values = {name: bool(claims["f"] >> index & 1) for index, name in enumerate(FLAGS)}
+    values.update(role=claims["r"], token_version=claims["v"], username=claims["u"])
+    return values
+
+
+def token_claims(token: Any) -> Optional[Dict[str, Any]]:
+    """Decoded "usr" claim of a validated token (request.auth), if it has one."""
+    if token is None or not hasattr(token, "get"):
+        return None
+    return decode_claims(token.get(CLAIM))
+
+
+class UserRefreshToken(RefreshToken):
+    """RefreshToken with the "usr" claim; its access tokens inherit it."""
+
+    @classmethod
+    def for_user(cls, user: UserAuth) -> "UserRefreshToken":
+        token = super().for_user(user)
+        token[CLAIM] = encode_claims(user)
+        return token
+
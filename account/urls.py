@@ -1,5 +1,6 @@
 from django.urls import path
-from .views import SignupAPIView, VerifyOTPAPIView, ResendVerifyOTPAPIView, LoginView, ForgetPasswordView, VerifyForgetPasswordOTPView, ResetPasswordView
+from .views import (SignupAPIView, VerifyOTPAPIView, ResendVerifyOTPAPIView, LoginView, ForgetPasswordView, VerifyForgetPasswordOTPView, ResetPasswordView,
+                    TokenRefreshView, LogoutView, LogoutAllView, ProvisionUsersView)
 
 urlpatterns = [
     path("signup/", SignupAPIView.as_view(), name="signup"),
@@ -9,4 +10,10 @@ urlpatterns = [
     path("forget-password/", ForgetPasswordView.as_view(), name="forget-password"),
     path("password/verify-otp/", VerifyForgetPasswordOTPView.as_view(), name="verify-otp"),
     path("reset-password/", ResetPasswordView.as_view(), name="reset-password"),
+    #tokens
+    path("token/refresh/", TokenRefreshView.as_view(), name="token-refresh"),
+    path("logout/", LogoutView.as_view(), name="logout"),
+    path("logout-all/", LogoutAllView.as_view(), name="logout-all"),
+    #bulk accounts
+    path("users/provision/", ProvisionUsersView.as_view(), name="provision-users"),
 ]
\ No newline at end of file
@@ -5,16 +5,16 @@ import logging
 import secrets
 import string
 from datetime import timedelta
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional, Sequence
 
-import jwt
-import requests
 from PIL import Image
 
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.mail import BadHeaderError, send_mail
 from django.utils import timezone
-from rest_framework_simplejwt.tokens import RefreshToken
+
+from .social import decode_social_token
 
 try:
     import messagebird
@@ -26,12 +26,8 @@ logger = logging.getLogger(__name__)
 
 # Image validation settings
 MAX_IMAGE_SIZE_BYTES = 3 * 1024 * 1024
-ALLOWED_IMAGE_FORMATS = {"JPEG", "PNG", "GIF"}
-
-# External endpoints
-GOOGLE_TOKENINFO_URL = "https://www.googleapis.com/oauth2/v3/tokeninfo"
-FACEBOOK_ME_URL = "https://graph.facebook.com/me"
-MICROSOFT_ME_URL = "https://graph.microsoft.com/v1.0/me"
+ALLOWED_IMAGE_FORMATS = {"JPEG", "PNG", "GIF", "WEBP"}
+MAX_IMAGE_PIXELS = 40_000_000  # header-declared size; guards the decode in the variant pipeline
 
 
 # ----------------------------
@@ -51,12 +47,48 @@ def generate_username(email: str) -> str:
     return f"{base}{suffix}"
 
 
+def generate_unique_usernames(emails: Sequence[str], reserved: Iterable[str] = ()) -> List[str]:
+    """
+    One generate_username() per email, unused in the database (compared
+    case-insensitively, like login lookups), in `reserved` and in the result.
+    One IN query per round; a second round only happens on a collision.
+    """
+    from django.contrib.auth import get_user_model  # models import utils
+    from django.db.models.functions import Lower
+
+    User = get_user_model()
+    taken = {name.lower() for name in reserved}
+    result: List[Optional[str]] = [None] * len(emails)
+    pending = list(range(len(emails)))
+    for _ in range(5):
+        candidates = {index: generate_username(emails[index]) for index in pending}
+        lowered = {name.lower() for name in candidates.values()}
+        taken |= set(
+            User.objects.annotate(username_lower=Lower("username"))
+            .filter(username_lower__in=lowered)
+            .values_list("username_lower", flat=True)
+        )
+        pending = []
+        for index, name in candidates.items():
+            if name.lower() in taken:
+                pending.append(index)
+            else:
+                taken.add(name.lower())
+                result[index] = name
+        if not pending:
+            return result
+    raise RuntimeError("Could not find free usernames after 5 rounds")
+
+
 # ----------------------------
 # Image validation
 # ----------------------------
 def validate_image(image: Any) -> None:
     """
-    Validates uploaded image by size and format.
+    Validates uploaded image by size, format and pixel dimensions.
+
+    Only the header is parsed (Image.open is lazy); pixels are decoded once,
+    later, by the variant pipeline in core/images.py.
 
     Raises:
         ValueError: if image is invalid, too large, or unsupported format.
@@ -65,85 +97,50 @@ def validate_image(image: Any) -> None:
         raise ValueError("Image too large (max 3MB)")
 
     try:
-        img = Image.open(image)
-        img.verify()
-        if img.format not in ALLOWED_IMAGE_FORMATS:
-            raise ValueError(f"Unsupported image format: {img.format}")
-    except (OSError, ValueError) as exc:
+        with Image.open(image) as img:
+            image_format = img.format
+            width, height = img.size
+    except (OSError, ValueError, Image.DecompressionBombError) as exc:
         raise ValueError(f"Invalid image file: {exc}") from exc
+    finally:
+        image.seek(0)
+
+    if image_format not in ALLOWED_IMAGE_FORMATS:
+        raise ValueError(f"Unsupported image format: {image_format}")
+    if width * height > MAX_IMAGE_PIXELS:
+        raise ValueError("Image dimensions too large")
+
+
+def validate_image_field(image: Any) -> None:
+    """
+    Model field validator around validate_image(): raises ValidationError, so
+    full_clean() (admin, ModelForms) reports a field error instead of a 500.
+    """
+    try:
+        validate_image(image)
+    except ValueError as exc:
+        raise ValidationError(str(exc), code="invalid_image") from exc
 
 
 # ----------------------------
 # Social token decoders
 # ----------------------------
+# Verification lives in account/social.py (pooled HTTP client, cached JWKS,
+# local signature checks); these keep the old call signatures.
 def decode_apple_token(identity_token: str) -> Optional[Dict[str, str]]:
-    try:
-        decoded = jwt.decode(identity_token, options={"verify_signature": False})
-        email = decoded.get("email")
-        if not email:
-            return None
-        return {
-            "email": email,
-            "full_name": decoded.get("name", email.split("@")[0]),
-            "profile_pic_url": None,
-        }
-    except Exception:
-        return None
+    return decode_social_token("apple", identity_token)
 
 
 def decode_google_token(id_token: str) -> Optional[Dict[str, str]]:
-    try:
-        res = requests.get(
-            GOOGLE_TOKENINFO_URL,
-            params={"id_token": id_token},
-            timeout=3,
-        )
-        data = res.json()
-        email = data.get("email")
-        if not email:
-            return None
-        return {
-            "email": email,
-            "full_name": data.get("name", ""),
-            "profile_pic_url": data.get("picture"),
-        }
-    except Exception:
-        return None
+    return decode_social_token("google", id_token)
 
 
 def decode_facebook_token(access_token: str) -> Optional[Dict[str, Any]]:
-    try:
-        res = requests.get(
-            FACEBOOK_ME_URL,
-            params={"fields": "id,name,email", "access_token": access_token},
-            timeout=3,
-        )
-        data = res.json()
-        if "error" in data:
-            return None
-        return data
-    except Exception:
-        return None
+    return decode_social_token("facebook", access_token)
 
 
-def decode_microsoft_token(access_token: str) -> Optional[Dict[str, str]]:
-    try:
-        res = requests.get(
-            MICROSOFT_ME_URL,
-            headers={"Authorization": f"Bearer {access_token}"},
-            timeout=3,
-        )
-        data = res.json()
-        email = data.get("mail") or data.get("userPrincipalName")
-        if not email:
-            return None
-        return {
-            "email": email,
-            "full_name": data.get("displayName", ""),
-            "profile_pic_url": None,
-        }
-    except Exception:
-        return None
+def decode_microsoft_token(id_token: str) -> Optional[Dict[str, str]]:
+    return decode_social_token("microsoft", id_token)
 
 
 # ----------------------------
@@ -211,5 +208,7 @@ def send_otp_sms(phone: str, otp: str) -> bool:
 # JWT helpers
 # ----------------------------
 def generate_tokens_for_user(user: Any) -> Dict[str, str]:
-    refresh = RefreshToken.for_user(user)
+    from .tokens import UserRefreshToken  # models import utils
+
+    refresh = UserRefreshToken.for_user(user)  # role/flag claims: no user lookup per request
     return {"access": str(refresh.access_token), "refresh": str(refresh)}
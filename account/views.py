@@ -1,23 +1,51 @@
+from asgiref.sync import sync_to_async
 from django.db import transaction
 
 from rest_framework import status
+from rest_framework.exceptions import APIException
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.views import APIView
 
 from .serializers import (SignupSerializer, VerifyOTPSerializer, ResendVerifyOTPSerializer, LoginSerializer,
-                          UserInfoSerializer, ForgetPasswordSerializer, VerifyForgetPasswordOTPSerializer, ResetPasswordSerializer)
+                          UserInfoSerializer, ForgetPasswordSerializer, VerifyForgetPasswordOTPSerializer, ResetPasswordSerializer,
+                          TokenRefreshSerializer, LogoutSerializer, ProvisionUsersSerializer)
+from .authentication import revoke_tokens
+from .permissions import IsSuperuser
+from .provisioning import provision_users
+from .hashing import HashingPoolFull, amake_password
 from .utils import generate_tokens_for_user
+from core.streaming import iter_records
+from core.throttling import IdentifierRateThrottle, IPRateThrottle
+from core.views import AsyncAPIView
 
 
-class SignupAPIView(APIView):
+class PasswordHashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Server is busy, please try again shortly."
+    default_code = "password_hashing_busy"
+
+
+class PasswordHashingMixin:
+    """Answers 503 when the password hashing pool is saturated."""
+
+    def handle_exception(self, exc):
+        if isinstance(exc, HashingPoolFull):
+            exc = PasswordHashingBusy()
+        return super().handle_exception(exc)
+
+
+class SignupAPIView(PasswordHashingMixin, AsyncAPIView):
     permission_classes = [AllowAny]
+    throttle_classes = [IPRateThrottle, IdentifierRateThrottle]
+    throttle_scope = "signup"
 
-    @transaction.atomic
-    def post(self, request):
+    async def post(self, request):
         serializer = SignupSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        user = serializer.save()
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+
+        # hash on the bounded pool so no DB transaction is open while PBKDF2 runs
+        password_hash = await amake_password(serializer.validated_data["password"])
+        user = await sync_to_async(self.create_user)(serializer, password_hash)
 
         tokens = generate_tokens_for_user(user)
 
@@ -35,15 +63,21 @@ class SignupAPIView(APIView):
             },
             status=status.HTTP_201_CREATED,
         )
+
+    @transaction.atomic
+    def create_user(self, serializer, password_hash):
+        return serializer.save(password_hash=password_hash)
         
 
-class VerifyOTPAPIView(APIView):
+class VerifyOTPAPIView(AsyncAPIView):
     permission_classes = [AllowAny]
+    throttle_classes = [IPRateThrottle, IdentifierRateThrottle]
+    throttle_scope = "otp_verify"
 
-    def post(self, request):
+    async def post(self, request):
         serializer = VerifyOTPSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save()
+        user = await serializer.asave()
 
         tokens = generate_tokens_for_user(user)
 
@@ -67,13 +101,15 @@ class VerifyOTPAPIView(APIView):
         )
         
         
-class ResendVerifyOTPAPIView(APIView):
+class ResendVerifyOTPAPIView(AsyncAPIView):
     permission_classes = [AllowAny]
+    throttle_classes = [IPRateThrottle, IdentifierRateThrottle]
+    throttle_scope = "otp_send"
 
-    def post(self, request):
+    async def post(self, request):
         serializer = ResendVerifyOTPSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        await serializer.asave()
 
         return Response(
             {
@@ -85,14 +121,16 @@ class ResendVerifyOTPAPIView(APIView):
         )
         
         
-class LoginView(APIView):
+class LoginView(PasswordHashingMixin, AsyncAPIView):
     permission_classes = [AllowAny]
+    throttle_classes = [IPRateThrottle, IdentifierRateThrottle]
+    throttle_scope = "login"
 
-    def post(self, request):
+    async def post(self, request):
         serializer = LoginSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        user = serializer.validated_data["user"]
+        user = await serializer.aauthenticate()
         tokens = generate_tokens_for_user(user)
         user_data = UserInfoSerializer(user, context={"request": request}).data
 
@@ -113,14 +151,15 @@ class LoginView(APIView):
 
 
 
-class ForgetPasswordView(APIView):
+class ForgetPasswordView(AsyncAPIView):
     permission_classes = [AllowAny]
+    throttle_classes = [IPRateThrottle, IdentifierRateThrottle]
+    throttle_scope = "otp_send"
 
-    @transaction.atomic
-    def post(self, request):
+    async def post(self, request):
         serializer = ForgetPasswordSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        await serializer.asave()
 
         return Response(
             {
@@ -132,12 +171,15 @@ class ForgetPasswordView(APIView):
         )
         
         
-class VerifyForgetPasswordOTPView(APIView):
+class VerifyForgetPasswordOTPView(AsyncAPIView):
     permission_classes = [AllowAny]
+    throttle_classes = [IPRateThrottle, IdentifierRateThrottle]
+    throttle_scope = "otp_verify"
 
-    def post(self, request):
+    async def post(self, request):
         serializer = VerifyForgetPasswordOTPSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        await serializer.averify()
 
         response_data = serializer.to_representation(serializer.validated_data)
 
@@ -151,16 +193,18 @@ class VerifyForgetPasswordOTPView(APIView):
         )
 
 
-class ResetPasswordView(APIView):
+class ResetPasswordView(PasswordHashingMixin, AsyncAPIView):
     permission_classes = [IsAuthenticated]
 
-    def post(self, request):
+    async def post(self, request):
         serializer = ResetPasswordSerializer(
             data=request.data,
             context={"request": request},
         )
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+
+        password_hash = await amake_password(serializer.validated_data["new_password"])
+        await sync_to_async(serializer.save)(password_hash=password_hash)
 
         return Response(
             {
@@ -170,3 +214,97 @@ class ResetPasswordView(APIView):
             },
             status=status.HTTP_200_OK,
         )
+
+
+class TokenRefreshView(AsyncAPIView):
+    """Refresh rotation: each refresh token is good for one exchange."""
+    permission_classes = [AllowAny]
+    throttle_classes = [IPRateThrottle]
+    throttle_scope = "token_refresh"
+
+    async def post(self, request):
+        serializer = TokenRefreshSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        tokens = await sync_to_async(serializer.rotate)()
+
+        return Response(
+            {
+                "success": True,
+                "message": "Token refreshed successfully.",
+                "data": {
+                    "tokens": {
+                        "access": tokens["access"],
+                        "refresh": tokens["refresh"],
+                    },
+                },
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class LogoutView(AsyncAPIView):
+    permission_classes = [IsAuthenticated]
+
+    async def post(self, request):
+        serializer = LogoutSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        await sync_to_async(serializer.save)()
+
+        return Response(
+            {
+                "success": True,
+                "message": "Logged out successfully.",
+                "data": {},
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class LogoutAllView(AsyncAPIView):
+    """Revoke every token issued to the caller, on every device."""
+    permission_classes = [IsAuthenticated]
+
+    async def post(self, request):
+        await sync_to_async(revoke_tokens)(request.user.pk)
+
+        return Response(
+            {
+                "success": True,
+                "message": "Logged out from all devices.",
+                "data": {},
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class ProvisionUsersView(AsyncAPIView):
+    """
+    Bulk-create accounts from a CSV or JSON Lines upload (agency onboarding),
+    see account/provisioning.py. Rows with plain passwords are hashed in a
+    process pool; for very large files use `manage.py provision_users`.
+    """
+    permission_classes = [IsSuperuser]
+
+    async def post(self, request):
+        serializer = ProvisionUsersSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"success": False, "message": "Validation failed.", "data": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        params = serializer.validated_data
+
+        report = await sync_to_async(provision_users)(
+            iter_records(params["file"], params["file_format"]),
+            send_otp=params["send_otp"],
+            dry_run=params["dry_run"],
+        )
+
+        return Response(
+            {
+                "success": True,
+                "message": f"{report['created']} users created, {report['failed']} rows rejected.",
+                "data": report,
+            },
+            status=status.HTTP_201_CREATED if report["created"] and not params["dry_run"] else status.HTTP_200_OK,
+        )
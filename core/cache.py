@@ -0,0 +1,141 @@
+# core/cache.py
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from django.core.cache import caches
+
+_MISSING = object()
+
+
+class LocalTTLCache:
+    """
+    Small thread-safe LRU with per-entry TTL, private to the worker process.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 5.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class TwoTierCache:
+    """
+    Read-through cache: per-process LocalTTLCache in front of a Django cache.
+
+    The local tier only sees deletes made in its own process, so its TTL bounds
+    how long other workers may serve a stale value after an invalidation.
+    """
+
+    def __init__(
+        self,
+        prefix: str,
+        shared_ttl: Optional[int] = 300,
+        local_ttl: float = 5.0,
+        local_maxsize: int = 1024,
+        alias: str = "default",
+    ) -> None:
+        self.prefix = prefix
+        self.shared_ttl = shared_ttl
+        self.local = LocalTTLCache(maxsize=local_maxsize, ttl=local_ttl)
+        self.alias = alias
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def make_key(self, key: Any) -> str:
+        return f"{self.prefix}:{key}"
+
+    def get(self, key: Any, loader: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        Return the cached value, filling both tiers from `loader` on a miss.
+        A loader returning None is not cached.
+        """
+        full_key = self.make_key(key)
+        value = self.local.get(full_key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        value = self.shared.get(full_key, _MISSING)
+        if value is not _MISSING:
+            self.local.set(full_key, value)
+            return value
+
+        if loader is None:
+            return None
+        value = loader()
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    async def aget(self, key: Any, loader: Optional[Callable[[], Awaitable[Any]]] = None) -> Any:
+        """Async get(); a local-tier hit never leaves the event loop."""
+        full_key = self.make_key(key)
+        value = self.local.get(full_key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        value = await self.shared.aget(full_key, _MISSING)
+        if value is not _MISSING:
+            self.local.set(full_key, value)
+            return value
+
+        if loader is None:
+            return None
+        value = await loader()
+        if value is not None:
+            await self.aset(key, value)
+        return value
+
+    async def aset(self, key: Any, value: Any) -> None:
+        full_key = self.make_key(key)
+        await self.shared.aset(full_key, value, timeout=self.shared_ttl)
+        self.local.set(full_key, value)
+
+    async def adelete(self, key: Any) -> None:
+        full_key = self.make_key(key)
+        self.local.delete(full_key)
+        await self.shared.adelete(full_key)
+
+    def set(self, key: Any, value: Any) -> None:
+        full_key = self.make_key(key)
+        self.shared.set(full_key, value, timeout=self.shared_ttl)
+        self.local.set(full_key, value)
+
+    def delete(self, key: Any) -> None:
+        full_key = self.make_key(key)
+        self.local.delete(full_key)
+        self.shared.delete(full_key)
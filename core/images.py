@@ -0,0 +1,257 @@
+# core/images.py
+from __future__ import annotations
+
+import io
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import models, transaction
+from django.db.models import Q
+from PIL import Image, ImageOps, features
+
+IMAGE_VARIANT_WIDTHS = tuple(getattr(settings, "IMAGE_VARIANT_WIDTHS", (160, 480, 1080)))
+IMAGE_VARIANT_FORMATS = tuple(
+    fmt for fmt in getattr(settings, "IMAGE_VARIANT_FORMATS", ("webp", "avif")) if features.check(fmt)
+)
+IMAGE_VARIANT_QUALITY = {"webp": 80, "avif": 60}
+IMAGE_PROCESS_WORKERS = getattr(settings, "IMAGE_PROCESS_WORKERS", 2)
+IMAGE_PROCESS_LEASE_SECONDS = getattr(settings, "IMAGE_PROCESS_LEASE_SECONDS", 300)
+
+
+class VariantStatus(models.TextChoices):
+    PENDING = "pending", "Pending"
+    PROCESSING = "processing", "Processing"
+    READY = "ready", "Ready"
+    FAILED = "failed", "Failed"
+
+
+# ----------------------------
+# Change tracking (pre_save)
+# ----------------------------
+def track_image_change(
+    instance: Any,
+    image_field: str,
+    variants_field: str,
+    status_field: str,
+    update_fields: Optional[Sequence[str]] = None,
+) -> None:
+    """
+    Queue variants when the stored file differs from the one they were built
+    from. Only compares names already on the instance, so it costs no query;
+    saves that don't write the image (update_fields, deferred loads) are skipped.
+    """
+    if update_fields is not None and image_field not in update_fields:
+        return
+    if {image_field, variants_field, status_field} & instance.get_deferred_fields():
+        return
+    name = getattr(instance, image_field).name or ""
+    variants = getattr(instance, variants_field) or {}
+    if name == variants.get("source", ""):
+        return
+    setattr(instance, variants_field, {})
+    setattr(instance, status_field, VariantStatus.PENDING if name else "")
+
+
+# ----------------------------
+# Rendering (runs in worker processes)
+# ----------------------------
+def _has_exif(img: Image.Image) -> bool:
+    return bool(img.info.get("exif")) or bool(img.getexif())
+
+
+def render_variants(
+    data: bytes,
+    widths: Sequence[int] = IMAGE_VARIANT_WIDTHS,
+    formats: Sequence[str] = IMAGE_VARIANT_FORMATS,
+) -> Dict[str, Any]:
+    """
+    Decode one upload and encode its resized variants; EXIF is never copied.
+
+    Pure bytes-in/bytes-out so it can run in a ProcessPoolExecutor. Returns
+    {"width", "height", "original": bytes | None, "variants": [{"width",
+    "height", "format", "content"}]}; "original" is a re-encoded copy without
+    EXIF, or None if the upload carried none.
+    """
+    with Image.open(io.BytesIO(data)) as img:
+        source_format = img.format
+        strip_original = _has_exif(img)
+        img = ImageOps.exif_transpose(img)  # bake orientation in before EXIF goes
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "PA") else "RGB")
+        width, height = img.size
+
+        original = None
+        if strip_original:
+            buffer = io.BytesIO()
+            save_img = img.convert("RGB") if source_format == "JPEG" else img
+            save_img.save(buffer, format=source_format, quality=95)
+            original = buffer.getvalue()
+
+        # never upscale; a small upload still gets one variant at its own width
+        targets = sorted({w for w in widths if w < width} | {min(width, max(widths))})
+        variants = []
+        for target in targets:
+            resized = img if target == width else img.resize(
+                (target, max(1, round(height * target / width))), Image.Resampling.LANCZOS
+            )
+            for fmt in formats:
+                buffer = io.BytesIO()
+                resized.save(buffer, format=fmt.upper(), quality=IMAGE_VARIANT_QUALITY.get(fmt, 80))
+                variants.append({
+                    "width": resized.width,
+                    "height": resized.height,
+                    "format": fmt,
+                    "content": buffer.getvalue(),
+                })
+
+    return {"width": width, "height": height, "original": original, "variants": variants}
+
+
+# ----------------------------
+# Storage
+# ----------------------------
+def store_variants(field_file, rendered: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Write rendered variants next to the original (`<dir>/variants/`) and
+    return the JSON recorded on the model.
+    """
+    storage = field_file.storage
+    source = field_file.name
+    directory, filename = os.path.split(source)
+    stem = os.path.splitext(filename)[0]
+
+    if rendered["original"] is not None:
+        # same name after the delete on most storages, but not guaranteed:
+        # "source" records what was actually written, for the row to point at
+        storage.delete(source)
+        source = storage.save(source, ContentFile(rendered["original"]))
+
+    items = []
+    for variant in rendered["variants"]:
+        name = storage.save(
+            os.path.join(directory, "variants", f"{stem}_{variant['width']}.{variant['format']}"),
+            ContentFile(variant["content"]),
+        )
+        items.append({
+            "name": name,
+            "width": variant["width"],
+            "height": variant["height"],
+            "format": variant["format"],
+            "bytes": len(variant["content"]),
+        })
+
+    return {
+        "source": source,
+        "width": rendered["width"],
+        "height": rendered["height"],
+        "items": items,
+    }
+
+
+def delete_image_files(field_file, variants: Optional[Dict[str, Any]]) -> None:
+    """Remove an original and its variants from storage (after the row is deleted)."""
+    storage = field_file.storage
+    for item in (variants or {}).get("items", []):
+        storage.delete(item["name"])
+    if field_file.name:
+        storage.delete(field_file.name)
+
+
+def variant_urls(variants: Optional[Dict[str, Any]], storage, request=None) -> List[Dict[str, Any]]:
+    """[{"url", "width", "height", "format"}] for API responses."""
+    urls = []
+    for item in (variants or {}).get("items", []):
+        url = storage.url(item["name"])
+        urls.append({
+            "url": request.build_absolute_uri(url) if request else url,
+            "width": item["width"],
+            "height": item["height"],
+            "format": item["format"],
+        })
+    return urls
+
+
+# ----------------------------
+# Batch processing
+# ----------------------------
+def claim_pending(model, image_field: str, variants_field: str, status_field: str, batch_size: int = 20) -> List[Any]:
+    """
+    Claim up to `batch_size` rows of `model` waiting for variants.
+
+    Like the outbox dispatcher: rows are picked with SKIP LOCKED and moved to
+    PROCESSING with a lease in the variants JSON, so concurrent workers never
+    render the same row. If a worker dies, its rows become claimable again
+    once the lease runs out.
+    """
+    now = time.time()
+    pk = model._meta.pk.attname
+    with transaction.atomic():
+        rows = list(
+            model.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(**{status_field: VariantStatus.PENDING})
+                | Q(**{status_field: VariantStatus.PROCESSING, f"{variants_field}__claimed_until__lt": now})
+            )
+            .only(pk, image_field)
+            .order_by(pk)[:batch_size]
+        )
+        if rows:
+            model.objects.filter(pk__in=[row.pk for row in rows]).update(**{
+                status_field: VariantStatus.PROCESSING,
+                variants_field: {"claimed_until": now + IMAGE_PROCESS_LEASE_SECONDS},
+            })
+    return rows
+
+
+def process_pending(
+    model,
+    image_field: str,
+    variants_field: str,
+    status_field: str,
+    executor,
+    batch_size: int = 20,
+) -> Dict[str, int]:
+    """
+    Claim and render variants for up to `batch_size` pending rows of `model`.
+
+    Decoding/encoding runs in `executor` (a process pool); storage and DB
+    writes stay here. Results are written with a conditional UPDATE on the
+    source file name, so an image replaced mid-flight is left pending for
+    its new file instead of getting the old file's variants.
+    """
+    rows = claim_pending(model, image_field, variants_field, status_field, batch_size)
+    counts = {"claimed": len(rows), "ready": 0, "failed": 0}
+    if not rows:
+        return counts
+
+    futures = []
+    for row in rows:
+        field_file = getattr(row, image_field)
+        try:
+            with field_file.open("rb") as fh:
+                data = fh.read()
+        except OSError as exc:
+            futures.append((row, None, exc))
+            continue
+        futures.append((row, executor.submit(render_variants, data), None))
+
+    for row, future, error in futures:
+        field_file = getattr(row, image_field)
+        if future is not None:
+            try:
+                variants = store_variants(field_file, future.result())
+                status = VariantStatus.READY
+            except Exception as exc:  # corrupt upload, unsupported mode, storage error
+                error = exc
+        if error is not None:
+            variants = {"source": field_file.name, "error": str(error)[:500]}
+            status = VariantStatus.FAILED
+
+        updates = {variants_field: variants, status_field: status}
+        if variants["source"] != field_file.name:  # the EXIF-free copy was saved under another name
+            updates[image_field] = variants["source"]
+        counts[status] += model.objects.filter(pk=row.pk, **{image_field: field_file.name}).update(**updates)
+    return counts
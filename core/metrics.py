@@ -0,0 +1,245 @@
+# core/metrics.py
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = getattr(settings, "METRICS_ENABLED", True)
+METRICS_FLUSH_INTERVAL = getattr(settings, "METRICS_FLUSH_INTERVAL", 5)
+
+REDIS_KEY = "metrics:http"
+
+# name -> (help, upper bounds); the +Inf bucket is implicit
+HISTOGRAMS = {
+    "http_request_duration_seconds": (
+        "Wall time per request.",
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    ),
+    "http_request_db_duration_seconds": (
+        "Time spent in SQL per request.",
+        (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+    ),
+    "http_request_db_queries": (
+        "SQL statements per request.",
+        (0, 1, 2, 3, 5, 10, 20, 50, 100, 200),
+    ),
+    "http_response_size_bytes": (
+        "Response body size (non-streaming responses).",
+        (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+    ),
+    "password_hash_wait_seconds": (
+        "Time a password hash waited for a hashing pool thread.",
+        (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+    ),
+}
+COUNTERS = {
+    "http_request_duplicate_queries_total": "SQL statements repeated with identical parameters in one request.",
+    "password_hash_rejected_total": "Password hashes turned away because the hashing pool queue was full.",
+}
+# name -> (help, callback); read from the scraped process only, so they
+# describe that worker rather than the whole deployment
+GAUGES: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+
+def register_gauge(name: str, help_text: str, callback: Callable[[], float]) -> None:
+    GAUGES[name] = (help_text, callback)
+
+
+# ----------------------------
+# Per-request query stats
+# ----------------------------
+class QueryStats:
+    """Filled by the execute wrapper for the request in the current context."""
+
+    __slots__ = ("count", "duration", "duplicates", "_seen")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+        self.duplicates = 0
+        self._seen: set = set()
+
+    def add(self, sql: str, params, many: bool, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        if many:
+            return
+        try:
+            key = hash((sql, tuple(params) if isinstance(params, list) else params))
+        except TypeError:  # unhashable params (lists inside)
+            key = hash((sql, repr(params)))
+        if key in self._seen:
+            self.duplicates += 1
+        else:
+            self._seen.add(key)
+
+
+# Context variables follow the request into sync_to_async threads, where
+# async views run their ORM work on a different DB connection.
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+def record_queries(execute, sql, params, many, context):
+    stats = current_query_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.add(sql, params, many, time.perf_counter() - start)
+
+
+def install_execute_wrapper(wrapper) -> None:
+    """
+    Attach `wrapper` to every DB connection: the ones this thread already
+    opened and, through connection_created, every later one (each thread and
+    each sync_to_async worker gets its own connection).
+    """
+    def attach(connection):
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wrapper)
+
+    def on_connection_created(sender, connection, **kwargs):
+        attach(connection)
+
+    uid = f"{wrapper.__module__}.{wrapper.__qualname__}"
+    connection_created.connect(on_connection_created, dispatch_uid=uid, weak=False)
+    for connection in connections.all(initialized_only=True):
+        attach(connection)
+
+
+def install_query_recorder() -> None:
+    install_execute_wrapper(record_queries)
+
+
+# ----------------------------
+# Registry
+# ----------------------------
+class MetricsRegistry:
+    """
+    Process-local histogram/counter store.
+
+    Values are kept per bucket (not cumulative) so recording is one dict
+    increment per metric; render() builds the cumulative `le` series. With
+    Redis available, accumulated values are moved into one shared hash every
+    METRICS_FLUSH_INTERVAL seconds so a scrape sees every worker; otherwise
+    the process's own totals are served.
+    """
+
+    def __init__(self, flush_interval: float = METRICS_FLUSH_INTERVAL) -> None:
+        self.flush_interval = flush_interval
+        self._values: Dict[str, float] = defaultdict(float)
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def observe(self, view: str, method: str, observations: Iterable[Tuple[str, float]]) -> None:
+        with self._lock:
+            for name, value in observations:
+                bounds = HISTOGRAMS[name][1]
+                index = bisect_left(bounds, value)
+                le = repr(float(bounds[index])) if index < len(bounds) else "+Inf"
+                prefix = f"{name}\t{view}\t{method}\t"
+                self._values[prefix + le] += 1
+                self._values[prefix + "sum"] += value
+                self._values[prefix + "count"] += 1
+
+    def inc(self, name: str, view: str, method: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[f"{name}\t{view}\t{method}\t"] += amount
+
+    def flush_due(self) -> bool:
+        return time.monotonic() - self._last_flush >= self.flush_interval
+
+    def flush(self) -> bool:
+        """Push accumulated values into Redis; False when there is no Redis."""
+        client = get_redis()
+        if client is None:
+            return False
+        with self._lock:
+            values, self._values = self._values, defaultdict(float)
+            self._last_flush = time.monotonic()
+        if not values:
+            return True
+        try:
+            pipe = client.pipeline(transaction=False)
+            for field, amount in values.items():
+                pipe.hincrbyfloat(REDIS_KEY, field, amount)
+            pipe.execute()
+        except Exception:
+            logger.warning("Metrics flush failed, keeping %s values for the next one", len(values), exc_info=True)
+            with self._lock:
+                for field, amount in values.items():
+                    self._values[field] += amount
+        return True
+
+    def snapshot(self) -> Dict[str, float]:
+        if self.flush():
+            client = get_redis()
+            return {field.decode(): float(value) for field, value in client.hgetall(REDIS_KEY).items()}
+        with self._lock:
+            return dict(self._values)
+
+
+registry = MetricsRegistry()
+
+
+# ----------------------------
+# Prometheus text format
+# ----------------------------
+def _labels(view: str, method: str, le: Optional[str] = None) -> str:
+    """`{view="...",method="..."}`; series recorded without a view get no labels but `le`."""
+    pairs = []
+    if view or method:
+        view = view.replace("\\", "\\\\").replace('"', '\\"')
+        pairs += [f'view="{view}"', f'method="{method}"']
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def render(values: Dict[str, float]) -> str:
+    series: Dict[str, Dict[Tuple[str, str], Dict[str, float]]] = defaultdict(lambda: defaultdict(dict))
+    for field, value in values.items():
+        name, view, method, suffix = field.split("\t")
+        series[name][(view, method)][suffix] = value
+
+    lines: List[str] = []
+    for name, (help_text, bounds) in HISTOGRAMS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for (view, method), points in sorted(series.get(name, {}).items()):
+            total = 0.0
+            for le in [repr(float(bound)) for bound in bounds] + ["+Inf"]:
+                total += points.get(le, 0)
+                lines.append(f"{name}_bucket{_labels(view, method, le)} {_number(total)}")
+            lines.append(f"{name}_sum{_labels(view, method)} {_number(points.get('sum', 0))}")
+            lines.append(f"{name}_count{_labels(view, method)} {_number(points.get('count', 0))}")
+    for name, help_text in COUNTERS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for (view, method), points in sorted(series.get(name, {}).items()):
+            lines.append(f"{name}{_labels(view, method)} {_number(points.get('', 0))}")
+    for name, (help_text, callback) in GAUGES.items():
+        try:
+            value = callback()
+        except Exception:
+            logger.warning("Gauge %s failed", name, exc_info=True)
+            continue
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {_number(value)}"]
+    return "\n".join(lines) + "\n"
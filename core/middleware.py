@@ -0,0 +1,96 @@
+# core/middleware.py
+from __future__ import annotations
+
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+from core.metrics import METRICS_ENABLED, QueryStats, current_query_stats, install_query_recorder, registry
+
+METRICS_SERVER_TIMING = getattr(settings, "METRICS_SERVER_TIMING", True)
+
+UNRESOLVED_VIEW = "<unresolved>"
+# anything else (WebDAV verbs, scanner junk) shares one label, like unresolved views
+KNOWN_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+OTHER_METHOD = "other"
+
+
+class RequestMetricsMiddleware:
+    """
+    Per-request wall time, SQL time, query count, duplicate queries and
+    response size, recorded per resolved URL name (core/metrics.py) and
+    reported back in a Server-Timing header.
+
+    Works for both sync and async stacks. Requests that don't resolve to a
+    URL pattern, or use a non-standard method, share one label so probes
+    can't grow the series count.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        if METRICS_ENABLED:
+            install_query_recorder()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not METRICS_ENABLED:
+            return self.get_response(request)
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_query_stats.reset(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        if registry.flush_due():
+            registry.flush()
+        return response
+
+    async def __acall__(self, request):
+        if not METRICS_ENABLED:
+            return await self.get_response(request)
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_query_stats.reset(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        if registry.flush_due():
+            await sync_to_async(registry.flush, thread_sensitive=False)()
+        return response
+
+    def record(self, request, response, stats: QueryStats, duration: float) -> None:
+        match = getattr(request, "resolver_match", None)
+        view = (match.view_name if match else None) or UNRESOLVED_VIEW
+        method = request.method if request.method in KNOWN_METHODS else OTHER_METHOD
+
+        observations = [
+            ("http_request_duration_seconds", duration),
+            ("http_request_db_duration_seconds", stats.duration),
+            ("http_request_db_queries", stats.count),
+        ]
+        if not response.streaming:
+            observations.append(("http_response_size_bytes", len(response.content)))
+        registry.observe(view, method, observations)
+        if stats.duplicates:
+            registry.inc("http_request_duplicate_queries_total", view, method, stats.duplicates)
+
+        if METRICS_SERVER_TIMING:
+            # streamed bodies are still being produced: "app" covers up to the first byte
+            response["Server-Timing"] = (
+                f'app;dur={duration * 1000:.1f}, '
+                f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries, {stats.duplicates} duplicate"'
+            )
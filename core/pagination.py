@@ -0,0 +1,120 @@
+# core/pagination.py
+from __future__ import annotations
+
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Model, Q, QuerySet
+from rest_framework.exceptions import ValidationError
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValidationError({"cursor": "Invalid cursor."})
+    if not isinstance(values, list) or len(values) != size:
+        raise ValidationError({"cursor": "Invalid cursor."})
+    return values
+
+
+def coerce_cursor(model: type[Model], ordering: Sequence[str], values: Sequence[Any]) -> List[Any]:
+    """Cursor values converted by their ordering fields; a tampered cursor is a 400, not a 500."""
+    try:
+        coerced = [model._meta.get_field(f.lstrip("-")).to_python(v) for f, v in zip(ordering, values)]
+    except (DjangoValidationError, TypeError, ValueError):
+        raise ValidationError({"cursor": "Invalid cursor."})
+    if any(v is None for v in coerced):  # ordering columns are never null
+        raise ValidationError({"cursor": "Invalid cursor."})
+    return coerced
+
+
+def get_page_size(request, default: int = DEFAULT_PAGE_SIZE, maximum: int = MAX_PAGE_SIZE) -> int:
+    try:
+        size = int(request.query_params.get("page_size", default))
+    except (TypeError, ValueError):
+        raise ValidationError({"page_size": "Must be an integer."})
+    return max(1, min(size, maximum))
+
+
+def _row_value(row: Any, field: str) -> Any:
+    if isinstance(row, dict):
+        return row[field]
+    return getattr(row, field)
+
+
+def keyset_filter(ordering: Sequence[str], values: Sequence[Any]) -> Q:
+    """
+    Build the "strictly after this row" predicate for a multi-column ordering,
+    e.g. ("-created_at", "-id") -> created_at < c OR (created_at = c AND id < i).
+    """
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        condition |= equal & Q(**{f"{name}__{lookup}": value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def paginate_keyset(
+    queryset: QuerySet,
+    ordering: Sequence[str],
+    cursor: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> Dict[str, Any]:
+    """
+    Keyset (seek) pagination. `ordering` must be unique per row (end it with the pk)
+    and should be backed by a composite index in the same order.
+
+    Returns {"results": [...rows], "next_cursor": str | None}.
+    """
+    rows = list(_page_queryset(queryset, ordering, cursor, page_size))
+    return _build_page(rows, ordering, page_size)
+
+
+async def apaginate_keyset(
+    queryset: QuerySet,
+    ordering: Sequence[str],
+    cursor: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> Dict[str, Any]:
+    """Async-ORM twin of paginate_keyset()."""
+    rows = [row async for row in _page_queryset(queryset, ordering, cursor, page_size)]
+    return _build_page(rows, ordering, page_size)
+
+
+def _page_queryset(queryset: QuerySet, ordering: Sequence[str], cursor: Optional[str], page_size: int) -> QuerySet:
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = coerce_cursor(queryset.model, ordering, decode_cursor(cursor, len(ordering)))
+        queryset = queryset.filter(keyset_filter(ordering, values))
+    return queryset[: page_size + 1]  # one extra row tells us whether there is a next page
+
+
+def _build_page(rows: List[Any], ordering: Sequence[str], page_size: int) -> Dict[str, Any]:
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor([_row_value(last, f.lstrip("-")) for f in ordering])
+
+    return {"results": rows, "next_cursor": next_cursor}
@@ -0,0 +1,47 @@
+# core/pytest_plugin.py
+"""
+Query checks for pytest runs; enable with `pytest -p core.pytest_plugin`
+(or `pytest_plugins = ["core.pytest_plugin"]` in a conftest). Django must
+already be set up, e.g. by pytest-django.
+
+- Every request made through Django's test clients goes through
+  QueryInspectorMiddleware in "raise" mode, so an N+1 shape, a slow
+  statement or a view over its query budget (QUERY_BUDGETS / `query_budget`)
+  fails the test that made it.
+- @pytest.mark.query_budget(n) fails a test that runs more than n queries
+  in total, setup included.
+- @pytest.mark.allow_query_problems downgrades the request checks to
+  warnings for one test.
+"""
+from __future__ import annotations
+
+import pytest
+
+from core.querycheck import capture_queries
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "query_budget(n): fail the test if it runs more than n SQL queries")
+    config.addinivalue_line("markers", "allow_query_problems: only log N+1/slow/budget findings for this test")
+
+
+@pytest.fixture(autouse=True)
+def query_inspector(request):
+    from django.test import override_settings
+
+    mode = "log" if request.node.get_closest_marker("allow_query_problems") else "raise"
+    with override_settings(QUERY_INSPECTOR_ENABLED=True, QUERY_INSPECTOR_MODE=mode):
+        with capture_queries() as inspector:
+            request.node.query_inspector = inspector
+            yield inspector
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    result = yield
+    # checked here rather than in fixture teardown so it counts as a failure, not an error
+    marker = item.get_closest_marker("query_budget")
+    inspector = getattr(item, "query_inspector", None)
+    if marker is not None and inspector is not None and inspector.count > marker.args[0]:
+        pytest.fail(f"{inspector.count} queries, budget is {marker.args[0]}", pytrace=False)
+    return result
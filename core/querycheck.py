@@ -0,0 +1,193 @@
+# core/querycheck.py
+from __future__ import annotations
+
+import logging
+import os
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from core.metrics import install_execute_wrapper
+
+logger = logging.getLogger(__name__)
+
+# For test and staging runs: the middleware removes itself unless
+# QUERY_INSPECTOR_ENABLED is set, and core/pytest_plugin.py turns it on.
+QUERY_NPLUSONE_THRESHOLD = getattr(settings, "QUERY_NPLUSONE_THRESHOLD", 5)
+QUERY_SLOW_MS = getattr(settings, "QUERY_SLOW_MS", 100)
+
+_PLACEHOLDER = re.compile(r"%s|\?")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACES = re.compile(r"\s+")
+_SAVEPOINTS = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SKIP_PATHS = (
+    os.sep + "site-packages" + os.sep,
+    os.sep + "django" + os.sep,
+    os.path.abspath(__file__),
+    os.path.join(_PROJECT_ROOT, "core", "metrics.py"),  # the other execute wrapper
+)
+
+
+class QueryProblem(AssertionError):
+    """Raised in "raise" mode; an AssertionError so test runners report a failure."""
+
+
+def fingerprint(sql: str) -> str:
+    """
+    SQL shape with literals and placeholders blanked and IN lists collapsed,
+    so `WHERE id = 1` and `WHERE id = 2` (or IN lists of any length) match.
+    """
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _LITERALS.sub("?", sql)
+    sql = _IN_LIST.sub("(...)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+def _callsite() -> str:
+    """First frame in project code outside Django and this module."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_PROJECT_ROOT) and not any(part in filename for part in _SKIP_PATHS):
+            return f"{os.path.relpath(filename, _PROJECT_ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "<unknown>"
+
+
+@dataclass
+class QueryInspector:
+    """Queries seen in one scope (a request or a test), grouped by shape."""
+
+    nplusone_threshold: int = QUERY_NPLUSONE_THRESHOLD
+    slow_ms: float = QUERY_SLOW_MS
+    count: int = 0
+    shapes: Counter = field(default_factory=Counter)
+    callsites: Dict[str, str] = field(default_factory=dict)
+    slow: List[Tuple[float, str, str]] = field(default_factory=list)
+
+    def add(self, sql: str, duration: float) -> None:
+        if sql.startswith(_SAVEPOINTS):  # transaction bookkeeping, not queries
+            return
+        self.count += 1
+        shape = fingerprint(sql)
+        self.shapes[shape] += 1
+        # N+1 is a read pattern; fixtures inserting in a loop are not
+        if self.shapes[shape] == self.nplusone_threshold and shape.upper().startswith("SELECT"):
+            self.callsites[shape] = _callsite()
+        if duration * 1000 >= self.slow_ms:
+            self.slow.append((round(duration * 1000, 1), sql[:500], _callsite()))
+
+    def n_plus_one(self) -> List[Tuple[str, int, str]]:
+        return [(shape, self.shapes[shape], where) for shape, where in self.callsites.items()]
+
+    def problems(self, budget: Optional[int] = None) -> List[str]:
+        found = [
+            f"N+1: {count}x {shape[:300]} (from {where})"
+            for shape, count, where in self.n_plus_one()
+        ]
+        found += [f"slow query ({ms} ms, from {where}): {sql}" for ms, sql, where in self.slow]
+        if budget is not None and self.count > budget:
+            found.append(f"{self.count} queries, budget is {budget}")
+        return found
+
+
+# Every active inspector sees each query, so a request's inspector and the
+# enclosing test's one both count it.
+_active: ContextVar[Tuple[QueryInspector, ...]] = ContextVar("query_inspectors", default=())
+
+
+def inspect_queries(execute, sql, params, many, context):
+    inspectors = _active.get()
+    if not inspectors:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        for inspector in inspectors:
+            inspector.add(sql, duration)
+
+
+@contextmanager
+def capture_queries(**options) -> Iterator[QueryInspector]:
+    """
+    with capture_queries() as inspector:
+        ...
+    assert not inspector.problems(budget=3)
+    """
+    install_execute_wrapper(inspect_queries)
+    inspector = QueryInspector(**options)
+    token = _active.set(_active.get() + (inspector,))
+    try:
+        yield inspector
+    finally:
+        _active.reset(token)
+
+
+def view_query_budget(request) -> Optional[int]:
+    """QUERY_BUDGETS[url name] if set, else the view class's `query_budget`."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    budgets = getattr(settings, "QUERY_BUDGETS", {})
+    if match.view_name in budgets:
+        return budgets[match.view_name]
+    view_class = getattr(match.func, "view_class", None) or getattr(match.func, "cls", None)
+    return getattr(view_class, "query_budget", None)
+
+
+class QueryInspectorMiddleware:
+    """
+    Flags N+1 shapes, slow statements and query-budget overruns per request.
+    QUERY_INSPECTOR_MODE "log" (default) writes a warning; "raise" turns the
+    response into a 500 with QueryProblem, which the test client re-raises.
+    Settings are read when the handler is built, so override_settings works.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "QUERY_INSPECTOR_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.raise_problems = getattr(settings, "QUERY_INSPECTOR_MODE", "log") == "raise"
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with capture_queries() as inspector:
+            response = self.get_response(request)
+        self.check(request, inspector)
+        return response
+
+    async def __acall__(self, request):
+        with capture_queries() as inspector:
+            response = await self.get_response(request)
+        self.check(request, inspector)
+        return response
+
+    def check(self, request, inspector: QueryInspector) -> None:
+        problems = inspector.problems(budget=view_query_budget(request))
+        if not problems:
+            return
+        message = f"{request.method} {request.path}: " + "; ".join(problems)
+        if self.raise_problems:
+            raise QueryProblem(message)
+        logger.warning(message)
@@ -0,0 +1,214 @@
+# core/ratelimit.py
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+
+from core.cache import LocalTTLCache
+from core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Each hit is one atomic Lua script in Redis, so every worker shares the
+# same buckets/windows. A key that was just rejected is remembered in the
+# worker until its retry time, and further hits on it are rejected without
+# a round trip. Without Redis (locmem in local runs) or while it is
+# unreachable, the same algorithms run per process.
+
+RATE_LIMIT_ALGORITHM = getattr(settings, "RATE_LIMIT_ALGORITHM", "token_bucket")
+
+_PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+_RATE = re.compile(r"\s*(\d+)\s*/\s*(\d*)\s*([smhd])[a-z]*\s*")
+
+# KEYS[1] bucket hash; ARGV capacity, refill per second, cost.
+# Returns {allowed, retry after (ms)}. The clock is Redis's, shared by all workers.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+local allowed, retry = 0, 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+else
+  retry = math.ceil((cost - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity * 1000 / rate) + 1000)
+return {allowed, retry}
+"""
+
+# KEYS[1] window hash; ARGV limit, window (ms), cost.
+# Sliding window approximated from the current and previous fixed windows:
+# count = previous * (unelapsed share of the window) + current.
+SLIDING_WINDOW_LUA = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local index = math.floor(now / window)
+local elapsed = now - index * window
+local state = redis.call('HMGET', KEYS[1], 'w', 'c', 'p')
+local w = tonumber(state[1])
+local current, previous = tonumber(state[2]) or 0, tonumber(state[3]) or 0
+if w == nil or w < index - 1 then
+  current, previous = 0, 0
+elseif w == index - 1 then
+  current, previous = 0, current
+end
+local allowed, retry = 0, 0
+if previous * (window - elapsed) / window + current + cost <= limit then
+  current = current + cost
+  allowed = 1
+else
+  local room = limit - current - cost
+  if room >= 0 and previous > 0 then
+    retry = math.ceil(window - room * window / previous - elapsed)
+  else
+    retry = window - elapsed
+  end
+  retry = math.max(retry, 1)
+end
+redis.call('HSET', KEYS[1], 'w', index, 'c', current, 'p', previous)
+redis.call('PEXPIRE', KEYS[1], window * 2)
+return {allowed, retry}
+"""
+
+ALGORITHMS = ("token_bucket", "sliding_window")
+
+
+@dataclass(frozen=True)
+class Rate:
+    limit: int
+    period: float  # seconds
+
+    @property
+    def per_second(self) -> float:
+        return self.limit / self.period
+
+
+def parse_rate(rate: str) -> Rate:
+    """'5/min', '100/h', '3/10min' -> Rate."""
+    match = _RATE.fullmatch(rate)
+    if match is None:
+        raise ValueError(f"Invalid rate {rate!r}, expected e.g. '5/min' or '3/10min'")
+    limit, multiplier, unit = match.groups()
+    return Rate(int(limit), int(multiplier or 1) * _PERIODS[unit])
+
+
+class Decision(NamedTuple):
+    allowed: bool
+    retry_after: float  # seconds; 0 when allowed
+
+
+# ----------------------------
+# In-process algorithms (no Redis)
+# ----------------------------
+class LocalLimiter:
+    """Same algorithms as the Lua scripts, for one process."""
+
+    def __init__(self, maxsize: int = 10000) -> None:
+        self.states = LocalTTLCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def hit(self, algorithm: str, key: str, rate: Rate, cost: int = 1) -> Decision:
+        now = time.monotonic()
+        with self._lock:
+            if algorithm == "token_bucket":
+                tokens, ts = self.states.get(key) or (rate.limit, now)
+                tokens = min(rate.limit, tokens + (now - ts) * rate.per_second)
+                allowed = tokens >= cost
+                retry = 0.0 if allowed else (cost - tokens) / rate.per_second
+                self.states.set(key, (tokens - cost if allowed else tokens, now), ttl=rate.period + 1)
+                return Decision(allowed, retry)
+
+            index, elapsed = divmod(now, rate.period)
+            w, current, previous = self.states.get(key) or (index, 0, 0)
+            if w < index - 1:
+                current, previous = 0, 0
+            elif w == index - 1:
+                current, previous = 0, current
+            allowed = previous * (rate.period - elapsed) / rate.period + current + cost <= rate.limit
+            retry = 0.0
+            if allowed:
+                current += cost
+            else:
+                room = rate.limit - current - cost
+                retry = rate.period - elapsed
+                if room >= 0 and previous > 0:
+                    retry -= room * rate.period / previous
+            self.states.set(key, (index, current, previous), ttl=rate.period * 2)
+            return Decision(allowed, retry)
+
+
+# ----------------------------
+# Limiter
+# ----------------------------
+class RateLimiter:
+    """
+    limiter.hit("login:ip:203.0.113.7", parse_rate("20/min")) -> Decision
+
+    Keys are namespaced under `prefix`; the algorithm is RATE_LIMIT_ALGORITHM
+    unless given.
+    """
+
+    def __init__(self, prefix: str = "ratelimit", local_maxsize: int = 10000) -> None:
+        self.prefix = prefix
+        self.blocked = LocalTTLCache(maxsize=local_maxsize)
+        self.local = LocalLimiter(maxsize=local_maxsize)
+        self._scripts = {}
+
+    def _script(self, client, algorithm: str):
+        script = self._scripts.get(algorithm)
+        if script is None:
+            source = TOKEN_BUCKET_LUA if algorithm == "token_bucket" else SLIDING_WINDOW_LUA
+            script = self._scripts[algorithm] = client.register_script(source)
+        return script
+
+    def hit(self, key: str, rate: Rate, cost: int = 1, algorithm: Optional[str] = None) -> Decision:
+        algorithm = algorithm or RATE_LIMIT_ALGORITHM
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown rate limit algorithm {algorithm!r}")
+        full_key = f"{self.prefix}:{algorithm}:{rate.limit}/{rate.period:g}:{key}"
+
+        blocked_until = self.blocked.get(full_key)
+        if blocked_until is not None:
+            return Decision(False, max(0.0, blocked_until - time.monotonic()))
+
+        decision = self._hit_shared(algorithm, full_key, rate, cost)
+        if decision is None:
+            decision = self.local.hit(algorithm, full_key, rate, cost)
+        if not decision.allowed and decision.retry_after > 0:
+            self.blocked.set(full_key, time.monotonic() + decision.retry_after, ttl=decision.retry_after)
+        return decision
+
+    def _hit_shared(self, algorithm: str, full_key: str, rate: Rate, cost: int) -> Optional[Decision]:
+        client = get_redis()
+        if client is None:
+            return None
+        if algorithm == "token_bucket":
+            args = [rate.limit, repr(rate.per_second), cost]
+        else:
+            args = [rate.limit, int(rate.period * 1000), cost]
+        try:
+            allowed, retry_ms = self._script(client, algorithm)(keys=[full_key], args=args, client=client)
+        except Exception:
+            logger.warning("Rate limiter unavailable, limiting %s in this process only", full_key, exc_info=True)
+            return None
+        return Decision(bool(allowed), retry_ms / 1000)
+
+
+limiter = RateLimiter()
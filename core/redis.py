@@ -0,0 +1,24 @@
+# core/redis.py
+from __future__ import annotations
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def get_redis(alias: str = "default"):
+    """
+    Raw redis-py client behind a django-redis cache alias, for features that
+    need more than get/set (lists, hashes, Lua). Returns None when the alias is
+    not backed by django-redis (e.g. locmem in local runs), so callers can fall
+    back to the database.
+    """
+    try:
+        from django_redis import get_redis_connection
+    except ImportError:  # pragma: no cover
+        return None
+
+    try:
+        return get_redis_connection(alias)
+    except NotImplementedError:
+        return None
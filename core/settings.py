@@ -63,8 +63,12 @@ AUTHENTICATION_BACKENDS = [
     "django.contrib.auth.backends.ModelBackend",  # fallback
 ]
 
+AUTH_NEGATIVE_CACHE_TTL = 30  # seconds an unknown login identifier is remembered
+
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',  # outermost, so it times everything below
+    'core.querycheck.QueryInspectorMiddleware',  # test/staging only, see QUERY_INSPECTOR_ENABLED
     'corsheaders.middleware.CorsMiddleware',  # CORS first
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware', # WhiteNoise
@@ -129,6 +133,34 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# PASSWORD_HASHER=scrypt|argon2 makes a faster hasher preferred; existing PBKDF2
+# hashes keep working and are transparently rehashed on the next login.
+# argon2 needs `pip install argon2-cffi`.
+PASSWORD_HASHER = env('PASSWORD_HASHER', default='pbkdf2')
+_PREFERRED_HASHERS = {
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+}
+PASSWORD_HASHERS = [_PREFERRED_HASHERS[PASSWORD_HASHER]] + [
+    hasher for hasher in (
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.Argon2PasswordHasher',
+        'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+    ) if hasher != _PREFERRED_HASHERS[PASSWORD_HASHER]
+]
+
+# Bounded per-worker pool for password hashing (account/hashing.py)
+PASSWORD_HASH_WORKERS = env('PASSWORD_HASH_WORKERS', cast=int, default=2)
+PASSWORD_HASH_MAX_QUEUE = env('PASSWORD_HASH_MAX_QUEUE', cast=int, default=32)
+# Bulk user provisioning (account/provisioning.py, `manage.py provision_users`)
+PROVISION_BATCH_SIZE = env('PROVISION_BATCH_SIZE', cast=int, default=1000)   # rows checked + inserted per transaction
+PROVISION_HASH_WORKERS = env('PROVISION_HASH_WORKERS', cast=int, default=0)   # hashing processes; 0 = one per CPU
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -164,10 +196,13 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=30),
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
+AUTH_SNAPSHOT_TTL = env('AUTH_SNAPSHOT_TTL', cast=int, default=5 * 60)   # cached request.user snapshot (account/authentication.py)
+AUTH_REVOCATION_SYNC_INTERVAL = env('AUTH_REVOCATION_SYNC_INTERVAL', cast=int, default=1)   # seconds between pulls of revoked jtis into each worker's filter (account/revocation.py)
+AUTH_REVOCATION_CAPACITY = env('AUTH_REVOCATION_CAPACITY', cast=int, default=200_000)   # revoked tokens the filter holds at 0.1% false positives
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "account.authentication.CachedJWTAuthentication",  # simplejwt without the per-request user SELECT
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
@@ -175,6 +210,19 @@ REST_FRAMEWORK = {
 }
 
 
+# Rate limits for the public endpoints (core/throttling.py): scope -> key kind -> "N/period"
+RATE_LIMIT_ENABLED = env('RATE_LIMIT_ENABLED', cast=bool, default=True)
+RATE_LIMIT_ALGORITHM = env('RATE_LIMIT_ALGORITHM', default='token_bucket')   # or sliding_window
+RATE_LIMITS = {
+    "signup": {"ip": "5/h", "identifier": "3/h"},
+    "login": {"ip": "30/min", "identifier": "5/min"},
+    "otp_send": {"ip": "10/h", "identifier": "3/10min"},  # each hit sends an email
+    "otp_verify": {"ip": "20/10min", "identifier": "5/10min"},
+    "token_refresh": {"ip": "60/min"},
+    "contact": {"ip": "5/h", "identifier": "3/h"},
+}
+
+
 # CORS
 CORS_ALLOW_ALL_ORIGINS = True
 # CORS_ALLOWED_ORIGINS = env.list("CORS_ALLOWED_ORIGINS", default=[])
@@ -193,6 +241,22 @@ EMAIL_HOST_USER = env('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+# OTP store (cache-backed, see account/otp.py)
+OTP_TTL_SECONDS = env('OTP_TTL_SECONDS', cast=int, default=30 * 60)
+OTP_MAX_ATTEMPTS = env('OTP_MAX_ATTEMPTS', cast=int, default=5)
+
+# Social login (account/social.py); id_tokens are verified locally against cached JWKS
+GOOGLE_CLIENT_IDS = env.list('GOOGLE_CLIENT_IDS', default=[])
+APPLE_CLIENT_IDS = env.list('APPLE_CLIENT_IDS', default=[])
+MICROSOFT_CLIENT_IDS = env.list('MICROSOFT_CLIENT_IDS', default=[])
+SOCIAL_TOKEN_CACHE_TTL = 5 * 60
+
+# Outbox dispatcher (python manage.py run_outbox)
+OUTBOX_BATCH_SIZE = env('OUTBOX_BATCH_SIZE', cast=int, default=50)
+OUTBOX_MAX_ATTEMPTS = env('OUTBOX_MAX_ATTEMPTS', cast=int, default=6)
+OUTBOX_RETRY_BASE_SECONDS = env('OUTBOX_RETRY_BASE_SECONDS', cast=int, default=15)
+OUTBOX_RETENTION_SECONDS = env('OUTBOX_RETENTION_SECONDS', cast=int, default=7 * 24 * 3600)
+
 
 
 
@@ -299,6 +363,49 @@ CACHES = {
     }
 }
 
+# Privacy/About/Terms pages (privacy.views.content_cache)
+CONTENT_CACHE_TTL = 60 * 60         # shared Redis tier, seconds
+CONTENT_LOCAL_CACHE_TTL = 5         # per-process tier, bounds cross-worker staleness
+
+# ShareThoughts feed head kept as a Redis list (privacy/feed.py)
+THOUGHTS_FEED_CACHE_SIZE = 200
+THOUGHTS_FEED_CACHE_TTL = 10 * 60   # rebuilt from the DB after this, self-heals any drift
+
+# Talent discovery snapshot (jobs_talent/talent_index.py); SQL is used when disabled or numpy is missing
+TALENT_INDEX_ENABLED = env('TALENT_INDEX_ENABLED', cast=bool, default=True)
+TALENT_INDEX_TTL = env('TALENT_INDEX_TTL', cast=int, default=60)   # seconds a snapshot is served before a rebuild
+MATCHING_CACHE_TTL = env('MATCHING_CACHE_TTL', cast=int, default=10 * 60)   # per-job top-K rankings (jobs_talent/matching.py)
+
+# Job applicants/shortlisted/selftapes counters (jobs_talent/counters.py):
+# "direct" = F() update per event, "buffered" = Redis HINCRBY + `manage.py flush_job_counters`
+JOB_COUNTER_MODE = env('JOB_COUNTER_MODE', default='direct')
+
+# Image variants (core/images.py, `manage.py process_images`)
+IMAGE_VARIANT_WIDTHS = (160, 480, 1080)
+IMAGE_VARIANT_FORMATS = ("webp", "avif")   # formats this Pillow build can't encode are skipped
+IMAGE_PROCESS_WORKERS = env('IMAGE_PROCESS_WORKERS', cast=int, default=2)
+IMAGE_PROCESS_LEASE_SECONDS = env('IMAGE_PROCESS_LEASE_SECONDS', cast=int, default=300)   # a dead worker's claim expires
+
+# Dashboard summaries (jobs_talent/dashboard.py, `manage.py refresh_dashboards`)
+DASHBOARD_RECENT_DAYS = env('DASHBOARD_RECENT_DAYS', cast=int, default=7)
+DASHBOARD_CACHE_TTL = env('DASHBOARD_CACHE_TTL', cast=int, default=5 * 60)
+
+# Bulk talent import (jobs_talent/talent_import.py, `manage.py import_talents`)
+TALENT_IMPORT_BATCH_SIZE = env('TALENT_IMPORT_BATCH_SIZE', cast=int, default=1000)   # rows validated + inserted per transaction
+
+# Request metrics (core/middleware.py, core/metrics.py); scraped from /internal/metrics/
+METRICS_ENABLED = env('METRICS_ENABLED', cast=bool, default=True)
+METRICS_SERVER_TIMING = env('METRICS_SERVER_TIMING', cast=bool, default=True)
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+METRICS_ALLOWED_IPS = env.list('METRICS_ALLOWED_IPS', default=['127.0.0.1'])
+
+# N+1 / slow query / query budget checks (core/querycheck.py); on for staging and pytest runs
+QUERY_INSPECTOR_ENABLED = env('QUERY_INSPECTOR_ENABLED', cast=bool, default=False)
+QUERY_INSPECTOR_MODE = env('QUERY_INSPECTOR_MODE', default='log')   # "log" or "raise"
+QUERY_NPLUSONE_THRESHOLD = env('QUERY_NPLUSONE_THRESHOLD', cast=int, default=5)   # same SELECT shape this many times in one request
+QUERY_SLOW_MS = env('QUERY_SLOW_MS', cast=int, default=100)
+QUERY_BUDGETS = {}   # {url name: max queries}, overrides a view's `query_budget`
+
 
 # Messagebird
 # settings.py
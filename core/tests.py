@@ -0,0 +1,426 @@
+import importlib.util
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+import unittest
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from account.models import UserAuth
+from account.utils import generate_tokens_for_user
+from core.metrics import MetricsRegistry, render
+from core.querycheck import QueryProblem, capture_queries, fingerprint
+from core.ratelimit import LocalLimiter, Rate, RateLimiter, limiter, parse_rate
+
+try:
+    import fakeredis
+    import lupa  # noqa: F401  fakeredis runs EVAL with it
+except ImportError:
+    fakeredis = None
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class QueryInspectorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            UserAuth.objects.create_user(email=f"user{index}@example.com", full_name=f"User {index}")
+            for index in range(6)
+        ]
+
+    def test_fingerprint_blanks_literals_and_collapses_in_lists(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id = 1 AND name = 'x' AND pk IN (%s, %s, %s)"),
+            fingerprint("SELECT * FROM t WHERE id = 22 AND name = 'y' AND pk IN (%s)"),
+        )
+
+    def test_repeated_select_is_n_plus_one(self):
+        with capture_queries(nplusone_threshold=5) as inspector:
+            for user in self.users[:5]:
+                UserAuth.objects.filter(pk=user.pk).first()
+        (problem,) = inspector.problems()
+        self.assertTrue(problem.startswith("N+1: 5x SELECT"))
+        self.assertIn("core/tests.py", problem)
+
+    def test_repeats_below_the_threshold_are_fine(self):
+        with capture_queries(nplusone_threshold=5) as inspector:
+            for user in self.users[:4]:
+                UserAuth.objects.filter(pk=user.pk).first()
+        self.assertEqual(inspector.problems(), [])
+
+    def test_writes_in_a_loop_are_not_n_plus_one(self):
+        with capture_queries(nplusone_threshold=2) as inspector:
+            for user in self.users:
+                UserAuth.objects.filter(pk=user.pk).update(bio="x")
+        self.assertEqual(inspector.n_plus_one(), [])
+
+    def test_slow_query(self):
+        with capture_queries(slow_ms=0) as inspector:
+            UserAuth.objects.count()
+        (problem,) = inspector.problems()
+        self.assertTrue(problem.startswith("slow query"))
+
+    def test_budget(self):
+        with capture_queries() as inspector:
+            UserAuth.objects.count()
+            UserAuth.objects.count()
+        self.assertEqual(inspector.count, 2)
+        self.assertEqual(inspector.problems(budget=2), [])
+        self.assertEqual(inspector.problems(budget=1), ["2 queries, budget is 1"])
+
+    def test_nested_scopes_both_count(self):
+        with capture_queries() as outer:
+            UserAuth.objects.count()
+            with capture_queries() as inner:
+                UserAuth.objects.count()
+        self.assertEqual((outer.count, inner.count), (2, 1))
+
+
+@override_settings(QUERY_INSPECTOR_ENABLED=True, QUERY_BUDGETS={"talent-list": 0})
+class QueryInspectorMiddlewareTests(TestCase):
+    def setUp(self):
+        self.user = UserAuth.objects.create_user(email="mw@example.com", full_name="Middleware")
+        self.headers = {"HTTP_AUTHORIZATION": f"Bearer {generate_tokens_for_user(self.user)['access']}"}
+
+    @override_settings(QUERY_INSPECTOR_MODE="raise")
+    def test_raise_mode_fails_the_request(self):
+        with self.assertRaisesMessage(QueryProblem, "1 queries, budget is 0"):
+            self.client.get("/v1/jobs/talents/", **self.headers)
+
+    @override_settings(QUERY_INSPECTOR_MODE="log")
+    def test_log_mode_warns(self):
+        with self.assertLogs("core.querycheck", "WARNING") as logs:
+            response = self.client.get("/v1/jobs/talents/", **self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("GET /v1/jobs/talents/: 1 queries, budget is 0", logs.output[0])
+
+    @override_settings(QUERY_INSPECTOR_MODE="raise", QUERY_BUDGETS={})
+    def test_view_budget_applies_without_an_override(self):
+        response = self.client.get("/v1/jobs/talents/", **self.headers)
+        self.assertEqual(response.status_code, 200)
+
+
+PLUGIN_CONFTEST = """
+import django
+
+django.setup()
+"""
+
+PLUGIN_TESTS = """
+import pytest
+from django.conf import settings
+from django.db import connection
+
+
+def run(queries):
+    with connection.cursor() as cursor:
+        for _ in range(queries):
+            cursor.execute("SELECT 1")
+
+
+@pytest.mark.query_budget(2)
+def test_within_budget():
+    run(2)
+
+
+@pytest.mark.query_budget(1)
+def test_over_budget():
+    run(2)
+
+
+def test_checks_raise_by_default():
+    assert settings.QUERY_INSPECTOR_ENABLED and settings.QUERY_INSPECTOR_MODE == "raise"
+
+
+@pytest.mark.allow_query_problems
+def test_allow_query_problems_only_logs():
+    assert settings.QUERY_INSPECTOR_MODE == "log"
+
+
+def test_inspector_fixture(query_inspector):
+    run(3)
+    assert query_inspector.count == 3
+"""
+
+
+@unittest.skipUnless(importlib.util.find_spec("pytest"), "pytest is not installed")
+class PytestPluginTests(SimpleTestCase):
+    """Runs a generated test module under `pytest -p core.pytest_plugin`."""
+
+    def test_plugin(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name, source in (("conftest.py", PLUGIN_CONFTEST), ("test_plugin.py", PLUGIN_TESTS)):
+                with open(os.path.join(directory, name), "w") as handle:
+                    handle.write(textwrap.dedent(source))
+            env = {
+                **os.environ,
+                "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE,
+                "PYTHONPATH": os.pathsep.join(filter(None, [PROJECT_ROOT, os.environ.get("PYTHONPATH")])),
+            }
+            result = subprocess.run(
+                [sys.executable, "-m", "pytest", "-p", "core.pytest_plugin", "-p", "no:cacheprovider", "-q", "-rA"],
+                cwd=directory, env=env, capture_output=True, text=True, timeout=120,
+            )
+        output = result.stdout + result.stderr
+        self.assertIn("FAILED test_plugin.py::test_over_budget", output)
+        self.assertIn("2 queries, budget is 1", output)
+        passed = ("test_within_budget", "test_checks_raise_by_default", "test_allow_query_problems_only_logs", "test_inspector_fixture")
+        for name in passed:
+            self.assertIn(f"PASSED test_plugin.py::{name}", output)
+        self.assertIn("1 failed, 4 passed", output)
+
+
+class RateParsingTests(SimpleTestCase):
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate("5/min"), Rate(5, 60))
+        self.assertEqual(parse_rate("3/10min"), Rate(3, 600))
+        self.assertEqual(parse_rate("100/h"), Rate(100, 3600))
+        with self.assertRaises(ValueError):
+            parse_rate("5 per minute")
+
+
+class LocalLimiterTests(SimpleTestCase):
+    """The in-process algorithms, on a fixed clock."""
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("core.ratelimit.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.local = LocalLimiter()
+
+    def hits(self, algorithm, count, rate=Rate(3, 60)):
+        return [self.local.hit(algorithm, "key", rate) for _ in range(count)]
+
+    def test_token_bucket(self):
+        decisions = self.hits("token_bucket", 4)
+        self.assertEqual([d.allowed for d in decisions], [True, True, True, False])
+        self.assertAlmostEqual(decisions[-1].retry_after, 20)
+        self.now += 20  # one token refilled
+        self.assertEqual([d.allowed for d in self.hits("token_bucket", 2)], [True, False])
+
+    def test_sliding_window(self):
+        self.now = 6000 + 10  # 10 s into a window
+        decisions = self.hits("sliding_window", 4)
+        self.assertEqual([d.allowed for d in decisions], [True, True, True, False])
+        self.assertAlmostEqual(decisions[-1].retry_after, 50)
+        self.now = 6060 + 30  # halfway through the next window, the previous counts for 1.5
+        self.assertEqual([d.allowed for d in self.hits("sliding_window", 2)], [True, False])
+
+
+class LimiterMixin:
+    rate = Rate(3, 60)
+
+    def make_limiter(self, client=None):
+        patcher = mock.patch("core.ratelimit.get_redis", return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return RateLimiter(prefix=f"test:{self.id()}")
+
+    def allowed(self, rate_limiter, count, algorithm):
+        return [rate_limiter.hit("key", self.rate, algorithm=algorithm).allowed for _ in range(count)]
+
+
+class RateLimiterTests(LimiterMixin, SimpleTestCase):
+    def test_local_path_without_redis(self):
+        for algorithm in ("token_bucket", "sliding_window"):
+            with self.subTest(algorithm=algorithm):
+                self.assertEqual(self.allowed(self.make_limiter(), 4, algorithm), [True, True, True, False])
+
+    def test_rejected_keys_are_answered_locally(self):
+        rate_limiter = self.make_limiter()
+        self.allowed(rate_limiter, 4, "token_bucket")
+        with mock.patch.object(rate_limiter, "_hit_shared") as shared:
+            decision = rate_limiter.hit("key", self.rate, algorithm="token_bucket")
+        shared.assert_not_called()
+        self.assertFalse(decision.allowed)
+        self.assertGreater(decision.retry_after, 19)
+
+    def test_falls_back_to_local_limits_when_redis_fails(self):
+        client = mock.Mock()
+        client.register_script.return_value.side_effect = ConnectionError("redis is down")
+        rate_limiter = self.make_limiter(client)
+        with self.assertLogs("core.ratelimit", "WARNING"):
+            self.assertEqual(self.allowed(rate_limiter, 4, "token_bucket"), [True, True, True, False])
+
+    def test_unknown_algorithm(self):
+        with self.assertRaises(ValueError):
+            self.make_limiter().hit("key", self.rate, algorithm="leaky_bucket")
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis and lupa are not installed")
+class RedisRateLimiterTests(LimiterMixin, SimpleTestCase):
+    """The Lua scripts, on fakeredis; two limiters stand for two workers."""
+
+    def setUp(self):
+        self.client = fakeredis.FakeStrictRedis(server=fakeredis.FakeServer())
+
+    def test_token_bucket(self):
+        worker_a, worker_b = self.make_limiter(self.client), self.make_limiter(self.client)
+        self.assertEqual(self.allowed(worker_a, 2, "token_bucket"), [True, True])
+        self.assertEqual(self.allowed(worker_b, 2, "token_bucket"), [True, False])
+        decision = worker_a.hit("key", self.rate, algorithm="token_bucket")
+        self.assertFalse(decision.allowed)
+        self.assertTrue(19 <= decision.retry_after <= 20)
+
+    def test_sliding_window(self):
+        worker_a, worker_b = self.make_limiter(self.client), self.make_limiter(self.client)
+        self.assertEqual(self.allowed(worker_a, 2, "sliding_window"), [True, True])
+        self.assertEqual(self.allowed(worker_b, 2, "sliding_window"), [True, False])
+        decision = worker_a.hit("key", self.rate, algorithm="sliding_window")
+        self.assertFalse(decision.allowed)
+        self.assertTrue(0 < decision.retry_after <= 60)
+
+    def test_keys_expire(self):
+        rate_limiter = self.make_limiter(self.client)
+        rate_limiter.hit("key", self.rate, algorithm="token_bucket")
+        (key,) = self.client.keys("*")
+        self.assertTrue(0 < self.client.pttl(key) <= 61000)  # a full refill, plus a second
+
+
+class ThrottleTests(TestCase):
+    """RATE_LIMITS["login"] is {"ip": "30/min", "identifier": "5/min"}."""
+
+    def setUp(self):
+        cache.clear()
+        limiter.blocked.clear()
+        limiter.local.states.clear()
+
+    def login(self, email):
+        return self.client.post(
+            "/v1/account/login/", {"email": email, "password": "wrong-password"}, content_type="application/json"
+        )
+
+    def test_identifier_limit_answers_429_with_retry_after(self):
+        for _ in range(5):
+            self.assertEqual(self.login("target@example.com").status_code, 400)
+        with self.assertNumQueries(0):
+            response = self.login("Target@Example.com ")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response["Retry-After"]), 1)
+        self.assertEqual(self.login("someone-else@example.com").status_code, 400)
+
+    def test_safe_methods_are_not_counted(self):
+        for _ in range(40):
+            self.client.get("/v1/privacy/submit/querry/")
+        response = self.client.post(
+            "/v1/privacy/submit/querry/", {"name": "A", "email": "a@example.com", "message": "Hi"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+
+
+class MetricsMiddlewareTests(TestCase):
+    url = "/v1/privacy/submit/querry/"
+
+    def setUp(self):
+        cache.clear()
+        self.registry = MetricsRegistry(flush_interval=3600)
+        for target in ("core.middleware.registry", "core.views.registry"):
+            patcher = mock.patch(target, self.registry)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch("core.metrics.get_redis", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def series(self, name):
+        return {
+            tuple(field.split("\t")[1:]): value
+            for field, value in self.registry.snapshot().items()
+            if field.startswith(name + "\t")
+        }
+
+    def test_request_is_recorded_per_view(self):
+        response = self.client.get(self.url)
+        self.assertRegex(response["Server-Timing"], r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries, 0 duplicate"$')
+        durations = self.series("http_request_duration_seconds")
+        self.assertEqual(durations[("submit-querry", "GET", "count")], 1)
+        self.assertEqual(sum(value for (_, _, suffix), value in durations.items() if suffix not in ("sum", "count")), 1)
+        sizes = self.series("http_response_size_bytes")
+        self.assertEqual(sizes[("submit-querry", "GET", "sum")], len(response.content))
+
+    def test_unresolved_paths_and_odd_methods_share_a_label(self):
+        self.client.get("/no/such/path/")
+        self.client.get("/another/missing/path/")
+        self.client.generic("PROPFIND", self.url)
+        self.client.generic("X-SCAN-1", self.url)
+        counts = {key[:2]: value for key, value in self.series("http_request_db_queries").items() if key[2] == "count"}
+        self.assertEqual(counts, {("<unresolved>", "GET"): 2, ("submit-querry", "other"): 2})
+
+    def test_render_builds_cumulative_buckets(self):
+        self.registry.observe('a"view', "GET", [("http_request_db_queries", 1), ("http_request_db_queries", 4)])
+        self.registry.observe('a"view', "GET", [("http_request_db_queries", 500)])
+        self.registry.inc("http_request_duplicate_queries_total", "b", "POST", 3)
+        text = render(self.registry.snapshot())
+        labels = 'view="a\\"view",method="GET"'
+        self.assertIn(f'http_request_db_queries_bucket{{{labels},le="0.0"}} 0\n', text)
+        self.assertIn(f'http_request_db_queries_bucket{{{labels},le="1.0"}} 1\n', text)
+        self.assertIn(f'http_request_db_queries_bucket{{{labels},le="5.0"}} 2\n', text)
+        self.assertIn(f'http_request_db_queries_bucket{{{labels},le="200.0"}} 2\n', text)
+        self.assertIn(f'http_request_db_queries_bucket{{{labels},le="+Inf"}} 3\n', text)
+        self.assertIn(f"http_request_db_queries_sum{{{labels}}} 505\n", text)
+        self.assertIn(f"http_request_db_queries_count{{{labels}}} 3\n", text)
+        self.assertIn('http_request_duplicate_queries_total{view="b",method="POST"} 3\n', text)
+        self.assertIn("# TYPE http_request_duration_seconds histogram\n", text)
+
+    @override_settings(METRICS_TOKEN="scrape-secret", METRICS_ALLOWED_IPS=["10.0.0.1"])
+    def test_metrics_view_access(self):
+        self.assertEqual(self.client.get("/internal/metrics/").status_code, 404)
+        self.assertEqual(self.client.get("/internal/metrics/", HTTP_AUTHORIZATION="Bearer wrong").status_code, 404)
+        response = self.client.get("/internal/metrics/", HTTP_AUTHORIZATION="Bearer scrape-secret")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"# TYPE http_request_duration_seconds histogram", response.content)
+        self.assertEqual(self.client.get("/internal/metrics/", REMOTE_ADDR="10.0.0.1").status_code, 200)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_metrics_view_needs_a_token_to_be_set(self):
+        self.assertEqual(self.client.get("/internal/metrics/", REMOTE_ADDR="10.0.0.2", HTTP_AUTHORIZATION="Bearer ").status_code, 404)
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is not installed")
+class MetricsRegistryFlushTests(SimpleTestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        patcher = mock.patch("core.metrics.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_workers_are_merged_in_redis(self):
+        first, second = MetricsRegistry(), MetricsRegistry()
+        first.observe("view", "GET", [("http_request_db_queries", 2)])
+        second.observe("view", "GET", [("http_request_db_queries", 3)])
+        second.inc("http_request_duplicate_queries_total", "view", "GET")
+        self.assertTrue(first.flush())
+
+        values = second.snapshot()  # flushes its own values first
+        self.assertEqual(values["http_request_db_queries\tview\tGET\tcount"], 2)
+        self.assertEqual(values["http_request_db_queries\tview\tGET\tsum"], 5)
+        self.assertEqual(values["http_request_db_queries\tview\tGET\t2.0"], 1)
+        self.assertEqual(values["http_request_db_queries\tview\tGET\t3.0"], 1)
+        self.assertEqual(values["http_request_duplicate_queries_total\tview\tGET\t"], 1)
+        self.assertEqual(first.snapshot(), values)  # nothing local is left over
+
+    def test_failed_flush_keeps_the_values(self):
+        metrics = MetricsRegistry()
+        metrics.observe("view", "GET", [("http_request_db_queries", 1)])
+        with mock.patch.object(self.redis, "pipeline", side_effect=ConnectionError("down")):
+            self.assertTrue(metrics.flush())
+        self.assertEqual(self.redis.hgetall("metrics:http"), {})
+        metrics.observe("view", "GET", [("http_request_db_queries", 1)])
+        self.assertEqual(metrics.snapshot()["http_request_db_queries\tview\tGET\tcount"], 2)
+
+    def test_flush_is_due_after_the_interval(self):
+        metrics = MetricsRegistry(flush_interval=0.05)
+        self.assertFalse(metrics.flush_due())
+        time.sleep(0.06)
+        self.assertTrue(metrics.flush_due())
+        metrics.flush()
+        self.assertFalse(metrics.flush_due())
@@ -4,6 +4,8 @@ from django.conf import settings
 from django.conf.urls.static import static
 from drf_spectacular.views import SpectacularRedocView
 
+from core.views import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
@@ -11,6 +13,10 @@ urlpatterns = [
     #local
     path('v1/account/', include('account.urls')),
     path('v1/privacy/', include('privacy.urls')),
+    path('v1/jobs/', include('jobs_talent.urls')),
+
+    #internal
+    path('internal/metrics/', metrics_view, name='metrics'),
 ]
 
 
@@ -0,0 +1,61 @@
+# core/views.py
+from __future__ import annotations
+
+import hmac
+from inspect import isawaitable
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from rest_framework.views import APIView
+
+from core.metrics import registry, render
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView whose handlers are coroutines (`async def get/post/...`).
+
+    Django serves it natively on the ASGI event loop instead of hopping the whole
+    view into the sync thread. Authentication, permission and throttle checks
+    (`initial`) may hit the DB, so they run through sync_to_async; handlers must
+    do the same for any ORM or serializer work that isn't async-safe.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if isawaitable(response):  # OPTIONS is still served by DRF's sync handler
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. Open to METRICS_ALLOWED_IPS, or to any caller
+    sending `Authorization: Bearer <METRICS_TOKEN>`; everyone else gets a 404.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    header = request.headers.get("Authorization", "")
+    authorized = bool(token) and hmac.compare_digest(header, f"Bearer {token}")
+    if not authorized and request.META.get("REMOTE_ADDR") not in getattr(settings, "METRICS_ALLOWED_IPS", ("127.0.0.1",)):
+        raise Http404
+
+    return HttpResponse(render(registry.snapshot()), content_type="text/plain; version=0.0.4; charset=utf-8")
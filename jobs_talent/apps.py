@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class JobsTalentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'jobs_talent'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,175 @@
+# jobs_talent/counters.py
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+
+from core.redis import get_redis
+from .models import Job, JobEvent
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = {
+    JobEvent.Kind.APPLIED: "applicants_count",
+    JobEvent.Kind.SHORTLISTED: "shortlisted_count",
+    JobEvent.Kind.SELFTAPE: "selftapes_count",
+}
+
+# "direct": F() update in the event's transaction.
+# "buffered": HINCRBY in Redis, applied to the DB by `flush_job_counters`.
+JOB_COUNTER_MODE = getattr(settings, "JOB_COUNTER_MODE", "direct")
+JOB_COUNTER_FLUSH_BATCH = getattr(settings, "JOB_COUNTER_FLUSH_BATCH", 500)
+
+DIRTY_KEY = "jobs:counters:dirty"
+
+
+def _pending_key(job_id) -> str:
+    return f"jobs:counters:{job_id}"
+
+
+def increment_counters(job_id: int, deltas: Dict[str, int]) -> None:
+    """
+    Atomic `col = col + n` in the database; concurrent writers never lose
+    each other's increments.
+    """
+    Job.objects.filter(pk=job_id).update(**{name: F(name) + amount for name, amount in deltas.items()})
+
+
+def _buffer_increment(job_id: int, field: str) -> bool:
+    client = get_redis()
+    if client is None:
+        return False
+    try:
+        pipe = client.pipeline(transaction=True)
+        pipe.hincrby(_pending_key(job_id), field, 1)
+        pipe.sadd(DIRTY_KEY, job_id)
+        pipe.execute()
+        return True
+    except Exception:
+        logger.warning("Counter buffer unavailable, updating job %s directly", job_id, exc_info=True)
+        return False
+
+
+def record_event(job: Job, talent_id: int, kind: str, created_by=None) -> JobEvent:
+    """
+    Store a pipeline event and bump the matching job counter.
+
+    In direct mode the event row and the counter update commit together. In
+    buffered mode the increment is coalesced in Redis and lands in the DB on
+    the next flush; if Redis is unreachable it falls back to a direct update.
+    Raises IntegrityError if the talent already has this event on the job.
+    """
+    field = COUNTER_FIELDS[kind]
+    buffered = JOB_COUNTER_MODE == "buffered"
+
+    with transaction.atomic():
+        event = JobEvent.objects.create(job=job, talent_id=talent_id, kind=kind, created_by=created_by)
+        if not buffered:
+            increment_counters(job.pk, {field: 1})
+
+    if buffered and not _buffer_increment(job.pk, field):
+        increment_counters(job.pk, {field: 1})
+    return event
+
+
+# ----------------------------
+# Buffered mode: flush
+# ----------------------------
+def flush_buffered_counters(batch_size: int = JOB_COUNTER_FLUSH_BATCH) -> int:
+    """
+    Move up to `batch_size` jobs' pending increments from Redis to the DB.
+
+    Each job's hash is read and deleted in one MULTI, so increments arriving
+    meanwhile start a fresh hash (and re-mark the job dirty) instead of being
+    lost. If the DB write fails the deltas are pushed back. Returns the number
+    of jobs flushed.
+    """
+    client = get_redis()
+    if client is None:
+        return 0
+
+    job_ids = client.spop(DIRTY_KEY, batch_size)
+    if not job_ids:
+        return 0
+
+    pipe = client.pipeline(transaction=True)
+    for job_id in job_ids:
+        pipe.hgetall(_pending_key(int(job_id)))
+        pipe.delete(_pending_key(int(job_id)))
+    replies = pipe.execute()
+
+    pending: Dict[int, Dict[str, int]] = {}
+    for index, job_id in enumerate(job_ids):
+        deltas = {key.decode(): int(value) for key, value in replies[index * 2].items()}
+        if deltas:
+            pending[int(job_id)] = deltas
+
+    try:
+        with transaction.atomic():
+            # fixed order so two flushers can't deadlock on row locks
+            for job_id in sorted(pending):
+                increment_counters(job_id, pending[job_id])
+    except Exception:
+        _requeue(client, pending)
+        raise
+    return len(pending)
+
+
+def _requeue(client, pending: Dict[int, Dict[str, int]]) -> None:
+    pipe = client.pipeline(transaction=True)
+    for job_id, deltas in pending.items():
+        for field, amount in deltas.items():
+            pipe.hincrby(_pending_key(job_id), field, amount)
+        pipe.sadd(DIRTY_KEY, job_id)
+    pipe.execute()
+
+
+def pending_job_ids() -> set:
+    client = get_redis()
+    if client is None:
+        return set()
+    return {int(job_id) for job_id in client.smembers(DIRTY_KEY)}
+
+
+# ----------------------------
+# Reconciliation
+# ----------------------------
+def reconcile_job_counters(job_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute the counters from JobEvent with one grouped aggregate and fix
+    the rows that drifted. Returns the number of jobs corrected.
+
+    Counters are read before the aggregate, and each fix is a compare-and-set
+    on the values read. A row that changed in between is skipped rather than
+    clobbered, and the next run picks it up. Jobs with increments still
+    buffered in Redis are skipped as well.
+    """
+    fields = list(COUNTER_FIELDS.values())
+    jobs = Job.objects.all()
+    events = JobEvent.objects.all()
+    if job_ids is not None:
+        job_ids = list(job_ids)
+        jobs = jobs.filter(pk__in=job_ids)
+        events = events.filter(job_id__in=job_ids)
+
+    current = {row["job_id"]: row for row in jobs.values("job_id", *fields).iterator()}
+
+    truth: Dict[int, Dict[str, int]] = defaultdict(dict)
+    for row in events.values("job_id", "kind").annotate(total=Count("pk")).order_by():
+        truth[row["job_id"]][COUNTER_FIELDS[row["kind"]]] = row["total"]
+
+    skip = pending_job_ids()
+    corrected = 0
+    for job_id, row in current.items():
+        if job_id in skip:
+            continue
+        expected = {name: truth.get(job_id, {}).get(name, 0) for name in fields}
+        if all(row[name] == expected[name] for name in fields):
+            continue
+        corrected += Job.objects.filter(pk=job_id, **{name: row[name] for name in fields}).update(**expected)
+    return corrected
@@ -0,0 +1,323 @@
+# jobs_talent/dashboard.py
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import timedelta
+from typing import Any, Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Q
+from django.utils import timezone
+from rest_framework import serializers
+
+from core.cache import TwoTierCache
+from .models import DashboardSummary, Job, Talent
+
+# Dashboards are one DashboardSummary row per user. Saves and deletes of Talent
+# and Job apply +/- deltas to that row in the writer's transaction (signals.py);
+# `manage.py refresh_dashboards` rebuilds rows from the source tables, which
+# also ages out "recent" counts and repairs drift from QuerySet.update() and
+# bulk writes, which send no signals, and from saving a stale instance (its
+# remembered state is not what the row held).
+
+DASHBOARD_RECENT_DAYS = getattr(settings, "DASHBOARD_RECENT_DAYS", 7)
+
+JOB_STATUSES = tuple(Job.Status.values)
+COUNT_FIELDS = (
+    "talents_total",
+    "talents_available",
+    "talents_recent",
+    *(f"jobs_created_{name}" for name in JOB_STATUSES),
+    "jobs_created_recent",
+    *(f"jobs_assigned_{name}" for name in JOB_STATUSES),
+    "jobs_assigned_recent",
+)
+
+dashboard_cache = TwoTierCache(
+    prefix="dashboard",
+    shared_ttl=getattr(settings, "DASHBOARD_CACHE_TTL", 5 * 60),
+    local_ttl=getattr(settings, "DASHBOARD_LOCAL_CACHE_TTL", 2),
+)
+
+TALENT_STATE_FIELDS = ("added_by_agent_id", "is_available", "created_at")
+JOB_STATE_FIELDS = ("job_created_by_id", "job_assigned_to_id", "status", "created_at")
+
+_UNKNOWN = object()
+
+
+def _recent_cutoff():
+    return timezone.now() - timedelta(days=DASHBOARD_RECENT_DAYS)
+
+
+def _is_recent(created_at, cutoff) -> int:
+    return int(created_at is not None and created_at >= cutoff)
+
+
+# ----------------------------
+# Incremental maintenance (signals)
+# ----------------------------
+def talent_contribution(state: Dict[str, Any], cutoff) -> Dict[int, Dict[str, int]]:
+    """What one talent adds to its agent's summary."""
+    return {
+        state["added_by_agent_id"]: {
+            "talents_total": 1,
+            "talents_available": int(bool(state["is_available"])),
+            "talents_recent": _is_recent(state["created_at"], cutoff),
+        }
+    }
+
+
+def job_contribution(state: Dict[str, Any], cutoff) -> Dict[int, Dict[str, int]]:
+    """What one job adds to its client's and its assigned agent's summaries."""
+    result: Dict[int, Dict[str, int]] = defaultdict(dict)
+    recent = _is_recent(state["created_at"], cutoff)
+    for role, user_id in (("created", state["job_created_by_id"]), ("assigned", state["job_assigned_to_id"])):
+        if user_id is None:
+            continue
+        counts = result[user_id]
+        if state["status"] in JOB_STATUSES:
+            counts[f"jobs_{role}_{state['status']}"] = 1
+        counts[f"jobs_{role}_recent"] = recent
+    return result
+
+
+TRACKED_MODELS = {
+    Talent: (TALENT_STATE_FIELDS, talent_contribution),
+    Job: (JOB_STATE_FIELDS, job_contribution),
+}
+
+
+def _state(instance, fields):
+    # reading a deferred field would cost a query per instance
+    if instance.get_deferred_fields() & set(fields):
+        return _UNKNOWN
+    return {name: getattr(instance, name) for name in fields}
+
+
+def remember_state(sender, instance) -> None:
+    """
+    Keep the values the summaries were last counted with (post_init/post_save),
+    so the next save can subtract them. Costs no query.
+    """
+    if instance.pk is None:
+        instance._dashboard_state = None
+    else:
+        instance._dashboard_state = _state(instance, TRACKED_MODELS[sender][0])
+
+
+def _diff(old, new, cutoff, contribution) -> Dict[int, Dict[str, int]]:
+    deltas: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for state, sign in ((new, 1), (old, -1)):
+        if state is None:
+            continue
+        for user_id, counts in contribution(state, cutoff).items():
+            for name, amount in counts.items():
+                deltas[user_id][name] += sign * amount
+    return {user_id: {name: n for name, n in counts.items() if n} for user_id, counts in deltas.items()}
+
+
+def record_save(sender, instance, created: bool) -> None:
+    fields, contribution = TRACKED_MODELS[sender]
+    old = None if created else getattr(instance, "_dashboard_state", _UNKNOWN)
+    new = _state(instance, fields)
+
+    if old is _UNKNOWN or new is _UNKNOWN:
+        # loaded with .only()/.defer(): rebuild the owners' rows instead of guessing
+        user_ids = {getattr(instance, name) for name in fields if name.endswith("_id")} - {None}
+        transaction.on_commit(lambda: refresh_summaries(user_ids))
+        instance._dashboard_state = _UNKNOWN
+        return
+
+    cutoff = _recent_cutoff()
+    apply_deltas(_diff(old, new, cutoff, contribution), touched=contribution(new, cutoff))
+    instance._dashboard_state = new
+
+
+def record_delete(sender, instance) -> None:
+    fields, contribution = TRACKED_MODELS[sender]
+    old = getattr(instance, "_dashboard_state", _UNKNOWN)
+    if old is None or old is _UNKNOWN:
+        old = {name: getattr(instance, name) for name in fields}
+    apply_deltas(_diff(old, None, _recent_cutoff(), contribution))
+
+
+def apply_deltas(deltas: Dict[int, Dict[str, int]], touched: Iterable[int] = ()) -> None:
+    """
+    Add `deltas` ({user_id: {field: n}}) to the summary rows with F() updates
+    and stamp last_activity_at on `touched` users. Users without a row are
+    skipped; their row is built from scratch on first read. Rows are updated
+    in user_id order so concurrent writers can't deadlock.
+    """
+    touched = set(touched)
+    now = timezone.now()
+    user_ids = sorted(set(deltas) | touched)
+    for user_id in user_ids:
+        values = {name: F(name) + amount for name, amount in deltas.get(user_id, {}).items()}
+        if user_id in touched:
+            values["last_activity_at"] = now
+        if values:
+            DashboardSummary.objects.filter(user_id=user_id).update(**values)
+    if user_ids:
+        transaction.on_commit(lambda: _invalidate(user_ids))
+
+
+def _invalidate(user_ids: Iterable[int]) -> None:
+    for user_id in user_ids:
+        dashboard_cache.delete(user_id)
+
+
+# ----------------------------
+# Rebuild from source tables
+# ----------------------------
+def _empty_summary() -> Dict[str, Any]:
+    return {**dict.fromkeys(COUNT_FIELDS, 0), "last_activity_at": None}
+
+
+def _latest(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return max(a, b)
+
+
+def compute_summaries(user_ids: Optional[Iterable[int]] = None) -> Dict[int, Dict[str, Any]]:
+    """
+    Summaries for `user_ids` (default: every user owning a talent or a job)
+    from three grouped aggregates. Users with nothing are absent.
+    """
+    cutoff = _recent_cutoff()
+    summaries: Dict[int, Dict[str, Any]] = defaultdict(_empty_summary)
+
+    talents = Talent.objects.all()
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        talents = talents.filter(added_by_agent_id__in=user_ids)
+    rows = talents.values("added_by_agent_id").annotate(
+        total=Count("pk"),
+        available=Count("pk", filter=Q(is_available=True)),
+        recent=Count("pk", filter=Q(created_at__gte=cutoff)),
+        last=Max("updated_at"),
+    ).order_by()
+    for row in rows:
+        summary = summaries[row["added_by_agent_id"]]
+        summary["talents_total"] = row["total"]
+        summary["talents_available"] = row["available"]
+        summary["talents_recent"] = row["recent"]
+        summary["last_activity_at"] = _latest(summary["last_activity_at"], row["last"])
+
+    for role, column in (("created", "job_created_by_id"), ("assigned", "job_assigned_to_id")):
+        jobs = Job.objects.filter(**{f"{column}__isnull": False})
+        if user_ids is not None:
+            jobs = jobs.filter(**{f"{column}__in": user_ids})
+        rows = jobs.values(column, "status").annotate(
+            total=Count("pk"),
+            recent=Count("pk", filter=Q(created_at__gte=cutoff)),
+            last=Max("updated_at"),
+        ).order_by()
+        for row in rows:
+            summary = summaries[row[column]]
+            if row["status"] in JOB_STATUSES:
+                summary[f"jobs_{role}_{row['status']}"] = row["total"]
+            summary[f"jobs_{role}_recent"] += row["recent"]
+            summary["last_activity_at"] = _latest(summary["last_activity_at"], row["last"])
+
+    return dict(summaries)
+
+
+def refresh_summaries(user_ids: Optional[Iterable[int]] = None, create: bool = True) -> int:
+    """
+    Rebuild summary rows from the source tables; returns the number of rows
+    corrected or created.
+
+    Like counters.reconcile_job_counters, each fix is a compare-and-set on the
+    counts read before the aggregates ran: a row a signal updated in between
+    is left for the next run instead of losing that delta. With `create`,
+    users who own data but have no row yet get one.
+    """
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        if not user_ids:
+            return 0
+
+    rows = DashboardSummary.objects.all()
+    if user_ids is not None:
+        rows = rows.filter(user_id__in=user_ids)
+    current = {row["user_id"]: row for row in rows.values("user_id", *COUNT_FIELDS, "last_activity_at").iterator()}
+
+    computed = compute_summaries(user_ids)
+    now = timezone.now()
+    changed = []
+
+    for user_id, row in sorted(current.items()):
+        expected = computed.get(user_id) or _empty_summary()
+        if all(row[name] == expected[name] for name in COUNT_FIELDS):
+            continue
+        # keep the newest activity stamp: signals set it from the clock
+        expected["last_activity_at"] = _latest(row["last_activity_at"], expected["last_activity_at"])
+        if DashboardSummary.objects.filter(
+            user_id=user_id, **{name: row[name] for name in COUNT_FIELDS}
+        ).update(**expected, refreshed_at=now):
+            changed.append(user_id)
+
+    if create:
+        missing = [
+            DashboardSummary(user_id=user_id, refreshed_at=now, **summary)
+            for user_id, summary in computed.items()
+            if user_id not in current
+        ]
+        DashboardSummary.objects.bulk_create(missing, batch_size=500, ignore_conflicts=True)
+        changed.extend(summary.user_id for summary in missing)
+
+    _invalidate(changed)
+    return len(changed)
+
+
+# ----------------------------
+# Read path
+# ----------------------------
+_datetime_field = serializers.DateTimeField()
+
+
+def _as_datetime(value) -> Optional[str]:
+    return None if value is None else _datetime_field.to_representation(value)
+
+
+def _job_block(row: Dict[str, Any], role: str) -> Dict[str, int]:
+    block = {name: row[f"jobs_{role}_{name}"] for name in JOB_STATUSES}
+    block["total"] = sum(block.values())
+    block["recent"] = row[f"jobs_{role}_recent"]
+    return block
+
+
+def summary_payload(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "talents": {
+            "total": row["talents_total"],
+            "available": row["talents_available"],
+            "unavailable": row["talents_total"] - row["talents_available"],
+            "recent": row["talents_recent"],
+        },
+        "jobs_created": _job_block(row, "created"),
+        "jobs_assigned": _job_block(row, "assigned"),
+        "recent_days": DASHBOARD_RECENT_DAYS,
+        "last_activity_at": _as_datetime(row["last_activity_at"]),
+        "refreshed_at": _as_datetime(row.get("refreshed_at")),
+    }
+
+
+def load_summary(user_id: int) -> Dict[str, Any]:
+    """
+    The user's dashboard: a single-row read. The first read for a user builds
+    the row from the aggregates (scoped to that user).
+    """
+    row = DashboardSummary.objects.filter(user_id=user_id).values(
+        *COUNT_FIELDS, "last_activity_at", "refreshed_at"
+    ).first()
+    if row is None:
+        refresh_summaries([user_id])
+        row = DashboardSummary.objects.filter(user_id=user_id).values(
+            *COUNT_FIELDS, "last_activity_at", "refreshed_at"
+        ).first() or _empty_summary()
+    return summary_payload(row)
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs_talent.counters import JOB_COUNTER_FLUSH_BATCH, flush_buffered_counters
+
+
+class Command(BaseCommand):
+    help = "Apply Redis-buffered job counter increments (JOB_COUNTER_MODE=buffered) to the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=JOB_COUNTER_FLUSH_BATCH)
+        parser.add_argument("--interval", type=float, default=1.0, help="Idle poll interval in seconds.")
+        parser.add_argument("--once", action="store_true", help="Flush pending increments once and exit.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        interval = options["interval"]
+
+        while True:
+            close_old_connections()
+            flushed = flush_buffered_counters(batch_size)
+            if flushed:
+                self.stdout.write(f"flushed={flushed}")
+                continue
+
+            if options["once"]:
+                return
+            time.sleep(interval)
@@ -0,0 +1,43 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.streaming import detect_format
+from jobs_talent.talent_import import TALENT_IMPORT_BATCH_SIZE, import_talents
+
+
+class Command(BaseCommand):
+    help = "Bulk-import talents for an agent from a CSV or JSON Lines file, streamed in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or .jsonl file.")
+        parser.add_argument("--agent", required=True, help="Agent's email or user id.")
+        parser.add_argument("--format", dest="file_format", choices=["csv", "ndjson", "jsonl"], help="Default: from the file extension.")
+        parser.add_argument("--batch-size", type=int, default=TALENT_IMPORT_BATCH_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="Validate only.")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        agent = options["agent"]
+        lookup = {"pk": int(agent)} if agent.isdigit() else {"email": agent}
+        try:
+            agent_id = User.objects.filter(**lookup).values_list("pk", flat=True).get()
+        except User.DoesNotExist:
+            raise CommandError(f"No user matches {agent!r}.")
+
+        file_format = detect_format(options["path"], options["file_format"])
+        if file_format is None:
+            raise CommandError("Can't tell the format from the file name, pass --format.")
+
+        with open(options["path"], "rb") as fh:
+            report = import_talents(
+                agent_id, fh, file_format, batch_size=options["batch_size"], dry_run=options["dry_run"]
+            )
+
+        for error in report["errors"]:
+            self.stderr.write(json.dumps(error))
+        self.stdout.write(
+            f"created={report['created']} failed={report['failed']}"
+            + (" (errors truncated)" if report["errors_truncated"] else "")
+        )
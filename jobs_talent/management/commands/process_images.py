@@ -0,0 +1,49 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from account.models import UserAuth
+from core.images import IMAGE_PROCESS_WORKERS, process_pending
+from jobs_talent.models import TalentImage
+
+# (model, image field, variants field, status field)
+IMAGE_SOURCES = (
+    (TalentImage, "image", "variants", "variants_status"),
+    (UserAuth, "profile_pic", "profile_pic_variants", "profile_pic_status"),
+)
+
+
+class Command(BaseCommand):
+    help = "Build resized WebP/AVIF variants (EXIF stripped) for pending talent images and profile pictures."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=20)
+        parser.add_argument("--workers", type=int, default=IMAGE_PROCESS_WORKERS, help="Encoder processes.")
+        parser.add_argument("--interval", type=float, default=2.0, help="Idle poll interval in seconds.")
+        parser.add_argument("--once", action="store_true", help="Process pending images once and exit.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        interval = options["interval"]
+
+        with ProcessPoolExecutor(max_workers=options["workers"]) as executor:
+            while True:
+                close_old_connections()
+                busy = False
+                for model, image_field, variants_field, status_field in IMAGE_SOURCES:
+                    counts = process_pending(model, image_field, variants_field, status_field, executor, batch_size)
+                    if counts["claimed"]:
+                        busy = True
+                        self.stdout.write(
+                            "{model} claimed={claimed} ready={ready} failed={failed}".format(
+                                model=model._meta.label, **counts
+                            )
+                        )
+                if busy:
+                    continue
+
+                if options["once"]:
+                    return
+                time.sleep(interval)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from jobs_talent.counters import flush_buffered_counters, reconcile_job_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute Job applicants/shortlisted/selftapes counters from JobEvent and fix drifted rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("job_ids", nargs="*", type=int, help="Limit to these jobs (default: all).")
+
+    def handle(self, *args, **options):
+        # apply buffered increments first so they aren't mistaken for drift
+        while flush_buffered_counters():
+            pass
+        corrected = reconcile_job_counters(options["job_ids"] or None)
+        self.stdout.write(f"corrected={corrected}")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from jobs_talent.dashboard import refresh_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild DashboardSummary rows from Talent/Job and age out the recent counts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("user_ids", nargs="*", type=int, help="Limit to these users (default: all).")
+
+    def handle(self, *args, **options):
+        changed = refresh_summaries(options["user_ids"] or None)
+        self.stdout.write(f"refreshed={changed}")
@@ -0,0 +1,191 @@
+# jobs_talent/matching.py
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Job
+from .talent_index import (
+    NUMERIC_ATTRS,
+    TalentFilters,
+    filter_talents_sql,
+    normalize_location,
+    np,
+    talent_index,
+    talent_version,
+)
+
+MATCHING_CACHE_TTL = getattr(settings, "MATCHING_CACHE_TTL", 10 * 60)
+MATCHING_MAX_RESULTS = 100
+
+# A measurement `scale` cm outside the wanted range costs `weight` points
+# (quadratic beyond that); a missing measurement costs MISSING_PENALTY * weight.
+MEASUREMENT_SCALES = {"height": 5.0, "bust": 3.0, "waist": 3.0, "hips": 3.0, "shoe_size": 1.0}
+MEASUREMENT_WEIGHTS = {"height": 3.0, "bust": 1.0, "waist": 1.5, "hips": 1.0, "shoe_size": 0.5}
+MISSING_PENALTY = 1.0
+
+# A categorical match earns `weight` points.
+CATEGORY_WEIGHTS = {
+    "gender": 5.0,
+    "eye_color": 1.0,
+    "hair_type": 0.5,
+    "hair_color": 1.0,
+    "skin_color": 1.0,
+}
+
+# Location proximity: same city/location > same country > same continent.
+LOCATION_WEIGHT = 2.0
+COUNTRY_PROXIMITY = 0.6
+CONTINENT_PROXIMITY = 0.3
+
+
+@dataclass
+class JobFeatures:
+    ranges: Dict[str, Tuple[Optional[float], Optional[float]]] = field(default_factory=dict)
+    categories: Dict[str, List[str]] = field(default_factory=dict)
+    location: str = ""
+    countries: List[str] = field(default_factory=list)
+    continents: List[str] = field(default_factory=list)
+
+
+def _as_bound(value: Any) -> Optional[float]:
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_list(value: Any) -> List[str]:
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, (list, tuple)):
+        return []
+    return [str(item) for item in value if item not in (None, "")]
+
+
+def job_features(job: Job) -> JobFeatures:
+    """
+    Read the job's casting brief into scoring features. Unknown keys and
+    malformed values are ignored, so a half-filled brief still ranks.
+    """
+    requirements = job.requirements if isinstance(job.requirements, dict) else {}
+    features = JobFeatures(location=normalize_location(job.location))
+
+    for attr in NUMERIC_ATTRS:
+        bounds = requirements.get(attr)
+        if isinstance(bounds, (list, tuple)) and len(bounds) == 2:
+            low, high = _as_bound(bounds[0]), _as_bound(bounds[1])
+            if low is not None or high is not None:
+                features.ranges[attr] = (low, high)
+
+    for attr in CATEGORY_WEIGHTS:
+        values = _as_list(requirements.get(attr))
+        if values:
+            features.categories[attr] = values
+
+    features.countries = _as_list(requirements.get("country"))
+    features.continents = _as_list(requirements.get("continent"))
+    return features
+
+
+def score_talents(snapshot, features: JobFeatures):
+    """
+    Score every talent in the snapshot against `features` in one vectorised
+    pass. Unavailable talents score -inf.
+    """
+    scores = np.zeros(snapshot.size, dtype=np.float32)
+
+    for attr, (low, high) in features.ranges.items():
+        column = snapshot.numeric[attr]
+        distance = np.zeros(snapshot.size, dtype=np.float32)
+        if low is not None:
+            distance = np.maximum(distance, np.float32(low) - column)
+        if high is not None:
+            distance = np.maximum(distance, column - np.float32(high))
+        distance /= np.float32(MEASUREMENT_SCALES[attr])
+        penalty = np.where(np.isnan(column), np.float32(MISSING_PENALTY), distance * distance)
+        scores -= np.float32(MEASUREMENT_WEIGHTS[attr]) * penalty
+
+    for attr, values in features.categories.items():
+        scores += np.float32(CATEGORY_WEIGHTS[attr]) * snapshot.bitmap(attr, values)
+
+    proximity = np.zeros(snapshot.size, dtype=np.float32)
+    if features.continents:
+        proximity = np.maximum(proximity, CONTINENT_PROXIMITY * snapshot.bitmap("continent", features.continents))
+    if features.countries:
+        proximity = np.maximum(proximity, COUNTRY_PROXIMITY * snapshot.bitmap("country", features.countries))
+    code = snapshot.location_vocab.get(features.location) if features.location else None
+    if code is not None:
+        proximity = np.maximum(proximity, snapshot.location_codes == code)
+    scores += np.float32(LOCATION_WEIGHT) * proximity
+
+    scores[~snapshot.available] = -np.inf
+    return scores
+
+
+def top_k(scores, ids, k: int) -> List[Tuple[int, float]]:
+    """Best `k` (talent_id, score) pairs, best first; equal scores go to the higher talent_id."""
+    candidates = np.flatnonzero(np.isfinite(scores))
+    if k <= 0 or candidates.size == 0:
+        return []
+    if candidates.size > k:
+        # O(n) selection of the k-th best score; everything tied with it stays
+        # in, so the tie-break below decides who makes the cut, not argpartition
+        kth = np.partition(scores[candidates], candidates.size - k)[candidates.size - k]
+        candidates = candidates[scores[candidates] >= kth]
+    order = np.lexsort((-ids[candidates], -scores[candidates]))[:k]
+    candidates = candidates[order]
+    return [(int(ids[i]), round(float(scores[i]), 4)) for i in candidates]
+
+
+def rank_talents(job: Job, k: int, snapshot=None) -> Optional[List[Tuple[int, float]]]:
+    """Top-k talents for `job`, or None when the snapshot isn't available."""
+    snapshot = snapshot or talent_index.get_snapshot()
+    if snapshot is None:
+        return None
+    return top_k(score_talents(snapshot, job_features(job)), snapshot.ids, k)
+
+
+def fallback_matches(job: Job, k: int) -> List[Tuple[int, Optional[float]]]:
+    """
+    Without the snapshot there is no ranking: treat the brief as a hard SQL
+    filter and return the newest available talents that meet it, unscored.
+    """
+    features = job_features(job)
+    categories = dict(features.categories)
+    if features.countries:
+        categories["country"] = features.countries
+    filters = TalentFilters(ranges=features.ranges, categories=categories, is_available=True)
+    ids = filter_talents_sql(filters).order_by("-created_at", "-talent_id").values_list("talent_id", flat=True)[:k]
+    return [(talent_id, None) for talent_id in ids]
+
+
+# ----------------------------
+# Cache
+# ----------------------------
+def get_job_matches(job: Job, k: int) -> List[Tuple[int, Optional[float]]]:
+    """
+    Cached top-k for `job`; the full MATCHING_MAX_RESULTS are cached once and sliced.
+
+    Job edits change updated_at and talent edits bump the talent version, so
+    either one moves the cache key. A ranking computed from a snapshot older
+    than the current version is served but not cached.
+    """
+    version = talent_version()
+    key = f"matching:job:{job.job_id}:{job.updated_at.timestamp()}:v{version}"
+    matches = cache.get(key)
+    if matches is not None:
+        return matches[:k]
+
+    snapshot = talent_index.get_snapshot()
+    if snapshot is None:
+        return fallback_matches(job, k)
+    matches = rank_talents(job, MATCHING_MAX_RESULTS, snapshot)
+    if snapshot.version == version:
+        cache.set(key, matches, timeout=MATCHING_CACHE_TTL)
+    return matches[:k]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.9 on 2026-10-17 21:44
+
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+
+
+# Postgres only: must stay in sync with jobs_talent.search.job_search_vector()
+def _search_index():
+    return GinIndex(
+        SearchVector("title", "description", config="english"),
+        name="job_search_vector_gin",
+    )
+
+
+def add_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.add_index(apps.get_model("jobs_talent", "Job"), _search_index())
+
+
+def remove_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.remove_index(apps.get_model("jobs_talent", "Job"), _search_index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs_talent', '0002_talent_talentimage_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['status', '-created_at', '-job_id'], name='job_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['status', 'job_type', '-created_at'], name='job_status_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['status', 'location'], name='job_status_location_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['status', 'budget_min', 'budget_max'], name='job_status_budget_idx'),
+        ),
+        migrations.RunPython(add_search_index, remove_search_index),
+    ]
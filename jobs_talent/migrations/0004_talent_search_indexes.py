@@ -0,0 +1,27 @@
+# Generated by Django 5.2.9 on 2026-10-17 21:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs_talent', '0003_job_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='talent',
+            index=models.Index(fields=['is_available', 'gender', 'height'], name='talent_avail_gender_ht_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='talent',
+            index=models.Index(fields=['is_available', 'available_date'], name='talent_avail_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='talent',
+            index=models.Index(fields=['country', 'gender', 'height'], name='talent_country_gender_idx'),
+        ),
+    ]
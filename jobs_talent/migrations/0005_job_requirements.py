@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-17 21:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs_talent', '0004_talent_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='requirements',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.9 on 2026-10-17 21:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs_talent', '0005_job_requirements'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobEvent',
+            fields=[
+                ('event_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('applied', 'Applied'), ('shortlisted', 'Shortlisted'), ('selftape', 'Self-tape')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='job_events', to=settings.AUTH_USER_MODEL)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='jobs_talent.job')),
+                ('talent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_events', to='jobs_talent.talent')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['job', 'kind'], name='job_event_job_kind_idx')],
+                'constraints': [models.UniqueConstraint(fields=('job', 'talent', 'kind'), name='unique_job_talent_event')],
+            },
+        ),
+    ]
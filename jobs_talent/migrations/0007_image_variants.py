@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-17 21:52
+
+import account.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs_talent', '0006_jobevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='talentimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='talentimage',
+            name='variants_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='talentimage',
+            name='image',
+            field=models.ImageField(upload_to='talents/images/', validators=[account.utils.validate_image]),
+        ),
+        migrations.AddIndex(
+            model_name='talentimage',
+            index=models.Index(fields=['variants_status'], name='talent_image_variants_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.9 on 2026-10-17 21:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0008_image_variants'),
+        ('jobs_talent', '0007_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='dashboard_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('talents_total', models.IntegerField(default=0)),
+                ('talents_available', models.IntegerField(default=0)),
+                ('talents_recent', models.IntegerField(default=0)),
+                ('jobs_created_draft', models.IntegerField(default=0)),
+                ('jobs_created_active', models.IntegerField(default=0)),
+                ('jobs_created_paused', models.IntegerField(default=0)),
+                ('jobs_created_closed', models.IntegerField(default=0)),
+                ('jobs_created_archived', models.IntegerField(default=0)),
+                ('jobs_created_recent', models.IntegerField(default=0)),
+                ('jobs_assigned_draft', models.IntegerField(default=0)),
+                ('jobs_assigned_active', models.IntegerField(default=0)),
+                ('jobs_assigned_paused', models.IntegerField(default=0)),
+                ('jobs_assigned_closed', models.IntegerField(default=0)),
+                ('jobs_assigned_archived', models.IntegerField(default=0)),
+                ('jobs_assigned_recent', models.IntegerField(default=0)),
+                ('last_activity_at', models.DateTimeField(blank=True, null=True)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
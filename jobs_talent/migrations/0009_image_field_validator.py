@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-17 22:39
+
+import account.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs_talent', '0008_dashboard_summary'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='talentimage',
+            name='image',
+            field=models.ImageField(upload_to='talents/images/', validators=[account.utils.validate_image_field]),
+        ),
+    ]
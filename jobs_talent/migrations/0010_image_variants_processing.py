@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-17 22:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs_talent', '0009_image_field_validator'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='talentimage',
+            name='variants_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+    ]
@@ -6,6 +6,8 @@ from django.db import models, transaction
 from django.db.models import Q
 from django.utils import timezone
 
+from account.utils import validate_image_field
+from core.images import VariantStatus
 
 User = get_user_model()
 
@@ -47,6 +49,10 @@ class Job(models.Model):
     # If you want AI prompt tracking
     ai_prompt = models.TextField(blank=True)
 
+    # Casting brief used for talent matching (jobs_talent/matching.py), e.g.
+    # {"height": [170, 180], "waist": [null, 65], "gender": ["female"], "country": ["FR"]}
+    requirements = models.JSONField(default=dict, blank=True)
+
     # Counters are optional; you can also compute them.
     applicants_count = models.PositiveIntegerField(default=0)
     shortlisted_count = models.PositiveIntegerField(default=0)
@@ -62,6 +68,12 @@ class Job(models.Model):
             models.Index(fields=["job_created_by"]),
             models.Index(fields=["job_assigned_to"]),
             models.Index(fields=["created_at"]),
+            # search: every filter is combined with status and the (-created_at, -job_id) keyset
+            models.Index(fields=["status", "-created_at", "-job_id"], name="job_status_created_idx"),
+            models.Index(fields=["status", "job_type", "-created_at"], name="job_status_type_idx"),
+            models.Index(fields=["status", "location"], name="job_status_location_idx"),
+            models.Index(fields=["status", "budget_min", "budget_max"], name="job_status_budget_idx"),
+            # full-text GIN index is Postgres-only, see migration 0003_job_search_indexes
         ]
 
     def __str__(self):
@@ -125,6 +137,10 @@ class Talent(models.Model):
             models.Index(fields=["is_available"]),
             models.Index(fields=["country"]),
             models.Index(fields=["gender"]),
+            # SQL fallback of talent search (talent_index.filter_talents_sql)
+            models.Index(fields=["is_available", "gender", "height"], name="talent_avail_gender_ht_idx"),
+            models.Index(fields=["is_available", "available_date"], name="talent_avail_date_idx"),
+            models.Index(fields=["country", "gender", "height"], name="talent_country_gender_idx"),
         ]
 
     def __str__(self):
@@ -141,10 +157,15 @@ class TalentImage(models.Model):
         related_name="images",
     )
 
-    image = models.ImageField(upload_to="talents/images/")
+    image = models.ImageField(upload_to="talents/images/", validators=[validate_image_field])
     is_primary = models.BooleanField(default=False)
     sort_order = models.PositiveIntegerField(default=0)
 
+    # resized WebP/AVIF copies built off the request path (manage.py process_images);
+    # {"source", "width", "height", "items": [{"name", "width", "height", "format", "bytes"}]}
+    variants = models.JSONField(default=dict, blank=True)
+    variants_status = models.CharField(max_length=10, choices=VariantStatus.choices, default=VariantStatus.PENDING)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -152,6 +173,7 @@ class TalentImage(models.Model):
         indexes = [
             models.Index(fields=["talent", "is_primary"]),
             models.Index(fields=["talent", "sort_order"]),
+            models.Index(fields=["variants_status"], name="talent_image_variants_idx"),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -171,20 +193,20 @@ class TalentImage(models.Model):
 
     def save(self, *args, **kwargs):
         """
-        - If it's the first image for this talent, auto-make it primary.
+        - If the talent has no primary image yet, a new image becomes primary.
         - If saving with is_primary=True, unset previous primary safely.
+
+        Image writes for one talent are serialised on the parent Talent row, so
+        concurrent uploads can't both claim (or both miss) the primary slot.
         """
         with transaction.atomic():
-            is_new = self.pk is None
+            lock_talent(self.talent_id)
 
-            # auto-primary for first image
-            if is_new and not TalentImage.objects.filter(talent=self.talent).exists():
-                self.is_primary = True
-
-            # if setting primary, unset others
-            if self.is_primary:
+            if self.pk is None and not self.is_primary:
+                self.is_primary = not TalentImage.objects.filter(talent_id=self.talent_id, is_primary=True).exists()
+            elif self.is_primary:
                 TalentImage.objects.filter(
-                    talent=self.talent,
+                    talent_id=self.talent_id,
                     is_primary=True
                 ).exclude(pk=self.pk).update(is_primary=False)
 
@@ -192,6 +214,88 @@ class TalentImage(models.Model):
 
     def set_as_primary(self):
         with transaction.atomic():
-            TalentImage.objects.filter(talent=self.talent, is_primary=True).exclude(pk=self.pk).update(is_primary=False)
+            lock_talent(self.talent_id)
+            TalentImage.objects.filter(talent_id=self.talent_id, is_primary=True).exclude(pk=self.pk).update(is_primary=False)
+            TalentImage.objects.filter(pk=self.pk).update(is_primary=True)
             self.is_primary = True
-            self.save(update_fields=["is_primary"])
\ No newline at end of file
+
+
+def lock_talent(talent_id):
+    """
+    SELECT ... FOR UPDATE on the talent row; every primary/sort_order change
+    for its images takes this lock first. Must run inside transaction.atomic().
+    Returns None if the talent doesn't exist.
+    """
+    return Talent.objects.select_for_update().filter(pk=talent_id).values_list("pk", flat=True).first()
+
+
+#job pipeline events (application / shortlist / self-tape); they drive Job's *_count columns
+class JobEvent(models.Model):
+    class Kind(models.TextChoices):
+        APPLIED = "applied", "Applied"
+        SHORTLISTED = "shortlisted", "Shortlisted"
+        SELFTAPE = "selftape", "Self-tape"
+
+    event_id = models.BigAutoField(primary_key=True)
+
+    job = models.ForeignKey("Job", on_delete=models.CASCADE, related_name="events")
+    talent = models.ForeignKey("Talent", on_delete=models.CASCADE, related_name="job_events")
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name="job_events",
+        null=True, blank=True,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(fields=["job", "talent", "kind"], name="unique_job_talent_event"),
+        ]
+        indexes = [
+            # reconciliation: GROUP BY job, kind
+            models.Index(fields=["job", "kind"], name="job_event_job_kind_idx"),
+        ]
+
+    def __str__(self):
+        return f"JobEvent(job={self.job_id}, talent={self.talent_id}, kind={self.kind})"
+
+
+#per-user dashboard rollups (jobs_talent/dashboard.py); kept current by signals, reconciled by `manage.py refresh_dashboards`
+class DashboardSummary(models.Model):
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="dashboard_summary",
+    )
+
+    # agent: talents they added ("recent" = created in the last DASHBOARD_RECENT_DAYS)
+    talents_total = models.IntegerField(default=0)
+    talents_available = models.IntegerField(default=0)
+    talents_recent = models.IntegerField(default=0)
+
+    # client: jobs they created, by status
+    jobs_created_draft = models.IntegerField(default=0)
+    jobs_created_active = models.IntegerField(default=0)
+    jobs_created_paused = models.IntegerField(default=0)
+    jobs_created_closed = models.IntegerField(default=0)
+    jobs_created_archived = models.IntegerField(default=0)
+    jobs_created_recent = models.IntegerField(default=0)
+
+    # agent: jobs assigned to them, by status
+    jobs_assigned_draft = models.IntegerField(default=0)
+    jobs_assigned_active = models.IntegerField(default=0)
+    jobs_assigned_paused = models.IntegerField(default=0)
+    jobs_assigned_closed = models.IntegerField(default=0)
+    jobs_assigned_archived = models.IntegerField(default=0)
+    jobs_assigned_recent = models.IntegerField(default=0)
+
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"DashboardSummary(user={self.user_id})"
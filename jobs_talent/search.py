@@ -0,0 +1,129 @@
+# jobs_talent/search.py
+from __future__ import annotations
+
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import connection
+from django.db.models import Count, Q, QuerySet
+
+from .models import Job
+
+JOB_ORDERING = ("-created_at", "-job_id")
+JOB_LIST_FIELDS = (
+    "job_id",
+    "job_created_by_id",
+    "title",
+    "description",
+    "location",
+    "budget_min",
+    "budget_max",
+    "job_type",
+    "status",
+    "applicants_count",
+    "shortlisted_count",
+    "selftapes_count",
+    "created_at",
+)
+
+# Statuses searched when the caller doesn't ask for any.
+DEFAULT_SEARCH_STATUSES = (Job.Status.ACTIVE,)
+
+SEARCH_CONFIG = "english"
+SEARCH_INDEX_NAME = "job_search_vector_gin"
+
+
+def job_search_vector() -> SearchVector:
+    """
+    The tsvector the GIN index is built on. Queries must use this exact
+    expression, otherwise Postgres won't match them to the index.
+    """
+    return SearchVector("title", "description", config=SEARCH_CONFIG)
+
+
+def supports_full_text() -> bool:
+    return connection.vendor == "postgresql"
+
+
+def visible_jobs(user) -> QuerySet:
+    """Drafts are only visible to the client who created them."""
+    return Job.objects.filter(~Q(status=Job.Status.DRAFT) | Q(job_created_by=user))
+
+
+def apply_text_search(queryset: QuerySet, text: str) -> QuerySet:
+    if supports_full_text():
+        return queryset.annotate(search=job_search_vector()).filter(
+            search=SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+        )
+    # dev/sqlite fallback: unindexed substring match
+    return queryset.filter(Q(title__icontains=text) | Q(description__icontains=text))
+
+
+def apply_budget_overlap(queryset: QuerySet, budget_min=None, budget_max=None) -> QuerySet:
+    """
+    Keep jobs whose [budget_min, budget_max] overlaps the requested range.
+    An empty bound on the job side is open-ended.
+    """
+    if budget_min is not None:
+        queryset = queryset.filter(Q(budget_max__gte=budget_min) | Q(budget_max__isnull=True))
+    if budget_max is not None:
+        queryset = queryset.filter(Q(budget_min__lte=budget_max) | Q(budget_min__isnull=True))
+    return queryset
+
+
+def filter_jobs(
+    user,
+    text: str = "",
+    statuses: Sequence[str] = (),
+    job_types: Sequence[str] = (),
+    location: str = "",
+    budget_min=None,
+    budget_max=None,
+) -> Dict[str, QuerySet]:
+    """
+    Build the search querysets.
+
+    Returns {"results": fully filtered, "facets": same filters minus status and
+    job_type}, so facet counts can show the alternatives to the current choice.
+    """
+    queryset = visible_jobs(user)
+    if text:
+        queryset = apply_text_search(queryset, text)
+    if location:
+        queryset = queryset.filter(location=location)
+    queryset = apply_budget_overlap(queryset, budget_min, budget_max)
+
+    facets = queryset
+    results = queryset.filter(status__in=statuses or DEFAULT_SEARCH_STATUSES)
+    if job_types:
+        results = results.filter(job_type__in=job_types)
+    return {"results": results, "facets": facets}
+
+
+def facet_rows_queryset(queryset: QuerySet) -> QuerySet:
+    # one GROUP BY over both facet columns; folded into per-facet counts in Python
+    return queryset.values("status", "job_type").annotate(total=Count("job_id")).order_by()
+
+
+def fold_facets(
+    rows: Iterable[Dict[str, Any]],
+    statuses: Sequence[str] = (),
+    job_types: Sequence[str] = (),
+) -> Dict[str, Dict[str, int]]:
+    """
+    Each facet counts against the other facet's selection only, e.g. the
+    status counts honour ?job_type but not ?status.
+    """
+    selected_statuses = set(statuses or DEFAULT_SEARCH_STATUSES)
+    selected_types: Optional[set] = set(job_types) if job_types else None
+
+    status_counts: Counter = Counter()
+    type_counts: Counter = Counter()
+    for row in rows:
+        if selected_types is None or row["job_type"] in selected_types:
+            status_counts[row["status"]] += row["total"]
+        if row["status"] in selected_statuses:
+            type_counts[row["job_type"]] += row["total"]
+
+    return {"status": dict(status_counts), "job_type": dict(type_counts)}
@@ -0,0 +1,250 @@
+from rest_framework import serializers
+
+from account.utils import validate_image
+from core.images import variant_urls
+from core.streaming import detect_format
+from .models import Job, JobEvent, Talent, TalentImage
+from .talent_images import MAX_IMAGES_PER_UPLOAD
+from .talent_index import TalentFilters
+
+
+class CommaSeparatedField(serializers.CharField):
+    """
+    `?status=active,paused` -> ["active", "paused"]
+
+    With `model_field`, each value is checked against the column it filters:
+    one of its choices if it has any, else no longer than its max_length, so
+    a value that can never match is a 400 instead of an empty page.
+    """
+
+    default_error_messages = {
+        "invalid_choice": "Unknown value: {values}",
+        "too_long": "Values can be at most {max_length} characters: {values}",
+    }
+
+    def __init__(self, model_field=None, **kwargs):
+        self.model_field = model_field
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        value = super().to_internal_value(data)
+        items = [item.strip() for item in value.split(",") if item.strip()]
+        field = self.model_field
+        if field is None:
+            return items
+        if field.choices:
+            allowed = {str(choice) for choice, _ in field.flatchoices}
+            invalid = sorted(set(items) - allowed)
+            if invalid:
+                self.fail("invalid_choice", values=", ".join(invalid))
+        elif field.max_length:
+            too_long = sorted({item for item in items if len(item) > field.max_length})
+            if too_long:
+                self.fail("too_long", max_length=field.max_length, values=", ".join(too_long))
+        return items
+
+
+class JobSearchParamsSerializer(serializers.Serializer):
+    q = serializers.CharField(required=False, allow_blank=True, max_length=200)
+    status = CommaSeparatedField(model_field=Job._meta.get_field("status"), required=False)
+    job_type = CommaSeparatedField(model_field=Job._meta.get_field("job_type"), required=False)
+    location = serializers.CharField(required=False, allow_blank=True, max_length=255)
+    budget_min = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    budget_max = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+
+    def validate(self, attrs):
+        budget_min = attrs.get("budget_min")
+        budget_max = attrs.get("budget_max")
+        if budget_min is not None and budget_max is not None and budget_min > budget_max:
+            raise serializers.ValidationError("budget_min cannot be greater than budget_max")
+        return attrs
+
+
+class JobListSerializer(serializers.ModelSerializer):
+    job_created_by = serializers.IntegerField(source="job_created_by_id", read_only=True)
+
+    class Meta:
+        model = Job
+        fields = [
+            'job_id', 'job_created_by', 'title', 'description', 'location',
+            'budget_min', 'budget_max', 'job_type', 'status',
+            'applicants_count', 'shortlisted_count', 'selftapes_count', 'created_at',
+        ]
+        read_only_fields = fields
+
+
+class TalentSearchParamsSerializer(serializers.Serializer):
+    """`?height_min=170&height_max=180&waist_max=64.99&country=FR,IT&available_from=2026-07-01`"""
+
+    height_min = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    height_max = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    bust_min = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    bust_max = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    waist_min = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    waist_max = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    hips_min = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    hips_max = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    shoe_size_min = serializers.IntegerField(min_value=0, required=False)
+    shoe_size_max = serializers.IntegerField(min_value=0, required=False)
+    available_from = serializers.DateField(required=False)
+    available_to = serializers.DateField(required=False)
+    is_available = serializers.BooleanField(required=False, allow_null=True, default=None)
+
+    gender = CommaSeparatedField(model_field=Talent._meta.get_field("gender"), required=False)
+    eye_color = CommaSeparatedField(model_field=Talent._meta.get_field("eye_color"), required=False)
+    hair_type = CommaSeparatedField(model_field=Talent._meta.get_field("hair_type"), required=False)
+    hair_color = CommaSeparatedField(model_field=Talent._meta.get_field("hair_color"), required=False)
+    skin_color = CommaSeparatedField(model_field=Talent._meta.get_field("skin_color"), required=False)
+    country = CommaSeparatedField(model_field=Talent._meta.get_field("country"), required=False)
+    continent = CommaSeparatedField(model_field=Talent._meta.get_field("continent"), required=False)
+
+    range_fields = {
+        "height": ("height_min", "height_max"),
+        "bust": ("bust_min", "bust_max"),
+        "waist": ("waist_min", "waist_max"),
+        "hips": ("hips_min", "hips_max"),
+        "shoe_size": ("shoe_size_min", "shoe_size_max"),
+        "available_date": ("available_from", "available_to"),
+    }
+    category_fields = ("gender", "eye_color", "hair_type", "hair_color", "skin_color", "country", "continent")
+
+    def validate(self, attrs):
+        for attr, (low_name, high_name) in self.range_fields.items():
+            low, high = attrs.get(low_name), attrs.get(high_name)
+            if low is not None and high is not None and low > high:
+                raise serializers.ValidationError(f"{low_name} cannot be greater than {high_name}")
+        return attrs
+
+    def to_filters(self):
+        data = self.validated_data
+        ranges = {}
+        for attr, (low_name, high_name) in self.range_fields.items():
+            low, high = data.get(low_name), data.get(high_name)
+            if low is not None or high is not None:
+                ranges[attr] = (low, high)
+        categories = {attr: data[attr] for attr in self.category_fields if data.get(attr)}
+        return TalentFilters(ranges=ranges, categories=categories, is_available=data.get("is_available"))
+
+
+class TalentListSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Talent
+        fields = [
+            'talent_id', 'name', 'role', 'gender', 'height', 'bust', 'waist', 'hips', 'shoe_size',
+            'eye_color', 'hair_type', 'hair_color', 'skin_color',
+            'location', 'continent', 'country', 'is_available', 'available_date', 'created_at',
+        ]
+        read_only_fields = fields
+
+
+class JobEventSerializer(serializers.ModelSerializer):
+    talent = serializers.IntegerField(source="talent_id")
+
+    class Meta:
+        model = JobEvent
+        fields = ['event_id', 'job', 'talent', 'kind', 'created_at']
+        read_only_fields = ['event_id', 'job', 'created_at']
+        validators = []  # uniqueness is enforced by the DB constraint, no pre-check query
+
+
+class TalentImageSerializer(serializers.ModelSerializer):
+    url = serializers.SerializerMethodField()
+    variants = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TalentImage
+        fields = ['image_id', 'url', 'is_primary', 'sort_order', 'variants_status', 'variants', 'created_at']
+        read_only_fields = fields
+
+    def get_url(self, obj):
+        request = self.context.get("request")
+        url = obj.image.url
+        return request.build_absolute_uri(url) if request else url
+
+    def get_variants(self, obj):
+        return variant_urls(obj.variants, obj.image.storage, self.context.get("request"))
+
+
+class TalentImageUploadSerializer(serializers.Serializer):
+    # FileField, not ImageField: DRF's ImageField fully decodes every upload;
+    # validate_image only reads the header
+    images = serializers.ListField(
+        child=serializers.FileField(), allow_empty=False, max_length=MAX_IMAGES_PER_UPLOAD
+    )
+
+    def validate_images(self, files):
+        for upload in files:
+            try:
+                validate_image(upload)
+            except ValueError as exc:
+                raise serializers.ValidationError(f"{upload.name}: {exc}")
+        return files
+
+
+class TalentImageOrderSerializer(serializers.Serializer):
+    image_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
+
+
+class TalentImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(choices=["csv", "ndjson", "jsonl"], required=False)
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        attrs["file_format"] = detect_format(attrs["file"].name, attrs.get("file_format"))
+        if attrs["file_format"] is None:
+            raise serializers.ValidationError({"file_format": "Use a .csv or .jsonl file, or set file_format."})
+        return attrs
+
+
+class TalentCardSerializer:
+    """
+    Plain-dict serializer for the talent grid. Rows come from
+    `with_primary_image()` over .values(), so no model instances are built
+    and no field machinery runs per row.
+    """
+
+    __slots__ = ("request", "storage")
+
+    fields = (
+        "talent_id", "name", "role", "gender", "height", "bust", "waist", "hips", "shoe_size",
+        "location", "country", "is_available", "available_date", "created_at",
+    )
+    _decimal_fields = ("height", "bust", "waist", "hips")
+    _datetime_field = serializers.DateTimeField()
+    _date_field = serializers.DateField()
+
+    def __init__(self, request=None):
+        self.request = request
+        self.storage = TalentImage._meta.get_field("image").storage
+
+    def _url(self, name):
+        url = self.storage.url(name)
+        return self.request.build_absolute_uri(url) if self.request else url
+
+    def to_representation(self, row):
+        data = {name: row[name] for name in self.fields}
+        for name in self._decimal_fields:
+            if data[name] is not None:
+                data[name] = str(data[name])  # same as DRF's DecimalField output
+        data["created_at"] = self._datetime_field.to_representation(data["created_at"])
+        if data["available_date"] is not None:
+            data["available_date"] = self._date_field.to_representation(data["available_date"])
+
+        image = row["primary_image"]
+        data["primary_image"] = None if not image else {
+            "url": self._url(image),
+            "variants": variant_urls(row["primary_image_variants"], self.storage, self.request),
+        }
+        return data
+
+    def many(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+
+class TalentDetailSerializer(TalentListSerializer):
+    images = TalentImageSerializer(many=True, read_only=True)
+
+    class Meta(TalentListSerializer.Meta):
+        fields = TalentListSerializer.Meta.fields + ['dob', 'updated_at', 'images']
+        read_only_fields = fields
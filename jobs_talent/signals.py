@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from core.images import track_image_change
+from .dashboard import record_delete, record_save, remember_state
+from .talent_index import bump_talent_version
+from .models import Job, Talent, TalentImage
+
+
+@receiver(post_save, sender=Talent)
+@receiver(post_delete, sender=Talent)
+def bump_talent_data_version(sender, instance, **kwargs):
+    bump_talent_version()
+
+
+@receiver(pre_save, sender=TalentImage)
+def queue_talent_image_variants(sender, instance, **kwargs):
+    track_image_change(instance, "image", "variants", "variants_status", kwargs.get("update_fields"))
+
+
+# dashboard summaries (jobs_talent/dashboard.py)
+@receiver(post_init, sender=Talent)
+@receiver(post_init, sender=Job)
+def remember_dashboard_state(sender, instance, **kwargs):
+    remember_state(sender, instance)
+
+
+@receiver(post_save, sender=Talent)
+@receiver(post_save, sender=Job)
+def update_dashboard_on_save(sender, instance, created, **kwargs):
+    record_save(sender, instance, created)
+
+
+@receiver(post_delete, sender=Talent)
+@receiver(post_delete, sender=Job)
+def update_dashboard_on_delete(sender, instance, **kwargs):
+    record_delete(sender, instance)
@@ -0,0 +1,140 @@
+# jobs_talent/talent_images.py
+from __future__ import annotations
+
+from typing import List, Optional, Sequence
+
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Q, QuerySet, Subquery
+
+from core.images import delete_image_files
+from .models import TalentImage, lock_talent
+
+# Every operation below runs a fixed number of statements, whatever the number
+# of images: lock the talent row, at most one read, then one write per step.
+
+MAX_IMAGES_PER_UPLOAD = 20
+
+
+class TalentNotFound(Exception):
+    pass
+
+
+def with_primary_image(queryset: QuerySet) -> QuerySet:
+    """
+    Annotate each talent with its primary image's file name and variants.
+    Correlated subqueries on the unique (talent) WHERE is_primary index, so a
+    page of talents and their photos is still one SELECT.
+    """
+    primary = TalentImage.objects.filter(talent_id=OuterRef("pk"), is_primary=True)
+    return queryset.annotate(
+        primary_image=Subquery(primary.values("image")[:1]),
+        primary_image_variants=Subquery(primary.values("variants")[:1]),
+    )
+
+
+def upload_images(talent_id: int, files: Sequence) -> List[TalentImage]:
+    """
+    Append `files` after the talent's existing images in one INSERT. The first
+    one becomes primary if the talent has none.
+    """
+    with transaction.atomic():
+        if lock_talent(talent_id) is None:
+            raise TalentNotFound(talent_id)
+
+        state = TalentImage.objects.filter(talent_id=talent_id).aggregate(
+            primaries=Count("pk", filter=Q(is_primary=True)),
+            last_order=Max("sort_order"),
+        )
+        next_order = -1 if state["last_order"] is None else state["last_order"]
+        images = [
+            TalentImage(
+                talent_id=talent_id,
+                image=upload,
+                is_primary=index == 0 and not state["primaries"],
+                sort_order=next_order + 1 + index,
+            )
+            for index, upload in enumerate(files)
+        ]
+        return TalentImage.objects.bulk_create(images)
+
+
+def reorder_images(talent_id: int, image_ids: Sequence[int]) -> Optional[List[TalentImage]]:
+    """
+    Set sort_order to the position in `image_ids` with a single bulk_update.
+    `image_ids` must list every image of the talent exactly once; returns None
+    otherwise.
+    """
+    with transaction.atomic():
+        if lock_talent(talent_id) is None:
+            raise TalentNotFound(talent_id)
+
+        images = {
+            image.pk: image
+            for image in TalentImage.objects.filter(talent_id=talent_id).only("image_id", "talent_id", "sort_order")
+        }
+        if len(image_ids) != len(set(image_ids)) or set(image_ids) != set(images):
+            return None
+
+        changed = []
+        for position, image_id in enumerate(image_ids):
+            image = images[image_id]
+            if image.sort_order != position:
+                image.sort_order = position
+                changed.append(image)
+        if changed:
+            TalentImage.objects.bulk_update(changed, ["sort_order"])
+        return [images[image_id] for image_id in image_ids]
+
+
+def set_primary(talent_id: int, image_id: int) -> bool:
+    """
+    Make `image_id` the talent's primary image. Clear-then-set keeps the
+    partial unique index satisfied after each statement. Returns False if the
+    image doesn't belong to the talent.
+    """
+    with transaction.atomic():
+        if lock_talent(talent_id) is None:
+            raise TalentNotFound(talent_id)
+
+        if not TalentImage.objects.filter(pk=image_id, talent_id=talent_id).exists():
+            return False
+
+        TalentImage.objects.filter(talent_id=talent_id, is_primary=True).exclude(pk=image_id).update(is_primary=False)
+        TalentImage.objects.filter(pk=image_id).update(is_primary=True)
+        return True
+
+
+def delete_image(talent_id: int, image_id: int) -> bool:
+    """
+    Delete one image and close the gap in sort_order. If it was the primary,
+    the next one by sort_order is promoted in the same transaction so the
+    talent is never left without one.
+    """
+    with transaction.atomic():
+        if lock_talent(talent_id) is None:
+            raise TalentNotFound(talent_id)
+
+        image = (
+            TalentImage.objects.filter(pk=image_id, talent_id=talent_id)
+            .only("image_id", "image", "is_primary", "sort_order", "variants")
+            .first()
+        )
+        if image is None:
+            return False
+        was_primary = image.is_primary
+        image.delete()
+        TalentImage.objects.filter(talent_id=talent_id, sort_order__gt=image.sort_order).update(
+            sort_order=F("sort_order") - 1
+        )
+
+        if was_primary:
+            successor = (
+                TalentImage.objects.filter(talent_id=talent_id)
+                .order_by("sort_order", "-created_at")
+                .values("pk")[:1]
+            )
+            TalentImage.objects.filter(pk=Subquery(successor)).update(is_primary=True)
+
+    # storage I/O only once the row is gone for good
+    transaction.on_commit(lambda: delete_image_files(image.image, image.variants))
+    return True
@@ -0,0 +1,134 @@
+# jobs_talent/talent_import.py
+from __future__ import annotations
+
+from itertools import islice
+from typing import Any, BinaryIO, Dict, List, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from core.streaming import iter_records, parse_bool
+from .dashboard import apply_deltas
+from .models import Talent
+from .talent_index import bump_talent_version
+
+# Uploads are parsed line by line from the (temp) file and inserted in
+# chunks, so memory depends on the chunk size, never on the file size.
+
+TALENT_IMPORT_BATCH_SIZE = getattr(settings, "TALENT_IMPORT_BATCH_SIZE", 1000)
+TALENT_IMPORT_MAX_ERRORS = getattr(settings, "TALENT_IMPORT_MAX_ERRORS", 500)
+
+IMPORT_FIELDS = (
+    "name", "role", "dob", "gender", "height", "bust", "waist", "hips", "shoe_size",
+    "eye_color", "hair_type", "hair_color", "skin_color",
+    "location", "continent", "country", "is_available", "available_date",
+)
+# an export is a valid import: the extra columns are ignored
+EXPORT_FIELDS = ("talent_id", *IMPORT_FIELDS, "created_at")
+
+
+# ----------------------------
+# Validation
+# ----------------------------
+_FIELDS = {name: Talent._meta.get_field(name) for name in IMPORT_FIELDS}
+
+
+def clean_record(record: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, List[str]]]:
+    """
+    Validate one row with the model fields' own clean() (type conversion,
+    max_length, max_digits, choices), without building a serializer per row.
+    Returns (values, errors).
+    """
+    values: Dict[str, Any] = {}
+    errors: Dict[str, List[str]] = {}
+    for name, field in _FIELDS.items():
+        raw = record.get(name)
+        if isinstance(raw, str):
+            raw = raw.strip()
+        if raw in (None, ""):
+            if field.has_default():
+                values[name] = field.get_default()
+            elif not field.blank:
+                errors[name] = ["This field is required."]
+            else:
+                values[name] = None if field.null else ""
+            continue
+        if name == "is_available":
+            raw = parse_bool(raw)
+        elif name == "gender" and isinstance(raw, str):
+            raw = raw.lower()
+        try:
+            values[name] = field.clean(raw, None)
+        except ValidationError as exc:
+            errors[name] = exc.messages
+    return values, errors
+
+
+# ----------------------------
+# Import
+# ----------------------------
+def _insert(agent_id: int, rows: List[Dict[str, Any]], batch_size: int) -> int:
+    """
+    One transaction per chunk. bulk_create sends no signals, so the agent's
+    dashboard row gets one delta per chunk here and import_talents bumps the
+    talent index version once at the end.
+    """
+    talents = [Talent(added_by_agent_id=agent_id, **values) for values in rows]
+    with transaction.atomic():
+        Talent.objects.bulk_create(talents, batch_size=batch_size)
+        apply_deltas(
+            {agent_id: {
+                "talents_total": len(talents),
+                "talents_available": sum(1 for talent in talents if talent.is_available),
+                "talents_recent": len(talents),
+            }},
+            touched=[agent_id],
+        )
+    return len(talents)
+
+
+def import_talents(
+    agent_id: int,
+    fileobj: BinaryIO,
+    file_format: str,
+    batch_size: int = TALENT_IMPORT_BATCH_SIZE,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Stream `fileobj`, validate each chunk of `batch_size` rows and insert the
+    valid ones for `agent_id`. Invalid rows are skipped and reported (up to
+    TALENT_IMPORT_MAX_ERRORS, the rest are only counted). Chunks commit
+    independently, so rows before an interruption stay imported.
+
+    Returns {"created", "failed", "errors": [{"row", "errors"}], "errors_truncated"}.
+    """
+    report: Dict[str, Any] = {"created": 0, "failed": 0, "errors": [], "errors_truncated": False}
+    records = iter_records(fileobj, file_format)
+
+    while True:
+        chunk = list(islice(records, batch_size))
+        if not chunk:
+            break
+
+        valid = []
+        for line_no, record in chunk:
+            if isinstance(record, ValidationError):
+                errors = {"non_field_errors": record.messages}
+            else:
+                values, errors = clean_record(record)
+                if not errors:
+                    valid.append(values)
+                    continue
+            report["failed"] += 1
+            if len(report["errors"]) < TALENT_IMPORT_MAX_ERRORS:
+                report["errors"].append({"row": line_no, "errors": errors})
+            else:
+                report["errors_truncated"] = True
+
+        if valid:
+            report["created"] += len(valid) if dry_run else _insert(agent_id, valid, batch_size)
+
+    if report["created"] and not dry_run:
+        bump_talent_version()
+    return report
@@ -0,0 +1,304 @@
+# jobs_talent/talent_index.py
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import ValidationError
+
+from core.pagination import decode_cursor, encode_cursor
+from .models import Talent
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+logger = logging.getLogger(__name__)
+
+TALENT_INDEX_ENABLED = getattr(settings, "TALENT_INDEX_ENABLED", True)
+TALENT_INDEX_TTL = getattr(settings, "TALENT_INDEX_TTL", 60)
+TALENT_INDEX_CHUNK_SIZE = 5000
+TALENT_VERSION_KEY = "talents:version"
+
+TALENT_ORDERING = ("-created_at", "-talent_id")
+NUMERIC_ATTRS = ("height", "bust", "waist", "hips", "shoe_size")
+DATE_ATTRS = ("available_date",)
+CATEGORICAL_ATTRS = ("gender", "eye_color", "hair_type", "hair_color", "skin_color", "country", "continent")
+SNAPSHOT_FIELDS = ("talent_id", "created_at", "is_available", *NUMERIC_ATTRS, *DATE_ATTRS, *CATEGORICAL_ATTRS, "location")
+
+_EPOCH = date(1970, 1, 1)
+_EPOCH_DT = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_NO_DATE = -(2 ** 31)  # null available_date; below every real day number
+
+
+@dataclass
+class TalentFilters:
+    """
+    ranges:     {"height": (170, 180), "waist": (None, 64.99), "available_date": (date, None)}
+    categories: {"country": ["FR", "IT"], "gender": ["female"]}  (OR within a field, AND across)
+    All bounds are inclusive; a null attribute never matches a range on it.
+    """
+
+    ranges: Dict[str, Tuple[Any, Any]] = field(default_factory=dict)
+    categories: Dict[str, Sequence[str]] = field(default_factory=dict)
+    is_available: Optional[bool] = None
+
+
+# ----------------------------
+# SQL path
+# ----------------------------
+def filter_talents_sql(filters: TalentFilters) -> QuerySet:
+    queryset = Talent.objects.all()
+    for attr, (low, high) in filters.ranges.items():
+        if low is not None:
+            queryset = queryset.filter(**{f"{attr}__gte": low})
+        if high is not None:
+            queryset = queryset.filter(**{f"{attr}__lte": high})
+    for attr, values in filters.categories.items():
+        queryset = queryset.filter(**{f"{attr}__in": list(values)})
+    if filters.is_available is not None:
+        queryset = queryset.filter(is_available=filters.is_available)
+    return queryset
+
+
+def _decode_talent_cursor(cursor: str) -> Tuple[datetime, int]:
+    created_at, talent_id = decode_cursor(cursor, 2)
+    try:
+        created_at, talent_id = datetime.fromisoformat(created_at), int(talent_id)
+    except (TypeError, ValueError):
+        raise ValidationError({"cursor": "Invalid cursor."})
+    if created_at.tzinfo is None:
+        raise ValidationError({"cursor": "Invalid cursor."})
+    return created_at, talent_id
+
+
+def _cursor_q(cursor: str) -> Q:
+    created_at, talent_id = _decode_talent_cursor(cursor)
+    return Q(created_at__lt=created_at) | Q(created_at=created_at, talent_id__lt=talent_id)
+
+
+# ----------------------------
+# Columnar snapshot
+# ----------------------------
+def _day_number(value: Optional[date]) -> int:
+    return _NO_DATE if value is None else (value - _EPOCH).days
+
+
+def _timestamp_us(value: datetime) -> int:
+    return (value - _EPOCH_DT) // timedelta(microseconds=1)
+
+
+def normalize_location(value: Optional[str]) -> str:
+    return " ".join((value or "").lower().split())
+
+
+class TalentSnapshot:
+    """
+    Read-only, array-per-attribute copy of the Talent table.
+
+    Rows are stored in TALENT_ORDERING, so the positions that survive the
+    filters are already in page order. Numeric attributes are float32 (NaN for
+    null), dates are int32 day numbers, categorical attributes are one packed
+    bitmap per distinct value. Free-text location is too high-cardinality for
+    bitmaps, so it is dictionary-encoded into int32 codes instead.
+    """
+
+    def __init__(self, rows: List[Tuple], version: int = 0) -> None:
+        size = len(rows)
+        self.size = size
+        self.version = version
+        self.built_at = time.monotonic()
+
+        columns = list(zip(*rows)) if rows else [()] * len(SNAPSHOT_FIELDS)
+        it = iter(columns)
+        self.ids = np.fromiter(next(it), dtype=np.int64, count=size)
+        self.created_us = np.fromiter((_timestamp_us(v) for v in next(it)), dtype=np.int64, count=size)
+        self.available = np.fromiter(next(it), dtype=np.bool_, count=size)
+
+        self.numeric = {
+            attr: np.array([np.nan if v is None else float(v) for v in next(it)], dtype=np.float32)
+            for attr in NUMERIC_ATTRS
+        }
+        self.dates = {
+            attr: np.fromiter((_day_number(v) for v in next(it)), dtype=np.int32, count=size)
+            for attr in DATE_ATTRS
+        }
+        self.bitmaps: Dict[str, Dict[str, Any]] = {}
+        for attr in CATEGORICAL_ATTRS:
+            values = np.array(next(it), dtype=object)
+            self.bitmaps[attr] = {
+                value: np.packbits(values == value)
+                for value in set(values.tolist())
+                if value
+            }
+
+        self.location_vocab: Dict[str, int] = {}
+        self.location_codes = np.fromiter(
+            (self.location_vocab.setdefault(normalize_location(v), len(self.location_vocab)) for v in next(it)),
+            dtype=np.int32,
+            count=size,
+        )
+
+    @classmethod
+    def build(cls) -> "TalentSnapshot":
+        version = talent_version()  # read first: a concurrent edit then looks newer than us
+        rows = list(
+            Talent.objects.order_by(*TALENT_ORDERING)
+            .values_list(*SNAPSHOT_FIELDS)
+            .iterator(chunk_size=TALENT_INDEX_CHUNK_SIZE)
+        )
+        return cls(rows, version)
+
+    def bitmap(self, attr: str, values: Sequence[str]):
+        packed = None
+        for value in values:
+            bitmap = self.bitmaps[attr].get(value)
+            if bitmap is not None:
+                packed = bitmap if packed is None else packed | bitmap
+        if packed is None:
+            return np.zeros(self.size, dtype=np.bool_)
+        return np.unpackbits(packed, count=self.size).view(np.bool_)
+
+    def mask(self, filters: TalentFilters):
+        mask = np.ones(self.size, dtype=np.bool_)
+        for attr, (low, high) in filters.ranges.items():
+            if attr in self.numeric:
+                column = self.numeric[attr]
+                low = None if low is None else np.float32(low)
+                high = None if high is None else np.float32(high)
+            else:
+                column = self.dates[attr]
+                low = None if low is None else _day_number(low)
+                high = None if high is None else _day_number(high)
+                if high is not None:  # nulls are stored below every date
+                    mask &= column != _NO_DATE
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+        for attr, values in filters.categories.items():
+            mask &= self.bitmap(attr, values)
+        if filters.is_available is not None:
+            mask &= self.available == filters.is_available
+        return mask
+
+    def search(self, filters: TalentFilters, cursor: Optional[str], limit: int) -> List[int]:
+        """Ids of up to `limit` matching talents after `cursor`, in TALENT_ORDERING."""
+        mask = self.mask(filters)
+        if cursor:
+            created_at, talent_id = _decode_talent_cursor(cursor)
+            created_us = _timestamp_us(created_at)
+            mask &= (self.created_us < created_us) | ((self.created_us == created_us) & (self.ids < talent_id))
+        positions = np.flatnonzero(mask)[:limit]
+        return self.ids[positions].tolist()
+
+
+def talent_version() -> int:
+    return cache.get_or_set(TALENT_VERSION_KEY, 1, timeout=None)
+
+
+def bump_talent_version() -> None:
+    """
+    Record that talent data changed. Snapshots still refresh on their TTL;
+    the version lets derived caches (matching) tell fresh data from stale.
+    """
+    try:
+        cache.incr(TALENT_VERSION_KEY)
+    except ValueError:
+        cache.set(TALENT_VERSION_KEY, 2, timeout=None)
+
+
+class TalentIndex:
+    """
+    Holds the current snapshot and rebuilds it once it is TALENT_INDEX_TTL old.
+    While one thread rebuilds, the others keep answering from the stale copy.
+    """
+
+    def __init__(self, ttl: float = TALENT_INDEX_TTL) -> None:
+        self.ttl = ttl
+        self._snapshot: Optional[TalentSnapshot] = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return TALENT_INDEX_ENABLED and np is not None
+
+    def get_snapshot(self) -> Optional[TalentSnapshot]:
+        if not self.available:
+            return None
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - snapshot.built_at < self.ttl:
+            return snapshot
+
+        # first build blocks; later rebuilds are skipped if someone else is on it
+        if not self._lock.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            if self._snapshot is snapshot:
+                started = time.monotonic()
+                self._snapshot = TalentSnapshot.build()
+                logger.info(
+                    "Talent index rebuilt: %s rows in %.2fs",
+                    self._snapshot.size, time.monotonic() - started,
+                )
+            return self._snapshot
+        except Exception:
+            logger.exception("Talent index rebuild failed")
+            return snapshot
+        finally:
+            self._lock.release()
+
+    def invalidate(self) -> None:
+        self._snapshot = None
+
+
+talent_index = TalentIndex()
+
+
+def search_talent_ids(filters: TalentFilters, cursor: Optional[str], limit: int) -> Optional[List[int]]:
+    """Snapshot lookup; None when the snapshot isn't available (use the SQL path)."""
+    snapshot = talent_index.get_snapshot()
+    if snapshot is None:
+        return None
+    return snapshot.search(filters, cursor, limit)
+
+
+def search_talents(filters: TalentFilters, cursor: Optional[str] = None, page_size: int = 20, fields: Sequence[str] = ()) -> Dict[str, Any]:
+    """
+    Keyset page of talents matching `filters`.
+
+    Returns {"results": [Talent], "next_cursor": str | None}. Cursors are the
+    same for both paths, so a client can page across a fallback.
+    """
+    ids = search_talent_ids(filters, cursor, page_size + 1)
+    if ids is None:
+        queryset = filter_talents_sql(filters).order_by(*TALENT_ORDERING)
+        if cursor:
+            queryset = queryset.filter(_cursor_q(cursor))
+        if fields:
+            queryset = queryset.only(*fields)
+        rows = list(queryset[: page_size + 1])
+        has_more = len(rows) > page_size
+    else:
+        has_more = len(ids) > page_size
+        ids = ids[:page_size]
+        queryset = Talent.objects.filter(talent_id__in=ids)
+        if fields:
+            queryset = queryset.only(*fields)
+        by_id = {talent.talent_id: talent for talent in queryset}
+        # rows deleted since the snapshot was taken simply drop out
+        rows = [by_id[talent_id] for talent_id in ids if talent_id in by_id]
+
+    rows = rows[:page_size]
+    next_cursor = None
+    if has_more and rows:
+        next_cursor = encode_cursor([rows[-1].created_at, rows[-1].talent_id])
+    return {"results": rows, "next_cursor": next_cursor}
@@ -1,3 +1,881 @@
-from django.test import TestCase
+import io
+import random
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from asgiref.sync import sync_to_async
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.exceptions import ValidationError
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from account.models import UserAuth
+from account.utils import generate_tokens_for_user
+from core.images import VariantStatus, claim_pending, process_pending, render_variants
+from . import counters
+from . import talent_import
+from .dashboard import COUNT_FIELDS, compute_summaries, dashboard_cache, refresh_summaries
+from .matching import (
+    CATEGORY_WEIGHTS, CONTINENT_PROXIMITY, COUNTRY_PROXIMITY, LOCATION_WEIGHT, MEASUREMENT_SCALES,
+    MEASUREMENT_WEIGHTS, MISSING_PENALTY, job_features, rank_talents, score_talents, top_k,
+)
+from .models import DashboardSummary, Job, JobEvent, Talent, TalentImage
+from .talent_index import (
+    CATEGORICAL_ATTRS, NUMERIC_ATTRS, TALENT_ORDERING, TalentFilters, TalentSnapshot, filter_talents_sql,
+    normalize_location, np, search_talents,
+)
+from .talent_images import TalentNotFound, delete_image, set_primary, upload_images
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+def auth_header(user):
+    return {"HTTP_AUTHORIZATION": f"Bearer {generate_tokens_for_user(user)['access']}"}
+
+
+def png(name="photo.png", size=(8, 8)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "white").save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+class JobEventTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client_user = UserAuth.objects.create_user(email="client@example.com", full_name="Client", role="Client")
+        self.agent = UserAuth.objects.create_user(email="agent@example.com", full_name="Agent", role="Agent")
+        self.job = Job.objects.create(
+            job_created_by=self.client_user, job_assigned_to=self.agent, title="Summer shoot", status=Job.Status.ACTIVE
+        )
+        self.talent = Talent.objects.create(added_by_agent=self.agent, name="Talent")
+
+    def shortlist(self, user):
+        return self.client.post(
+            f"/v1/jobs/{self.job.pk}/events/", {"kind": JobEvent.Kind.SHORTLISTED, "talent": self.talent.pk},
+            content_type="application/json", **auth_header(user),
+        )
+
+    def test_job_client_can_shortlist(self):
+        self.assertEqual(self.shortlist(self.client_user).status_code, 201)
+
+    def test_assigned_agent_can_shortlist(self):
+        self.assertEqual(self.shortlist(self.agent).status_code, 201)
+
+    def test_other_users_cannot_shortlist(self):
+        other = UserAuth.objects.create_user(email="other@example.com", full_name="Other", role="Client")
+        self.assertEqual(self.shortlist(other).status_code, 403)
+
+
+class JobSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserAuth.objects.create_user(email="search@example.com", full_name="Search", role="Agent")
+
+    def test_malformed_cursor_is_a_400(self):
+        response = self.client.get("/v1/jobs/", {"cursor": "WyJ4IiwxXQ"}, **auth_header(self.user))  # ["x",1]
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_facet_values_are_a_400(self):
+        cases = {
+            "status": {"status": "active,bogus"},
+            "job_type": {"job_type": "x" * 121},
+        }
+        for field, params in cases.items():
+            with self.subTest(field):
+                response = self.client.get("/v1/jobs/", params, **auth_header(self.user))
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(list(response.json()["data"]), [field])
+        self.assertIn("bogus", self.client.get("/v1/jobs/", cases["status"], **auth_header(self.user)).json()["data"]["status"][0])
+
+        Job.objects.create(job_created_by=self.user, title="Shoot", status=Job.Status.ACTIVE, job_type="Summer Fashion")
+        response = self.client.get("/v1/jobs/", {"status": "active, paused", "job_type": "Summer Fashion"}, **auth_header(self.user))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["data"]["results"]), 1)
+
+    def test_talent_search_validates_categories(self):
+        for params in ({"gender": "female,robot"}, {"country": "x" * 65}):
+            with self.subTest(params):
+                response = self.client.get("/v1/jobs/talents/search/", params, **auth_header(self.user))
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(list(response.json()["data"]), list(params))
+        response = self.client.get("/v1/jobs/talents/search/", {"gender": "female,other", "country": "FR"}, **auth_header(self.user))
+        self.assertEqual(response.status_code, 200)
+
+    def test_query_count(self):
+        for index in range(3):
+            Job.objects.create(job_created_by=self.user, title=f"Job {index}", status=Job.Status.ACTIVE)
+        with self.assertNumQueries(2):  # page, facets
+            first = self.client.get("/v1/jobs/", {"page_size": 2}, **auth_header(self.user)).json()["data"]
+        with self.assertNumQueries(1):  # later pages skip the facets
+            second = self.client.get("/v1/jobs/", {"page_size": 2, "cursor": first["next_cursor"]}, **auth_header(self.user))
+        self.assertEqual(len(second.json()["data"]["results"]), 1)
+
+
+class TalentQueryCountTests(TestCase):
+    """
+    Query counts of the talent endpoints, with token auth costing none. The
+    counts must not grow with the number of talents or images.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.agent = UserAuth.objects.create_user(email="grid@example.com", full_name="Agent", role="Agent")
+        self.headers = auth_header(self.agent)
+
+    def add_talents(self, count, images=2):
+        talents = []
+        for index in range(count):
+            talent = Talent.objects.create(added_by_agent=self.agent, name=f"Talent {index}")
+            for order in range(images):
+                TalentImage.objects.create(talent=talent, image=png(), is_primary=order == 0, sort_order=order)
+            talents.append(talent)
+        return talents
+
+    def test_list_is_one_query_per_page(self):
+        for count in (2, 10):
+            with self.subTest(talents=count):
+                self.add_talents(count - Talent.objects.count())
+                with self.assertNumQueries(1):
+                    response = self.client.get("/v1/jobs/talents/", {"page_size": 50}, **self.headers)
+                self.assertEqual(response.status_code, 200)
+                results = response.json()["data"]["results"]
+                self.assertEqual(len(results), count)
+                self.assertTrue(all(result["primary_image"] for result in results))
+
+    def test_detail_is_two_queries(self):
+        for images in (1, 6):
+            with self.subTest(images=images):
+                talent = self.add_talents(1, images=images)[0]
+                with self.assertNumQueries(2):  # talent, images
+                    response = self.client.get(f"/v1/jobs/talents/{talent.pk}/", **self.headers)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json()["data"]["images"]), images)
+
+    def test_upload_is_one_insert_for_many_files(self):
+        talent = self.add_talents(1, images=0)[0]
+        for files in (1, 4):
+            with self.subTest(files=files):
+                # ownership, lock, primary/order state, INSERT (+ savepoint pair)
+                with self.assertNumQueries(6):
+                    response = self.client.post(
+                        f"/v1/jobs/talents/{talent.pk}/images/",
+                        {"images": [png(f"{files}-{i}.png") for i in range(files)]},
+                        **self.headers,
+                    )
+                self.assertEqual(response.status_code, 201, response.content)
+
+    def test_set_primary_and_delete_are_constant(self):
+        talent = self.add_talents(1, images=6)[0]
+        images = list(talent.images.order_by("sort_order"))
+        with self.assertNumQueries(7):  # ownership, lock, exists, clear, set (+ savepoint pair)
+            response = self.client.post(f"/v1/jobs/talents/{talent.pk}/images/{images[3].pk}/primary/", **self.headers)
+        self.assertEqual(response.status_code, 200)
+        # ownership, lock, image, DELETE, close the gap, promote successor (+ savepoint pair)
+        with self.assertNumQueries(8):
+            response = self.client.delete(f"/v1/jobs/talents/{talent.pk}/images/{images[3].pk}/", **self.headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_reorder_is_one_update(self):
+        talent = self.add_talents(1, images=5)[0]
+        image_ids = list(talent.images.order_by("-sort_order").values_list("pk", flat=True))
+        with self.assertNumQueries(6):  # ownership, lock, images, bulk UPDATE (+ savepoint pair)
+            response = self.client.patch(
+                f"/v1/jobs/talents/{talent.pk}/images/order/", {"image_ids": image_ids},
+                content_type="application/json", **self.headers,
+            )
+        self.assertEqual(response.status_code, 200)
+
+
+class TalentImageValidationTests(TestCase):
+    def test_full_clean_reports_a_bad_image_as_a_field_error(self):
+        agent = UserAuth.objects.create_user(email="clean@example.com", full_name="Agent", role="Agent")
+        talent = Talent.objects.create(added_by_agent=agent, name="Talent")
+        image = TalentImage(talent=talent, image=SimpleUploadedFile("notes.png", b"not an image"))
+        with self.assertRaises(ValidationError) as raised:
+            image.full_clean()
+        self.assertIn("image", raised.exception.message_dict)
+
+
+class TalentImageConcurrencyTests(TransactionTestCase):
+    """
+    Uploads, set-primary and deletes racing on one talent. The talent row lock
+    must keep exactly one primary image and a gapless sort_order.
+    """
+
+    workers = 8
+    operations = 15
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, True)
+        agent = UserAuth.objects.create_user(email="race@example.com", full_name="Agent", role="Agent")
+        self.talent = Talent.objects.create(added_by_agent=agent, name="Talent")
+        upload_images(self.talent.pk, [png(f"seed-{i}.png") for i in range(3)])
+
+    def run_with_retry(self, operation, *args):
+        # SQLite has no row locks: a writer that loses the database lock gets
+        # "database table is locked" and retries, like a client would
+        for _ in range(200):
+            try:
+                return operation(*args)
+            except OperationalError as exc:
+                if "locked" not in str(exc):
+                    raise
+                time.sleep(0.005)
+        raise AssertionError(f"{operation.__name__} never got the lock")
+
+    def step(self, rng, name):
+        image_ids = list(TalentImage.objects.filter(talent_id=self.talent.pk).values_list("pk", flat=True))
+        choice = rng.random()
+        if choice < 0.4 or not image_ids:
+            upload_images(self.talent.pk, [png(f"{name}-{i}.png") for i in range(rng.randint(1, 2))])
+        elif choice < 0.7:
+            set_primary(self.talent.pk, rng.choice(image_ids))
+        else:
+            delete_image(self.talent.pk, rng.choice(image_ids))
+
+    def worker(self, seed, errors):
+        try:
+            for step in range(self.operations):
+                # same choices on a retry
+                self.run_with_retry(self.step, random.Random(seed * 1000 + step), f"{seed}-{step}")
+        except (AssertionError, TalentNotFound, OperationalError) as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    def test_concurrent_uploads_primary_and_deletes(self):
+        errors = []
+        threads = [threading.Thread(target=self.worker, args=(seed, errors)) for seed in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+        rows = list(
+            TalentImage.objects.filter(talent_id=self.talent.pk).order_by("sort_order").values("is_primary", "sort_order")
+        )
+        self.assertTrue(rows)
+        self.assertEqual(sum(row["is_primary"] for row in rows), 1)
+        self.assertEqual([row["sort_order"] for row in rows], list(range(len(rows))))
+
+
+class TalentImageVariantTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, True)
+        agent = UserAuth.objects.create_user(email="variants@example.com", full_name="Agent", role="Agent")
+        self.talent = Talent.objects.create(added_by_agent=agent, name="Talent")
+
+    def add_images(self, count, size=(40, 20)):
+        return [
+            TalentImage.objects.create(talent=self.talent, image=png(f"v{index}.png", size), sort_order=index)
+            for index in range(count)
+        ]
+
+    def process(self, batch_size=20):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            return process_pending(TalentImage, "image", "variants", "variants_status", executor, batch_size)
+
+    def claim(self, batch_size=20):
+        return claim_pending(TalentImage, "image", "variants", "variants_status", batch_size)
+
+    def test_render_never_upscales(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (40, 20), "white").save(buffer, "PNG")
+        rendered = render_variants(buffer.getvalue(), widths=(10, 30, 80), formats=("webp", "avif"))
+        self.assertIsNone(rendered["original"])  # no EXIF, nothing to rewrite
+        self.assertEqual(
+            [(item["width"], item["height"], item["format"]) for item in rendered["variants"]],
+            [(10, 5, "webp"), (10, 5, "avif"), (30, 15, "webp"), (30, 15, "avif"), (40, 20, "webp"), (40, 20, "avif")],
+        )
+        for item in rendered["variants"]:
+            with Image.open(io.BytesIO(item["content"])) as img:
+                self.assertEqual((img.format, img.size), (item["format"].upper(), (item["width"], item["height"])))
+
+    def test_exif_is_stripped_after_applying_the_orientation(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # rotate 90 degrees clockwise
+        exif[0x010F] = "Camera"
+        buffer = io.BytesIO()
+        Image.new("RGB", (40, 20), "white").save(buffer, "JPEG", exif=exif)
+
+        rendered = render_variants(buffer.getvalue(), widths=(10,), formats=("webp",))
+        self.assertEqual((rendered["width"], rendered["height"]), (20, 40))
+        with Image.open(io.BytesIO(rendered["original"])) as original:
+            self.assertEqual((original.format, original.size), ("JPEG", (20, 40)))
+            self.assertEqual(dict(original.getexif()), {})
+        for item in rendered["variants"]:
+            with Image.open(io.BytesIO(item["content"])) as img:
+                self.assertEqual(dict(img.getexif()), {})
+
+    def test_process_marks_rows_ready(self):
+        images = self.add_images(3)
+        self.assertEqual(self.process(), {"claimed": 3, "ready": 3, "failed": 0})
+        for image in TalentImage.objects.filter(pk__in=[image.pk for image in images]):
+            self.assertEqual(image.variants_status, VariantStatus.READY)
+            self.assertEqual(image.variants["source"], image.image.name)
+            for item in image.variants["items"]:
+                self.assertTrue(image.image.storage.exists(item["name"]))
+        self.assertEqual(self.process()["claimed"], 0)
+
+    def test_a_corrupt_file_is_marked_failed(self):
+        image = self.add_images(1)[0]
+        with open(image.image.path, "wb") as fh:
+            fh.write(b"not an image")
+        self.assertEqual(self.process(), {"claimed": 1, "ready": 0, "failed": 1})
+        image.refresh_from_db()
+        self.assertEqual(image.variants_status, VariantStatus.FAILED)
+        self.assertIn("error", image.variants)
+
+    def test_claimed_rows_are_not_claimed_twice(self):
+        images = self.add_images(3)
+        first = self.claim(batch_size=2)
+        self.assertEqual([row.pk for row in first], [images[0].pk, images[1].pk])
+        self.assertEqual(
+            set(TalentImage.objects.filter(pk__in=[row.pk for row in first]).values_list("variants_status", flat=True)),
+            {VariantStatus.PROCESSING},
+        )
+        self.assertEqual([row.pk for row in self.claim()], [images[2].pk])
+        self.assertEqual(self.claim(), [])
+
+    def test_a_stale_claim_is_taken_over(self):
+        image = self.add_images(1)[0]
+        self.assertEqual(len(self.claim()), 1)
+        TalentImage.objects.filter(pk=image.pk).update(variants={"claimed_until": time.time() - 1})  # worker died
+        self.assertEqual([row.pk for row in self.claim()], [image.pk])
+
+    def test_row_follows_a_renamed_original(self):
+        buffer = io.BytesIO()
+        exif = Image.Exif()
+        exif[0x0112] = 3
+        Image.new("RGB", (40, 20), "white").save(buffer, "JPEG", exif=exif)
+        image = TalentImage.objects.create(
+            talent=self.talent, image=SimpleUploadedFile("exif.jpg", buffer.getvalue(), content_type="image/jpeg")
+        )
+        source = image.image.name
+        available_name = FileSystemStorage.get_available_name
+
+        def rename_original(storage, name, max_length=None):
+            # a storage that never reuses a name
+            return available_name(storage, name.replace(".jpg", "_clean.jpg") if name == source else name, max_length)
+
+        with mock.patch.object(FileSystemStorage, "get_available_name", rename_original):
+            self.assertEqual(self.process()["ready"], 1)
+        image.refresh_from_db()
+        self.assertNotEqual(image.image.name, source)
+        self.assertEqual(image.variants["source"], image.image.name)
+        self.assertTrue(image.image.storage.exists(image.image.name))
+        image.save()  # the row matches its variants, nothing is re-queued
+        self.assertEqual(image.variants_status, VariantStatus.READY)
+
+
+class TalentExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.agent = UserAuth.objects.create_user(email="export@example.com", full_name="Agent", role="Agent")
+        other = UserAuth.objects.create_user(email="other-agent@example.com", full_name="Other", role="Agent")
+        Talent.objects.create(added_by_agent=self.agent, name="Mine")
+        Talent.objects.create(added_by_agent=other, name="Theirs")
+
+    def test_clients_cannot_export(self):
+        client_user = UserAuth.objects.create_user(email="export-client@example.com", full_name="Client", role="Client")
+        response = self.client.get("/v1/jobs/talents/", {"export": "csv"}, **auth_header(client_user))
+        self.assertEqual(response.status_code, 403)
+
+    async def test_agents_export_only_their_own_talents(self):
+        response = await self.async_client.get(
+            "/v1/jobs/talents/", {"export": "ndjson"},
+            headers={"Authorization": f"Bearer {generate_tokens_for_user(self.agent)['access']}"},
+        )
+        self.assertEqual(response.status_code, 200)
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertIn(b'"Mine"', body)
+        self.assertNotIn(b'"Theirs"', body)
+
+
+class TalentImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        dashboard_cache.local.clear()
+        self.agent = UserAuth.objects.create_user(email="import@example.com", full_name="Agent", role="Agent")
+        self.importer = UserAuth.objects.create_user(email="importer@example.com", full_name="Agent", role="Agent")
+
+    def run_import(self, content, file_format="csv", agent=None, **kwargs):
+        return talent_import.import_talents((agent or self.importer).pk, io.BytesIO(content), file_format, **kwargs)
+
+    def imported(self, agent):
+        return list(Talent.objects.filter(added_by_agent=agent).order_by("talent_id").values(*talent_import.IMPORT_FIELDS))
+
+    async def test_an_export_imports_back(self):
+        rng = random.Random(18)
+        talents = [random_talent(rng, self.agent) for _ in range(12)]
+        for index, talent in enumerate(talents):
+            talent.name = f'Talent "{index}", the {index}th'  # quoting survives CSV
+            talent.location = talent.location.strip()
+            talent.dob = date(1990, 1, 1) + timedelta(days=index * 97)
+        await Talent.objects.abulk_create(talents)
+        expected = await sync_to_async(self.imported)(self.agent)
+        headers = {"Authorization": f"Bearer {generate_tokens_for_user(self.agent)['access']}"}
+
+        for export_format in ("csv", "ndjson"):
+            with self.subTest(export_format):
+                await Talent.objects.filter(added_by_agent=self.importer).adelete()
+                response = await self.async_client.get("/v1/jobs/talents/", {"export": export_format}, headers=headers)
+                body = b"".join([chunk async for chunk in response.streaming_content])
+                report = await sync_to_async(self.run_import)(body, export_format, batch_size=5)
+                self.assertEqual((report["created"], report["failed"]), (12, 0))
+                self.assertCountEqual(await sync_to_async(self.imported)(self.importer), expected)
+
+    def test_bad_rows_are_reported_and_skipped(self):
+        content = (
+            "name,height,gender,is_available,shoe_size\n"
+            "Good,170.5,Female,yes,38\n"
+            ",170,,,\n"
+            "Tall,12345.678,,,\n"
+            "Odd,,unknown,,\n"
+            "Fine,,,no,-1\n"
+            "Also good,,male,0,\n"
+        ).encode()
+        report = self.run_import(content)
+        self.assertEqual((report["created"], report["failed"]), (2, 4))
+        self.assertEqual([error["row"] for error in report["errors"]], [3, 4, 5, 6])
+        self.assertEqual(list(report["errors"][0]["errors"]), ["name"])
+        self.assertEqual(list(report["errors"][1]["errors"]), ["height"])
+        self.assertEqual(list(report["errors"][2]["errors"]), ["gender"])
+        self.assertEqual(list(report["errors"][3]["errors"]), ["shoe_size"])
+        self.assertEqual(
+            [(row["name"], row["gender"], row["is_available"]) for row in self.imported(self.importer)],
+            [("Good", "female", True), ("Also good", "male", False)],
+        )
+
+    def test_bad_json_lines_are_reported(self):
+        content = b'{"name": "One"}\n\nnot json\n["a list"]\n{"name": "Two", "height": 180}\n'
+        report = self.run_import(content, "ndjson")
+        self.assertEqual((report["created"], report["failed"]), (2, 2))
+        self.assertEqual([error["row"] for error in report["errors"]], [3, 4])
+        self.assertIn("non_field_errors", report["errors"][0]["errors"])
+
+    def test_errors_are_truncated(self):
+        content = b"name\n" + b",\n" * 5
+        with mock.patch.object(talent_import, "TALENT_IMPORT_MAX_ERRORS", 2):
+            report = self.run_import(content)
+        self.assertEqual((report["failed"], len(report["errors"]), report["errors_truncated"]), (5, 2, True))
+
+    def test_dry_run_writes_nothing(self):
+        content = b"name\nOne\nTwo\n,\n"
+        with self.assertNumQueries(0):
+            report = self.run_import(content, dry_run=True)
+        self.assertEqual((report["created"], report["failed"]), (2, 1))
+        self.assertEqual(self.imported(self.importer), [])
+
+    def test_rows_are_inserted_in_chunks(self):
+        DashboardSummary.objects.create(user=self.importer)
+        content = ("name,is_available\n" + "".join(f"Talent {i},{i % 2}\n" for i in range(5))).encode()
+        with mock.patch.object(talent_import, "_insert", wraps=talent_import._insert) as insert:
+            report = self.run_import(content, batch_size=2)
+        self.assertEqual(report["created"], 5)
+        self.assertEqual([len(call.args[1]) for call in insert.call_args_list], [2, 2, 1])
+        self.assertEqual([row["name"] for row in self.imported(self.importer)], [f"Talent {i}" for i in range(5)])
+
+        summary = DashboardSummary.objects.get(user=self.importer)
+        self.assertEqual((summary.talents_total, summary.talents_available, summary.talents_recent), (5, 2, 5))
+
+    def test_upload_endpoint(self):
+        upload = SimpleUploadedFile("talents.csv", b"name\nUploaded\n,\n", content_type="text/csv")
+        response = self.client.post("/v1/jobs/talents/import/", {"file": upload}, **auth_header(self.importer))
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()["data"]["created"], 1)
+        self.assertEqual(response.json()["data"]["failed"], 1)
+
+        unknown = SimpleUploadedFile("talents.txt", b"name\nUploaded\n")
+        response = self.client.post("/v1/jobs/talents/import/", {"file": unknown}, **auth_header(self.importer))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("file_format", response.json()["data"])
+
+        client_user = UserAuth.objects.create_user(email="import-client@example.com", full_name="Client", role="Client")
+        upload = SimpleUploadedFile("talents.csv", b"name\nNope\n")
+        self.assertEqual(self.client.post("/v1/jobs/talents/import/", {"file": upload}, **auth_header(client_user)).status_code, 403)
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile(suffix=".jsonl") as fh:
+            fh.write(b'{"name": "From disk"}\n{"name": ""}\n')
+            fh.flush()
+            stdout, stderr = io.StringIO(), io.StringIO()
+            call_command("import_talents", fh.name, agent=self.importer.email, stdout=stdout, stderr=stderr)
+        self.assertIn("created=1 failed=1", stdout.getvalue())
+        self.assertIn('"row": 2', stderr.getvalue())
+        self.assertEqual([row["name"] for row in self.imported(self.importer)], ["From disk"])
+
+
+LOCATIONS = ["Paris", "  paris ", "Milan", "New York", ""]
+COUNTRIES = {"FR": "Europe", "IT": "Europe", "US": "North America", "": ""}
+
+
+def random_talent(rng, agent):
+    def measure(low, high):
+        return None if rng.random() < 0.15 else Decimal(rng.randint(low * 100, high * 100)) / 100
+
+    country = rng.choice(list(COUNTRIES))
+    return Talent(
+        added_by_agent=agent, name="Talent", height=measure(150, 195), bust=measure(75, 100),
+        waist=measure(55, 80), hips=measure(80, 105), shoe_size=None if rng.random() < 0.15 else rng.randint(35, 46),
+        gender=rng.choice([*Talent.Gender.values, ""]), eye_color=rng.choice(["blue", "brown", "green", ""]),
+        hair_type=rng.choice(["straight", "curly", ""]), hair_color=rng.choice(["black", "blond", "red", ""]),
+        skin_color=rng.choice(["light", "dark", ""]), country=country, continent=COUNTRIES[country],
+        location=rng.choice(LOCATIONS), is_available=rng.random() < 0.8,
+        available_date=None if rng.random() < 0.3 else date(2026, 1, 1) + timedelta(days=rng.randint(0, 90)),
+    )
+
+
+class TalentSnapshotTests(TestCase):
+    """The snapshot, its bitmaps and the matching scorer against the ORM and plain Python."""
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(7)
+        agent = UserAuth.objects.create_user(email="snapshot@example.com", full_name="Agent", role="Agent")
+        Talent.objects.bulk_create(random_talent(rng, agent) for _ in range(150))
+        # equal created_at values, so the talent_id tie-break of the ordering is exercised
+        ids = list(Talent.objects.values_list("talent_id", flat=True)[:40])
+        Talent.objects.filter(talent_id__in=ids[:20]).update(created_at=Talent.objects.get(talent_id=ids[0]).created_at)
+        Talent.objects.filter(talent_id__in=ids[20:]).update(created_at=Talent.objects.get(talent_id=ids[20]).created_at)
+
+    def setUp(self):
+        cache.clear()
+        self.snapshot = TalentSnapshot.build()
+        self.talents = list(Talent.objects.order_by(*TALENT_ORDERING))
+
+    def random_filters(self, rng):
+        filters = TalentFilters()
+        for attr in rng.sample(NUMERIC_ATTRS, rng.randint(0, 2)):
+            value = getattr(rng.choice(self.talents), attr) or Decimal("170.5")
+            bounds = [value - rng.randint(0, 10), value + rng.randint(0, 10)]
+            filters.ranges[attr] = (bounds[0] if rng.random() < 0.8 else None, bounds[1] if rng.random() < 0.8 else None)
+        if rng.random() < 0.4:
+            day = date(2026, 1, 1) + timedelta(days=rng.randint(0, 90))
+            filters.ranges["available_date"] = rng.choice([(day, None), (None, day), (day, day + timedelta(days=20))])
+        for attr in rng.sample(CATEGORICAL_ATTRS, rng.randint(0, 2)):
+            values = {getattr(talent, attr) for talent in self.talents} - {""}
+            filters.categories[attr] = rng.sample(sorted(values), rng.randint(1, len(values)))
+        filters.is_available = rng.choice([None, True, False])
+        return filters
+
+    def test_search_matches_the_sql_path(self):
+        rng = random.Random(11)
+        for case in range(60):
+            filters = self.random_filters(rng)
+            with self.subTest(case=case, filters=filters):
+                expected = list(filter_talents_sql(filters).order_by(*TALENT_ORDERING).values_list("talent_id", flat=True))
+                self.assertEqual(self.snapshot.search(filters, None, 1000), expected)
+
+    def test_pages_match_the_sql_path(self):
+        def walk(filters, snapshot):
+            ids, cursor = [], None
+            with mock.patch("jobs_talent.talent_index.talent_index.get_snapshot", return_value=snapshot):
+                while True:
+                    page = search_talents(filters, cursor, page_size=7)
+                    ids += [talent.talent_id for talent in page["results"]]
+                    cursor = page["next_cursor"]
+                    if not cursor:
+                        return ids
+
+        rng = random.Random(13)
+        for case in range(10):
+            filters = self.random_filters(rng) if case else TalentFilters()
+            with self.subTest(case=case):
+                self.assertEqual(walk(filters, self.snapshot), walk(filters, None))
+
+    def test_bitmaps_match_the_rows(self):
+        for attr in CATEGORICAL_ATTRS:
+            values = sorted({getattr(talent, attr) for talent in self.talents} - {""})
+            for chosen in [values[:1], values, values[1:], ["missing"], []]:
+                with self.subTest(attr=attr, values=chosen):
+                    expected = [getattr(talent, attr) in chosen for talent in self.talents]
+                    self.assertEqual(self.snapshot.bitmap(attr, chosen).tolist(), expected)
+
+    def reference_score(self, talent, features):
+        if not talent.is_available:
+            return float("-inf")
+        score = 0.0
+        for attr, (low, high) in features.ranges.items():
+            value = getattr(talent, attr)
+            if value is None:
+                score -= MEASUREMENT_WEIGHTS[attr] * MISSING_PENALTY
+                continue
+            value = float(value)
+            distance = max(0.0, low - value if low is not None else 0.0, value - high if high is not None else 0.0)
+            score -= MEASUREMENT_WEIGHTS[attr] * (distance / MEASUREMENT_SCALES[attr]) ** 2
+        for attr, values in features.categories.items():
+            score += CATEGORY_WEIGHTS[attr] * (getattr(talent, attr) in values)
+        proximity = 0.0
+        if talent.continent in features.continents:
+            proximity = max(proximity, CONTINENT_PROXIMITY)
+        if talent.country in features.countries:
+            proximity = max(proximity, COUNTRY_PROXIMITY)
+        if features.location and normalize_location(talent.location) == features.location:
+            proximity = 1.0
+        return score + LOCATION_WEIGHT * proximity
+
+    def random_job(self, rng):
+        requirements = {}
+        for attr in rng.sample(NUMERIC_ATTRS, rng.randint(0, 3)):
+            low = rng.choice([None, rng.randint(30, 170)])
+            requirements[attr] = [low, rng.choice([None, (low or 30) + rng.randint(0, 20)])]
+        for attr in rng.sample(sorted(CATEGORY_WEIGHTS), rng.randint(0, 3)):
+            requirements[attr] = rng.sample(["female", "male", "blue", "brown", "curly", "black", "light", "dark"], 2)
+        if rng.random() < 0.5:
+            requirements["country"] = rng.sample(["FR", "IT", "US"], rng.randint(1, 2))
+        if rng.random() < 0.5:
+            requirements["continent"] = [rng.choice(["Europe", "North America"])]
+        return Job(title="Job", requirements=requirements, location=rng.choice(LOCATIONS + ["PARIS"]))
+
+    def test_scores_match_a_python_reference(self):
+        rng = random.Random(17)
+        for case in range(30):
+            features = job_features(self.random_job(rng))
+            with self.subTest(case=case, features=features):
+                scores = score_talents(self.snapshot, features)
+                expected = [self.reference_score(talent, features) for talent in self.talents]
+                np.testing.assert_allclose(scores, np.array(expected, dtype=np.float32), rtol=1e-5, atol=1e-4)
+
+    def test_ranking_breaks_ties_on_talent_id(self):
+        rng = random.Random(19)
+        for case in range(30):
+            job = self.random_job(rng)
+            scores = score_talents(self.snapshot, job_features(job))
+            ranked = sorted(
+                ((int(talent_id), float(score)) for talent_id, score in zip(self.snapshot.ids, scores) if np.isfinite(score)),
+                key=lambda pair: (-pair[1], -pair[0]),
+            )
+            for k in (1, 5, 40, 500):
+                with self.subTest(case=case, k=k):
+                    self.assertEqual([talent_id for talent_id, _ in rank_talents(job, k, self.snapshot)],
+                                     [talent_id for talent_id, _ in ranked[:k]])
+
+    def test_top_k_ties_at_the_cut(self):
+        ids = np.array([5, 9, 2, 7, 3, 8], dtype=np.int64)
+        scores = np.array([1.0, 2.0, 2.0, -np.inf, 2.0, 1.0], dtype=np.float32)
+        self.assertEqual(top_k(scores, ids, 2), [(9, 2.0), (3, 2.0)])
+        self.assertEqual(top_k(scores, ids, 4), [(9, 2.0), (3, 2.0), (2, 2.0), (8, 1.0)])
+        self.assertEqual(len(top_k(scores, ids, 10)), 5)
+        self.assertEqual(top_k(scores, ids, 0), [])
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is not installed")
+class JobCounterTests(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        for name, value in (("get_redis", mock.Mock(return_value=self.redis)), ("JOB_COUNTER_MODE", "buffered")):
+            patcher = mock.patch.object(counters, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        client_user = UserAuth.objects.create_user(email="counter@example.com", full_name="Client", role="Client")
+        agent = UserAuth.objects.create_user(email="counter-agent@example.com", full_name="Agent", role="Agent")
+        self.job = Job.objects.create(job_created_by=client_user, title="Counted", status=Job.Status.ACTIVE)
+        self.talents = [Talent.objects.create(added_by_agent=agent, name=f"Talent {i}") for i in range(3)]
+
+    def counts(self, job=None):
+        job = job or self.job
+        return tuple(Job.objects.filter(pk=job.pk).values_list(*counters.COUNTER_FIELDS.values()).get())
+
+    def record(self, talent, kind=JobEvent.Kind.APPLIED, job=None):
+        return counters.record_event(job or self.job, talent.pk, kind)
+
+    def test_buffered_increments_land_on_flush(self):
+        for talent in self.talents:
+            self.record(talent)
+        self.record(self.talents[0], JobEvent.Kind.SHORTLISTED)
+        self.assertEqual(self.counts(), (0, 0, 0))
+        self.assertEqual(self.redis.hgetall(counters._pending_key(self.job.pk)), {b"applicants_count": b"3", b"shortlisted_count": b"1"})
+
+        self.assertEqual(counters.flush_buffered_counters(), 1)
+        self.assertEqual(self.counts(), (3, 1, 0))
+        self.assertEqual(self.redis.exists(counters._pending_key(self.job.pk), counters.DIRTY_KEY), 0)
+        self.assertEqual(counters.flush_buffered_counters(), 0)
+
+    def test_failed_flush_requeues_the_deltas(self):
+        self.record(self.talents[0])
+        self.record(self.talents[1])
+        with mock.patch.object(counters, "increment_counters", side_effect=OperationalError("db down")):
+            with self.assertRaises(OperationalError):
+                counters.flush_buffered_counters()
+        self.record(self.talents[2])  # arrives while the deltas are back in Redis
+        self.assertEqual(counters.pending_job_ids(), {self.job.pk})
+        counters.flush_buffered_counters()
+        self.assertEqual(self.counts(), (3, 0, 0))
+
+    def test_without_redis_increments_go_to_the_database(self):
+        counters.get_redis.return_value = None
+        self.record(self.talents[0], JobEvent.Kind.SELFTAPE)
+        self.assertEqual(self.counts(), (0, 0, 1))
+
+    def test_direct_mode(self):
+        with mock.patch.object(counters, "JOB_COUNTER_MODE", "direct"):
+            self.record(self.talents[0])
+        self.assertEqual(self.counts(), (1, 0, 0))
+        self.assertEqual(counters.pending_job_ids(), set())
+
+    def test_reconcile_fixes_drift_and_skips_buffered_jobs(self):
+        with mock.patch.object(counters, "JOB_COUNTER_MODE", "direct"):
+            self.record(self.talents[0])
+            self.record(self.talents[1], JobEvent.Kind.SHORTLISTED)
+        Job.objects.filter(pk=self.job.pk).update(applicants_count=9, selftapes_count=4)
+        other = Job.objects.create(job_created_by=self.job.job_created_by, title="Buffered", status=Job.Status.ACTIVE)
+        self.record(self.talents[0], job=other)  # buffered, not flushed yet
+        Job.objects.filter(pk=other.pk).update(shortlisted_count=5)
+
+        self.assertEqual(counters.reconcile_job_counters(), 1)
+        self.assertEqual(self.counts(), (1, 1, 0))
+        self.assertEqual(self.counts(other), (0, 5, 0))  # left for after its flush
+        self.assertEqual(counters.reconcile_job_counters(), 0)
+
+    def test_reconcile_does_not_clobber_a_concurrent_increment(self):
+        Job.objects.filter(pk=self.job.pk).update(applicants_count=9)
+
+        def increment_meanwhile():
+            # runs after reconcile read the counters, before it writes
+            counters.increment_counters(self.job.pk, {"applicants_count": 1})
+            return set()
+
+        with mock.patch.object(counters, "pending_job_ids", side_effect=increment_meanwhile):
+            self.assertEqual(counters.reconcile_job_counters(), 0)
+        self.assertEqual(self.counts(), (10, 0, 0))
+        self.assertEqual(counters.reconcile_job_counters([self.job.pk]), 1)
+        self.assertEqual(self.counts(), (0, 0, 0))
+
+
+class DashboardSummaryTests(TestCase):
+    """
+    The signal-maintained DashboardSummary rows must always equal a full
+    recount from the Talent and Job tables.
+    """
+
+    def setUp(self):
+        cache.clear()
+        dashboard_cache.local.clear()
+        self.agents = [
+            UserAuth.objects.create_user(email=f"agent{i}@example.com", full_name="Agent", role="Agent") for i in range(2)
+        ]
+        self.clients = [
+            UserAuth.objects.create_user(email=f"client{i}@example.com", full_name="Client", role="Client") for i in range(2)
+        ]
+        self.users = self.agents + self.clients
+        DashboardSummary.objects.bulk_create([DashboardSummary(user=user) for user in self.users])
+
+    def stored(self):
+        rows = DashboardSummary.objects.filter(user_id__in=[user.pk for user in self.users]).values("user_id", *COUNT_FIELDS)
+        return {row.pop("user_id"): row for row in rows}
+
+    def assertMatchesRecount(self):
+        computed = compute_summaries([user.pk for user in self.users])
+        expected = {
+            user.pk: {name: computed.get(user.pk, dict.fromkeys(COUNT_FIELDS, 0))[name] for name in COUNT_FIELDS}
+            for user in self.users
+        }
+        self.assertEqual(self.stored(), expected)
+
+    def test_signals_track_creates_updates_and_deletes(self):
+        rng = random.Random(17)
+        talents, jobs = [], []
+        for step in range(120):
+            choice = rng.random()
+            if choice < 0.2 or not talents:
+                talents.append(Talent.objects.create(
+                    added_by_agent=rng.choice(self.agents), name=f"Talent {step}", is_available=rng.random() < 0.5
+                ))
+            elif choice < 0.3:
+                talent = rng.choice(talents)
+                talent.is_available = not talent.is_available
+                talent.added_by_agent = rng.choice(self.agents)
+                talent.save()
+            elif choice < 0.4:
+                talents.pop(rng.randrange(len(talents))).delete()
+            elif choice < 0.6 or not jobs:
+                jobs.append(Job.objects.create(
+                    job_created_by=rng.choice(self.clients),
+                    job_assigned_to=rng.choice(self.agents + [None]),
+                    title=f"Job {step}",
+                    status=rng.choice(Job.Status.values),
+                ))
+            elif choice < 0.8:
+                job = rng.choice(jobs)
+                job.status = rng.choice(Job.Status.values)
+                job.job_assigned_to = rng.choice(self.agents + [None])
+                job.save()
+            elif choice < 0.9:
+                index = rng.randrange(len(jobs))
+                jobs[index] = job = Job.objects.get(pk=jobs[index].pk)  # a fresh instance remembers its own state
+                job.status = rng.choice(Job.Status.values)
+                job.save(update_fields=["status", "updated_at"])
+            else:
+                jobs.pop(rng.randrange(len(jobs))).delete()
+        self.assertMatchesRecount()
+        self.assertEqual(refresh_summaries(), 0)  # nothing to repair
+
+    def test_deferred_saves_rebuild_the_owners_rows(self):
+        talent = Talent.objects.create(added_by_agent=self.agents[0], name="Talent", is_available=True)
+        deferred = Talent.objects.only("pk", "name").get(pk=talent.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            Talent.objects.filter(pk=talent.pk).update(is_available=False)  # no signal
+            deferred.name = "Renamed"
+            deferred.save()
+        self.assertMatchesRecount()
+
+    def test_refresh_repairs_drift_and_ages_out_recent_counts(self):
+        talent = Talent.objects.create(added_by_agent=self.agents[0], name="Talent")
+        Job.objects.create(job_created_by=self.clients[0], job_assigned_to=self.agents[0], title="Job")
+        Talent.objects.filter(pk=talent.pk).update(created_at=timezone.now() - timedelta(days=30))
+        Job.objects.update(status=Job.Status.CLOSED)
+        self.assertNotEqual(self.stored()[self.agents[0].pk]["talents_recent"], 0)
+
+        self.assertEqual(refresh_summaries(), 2)  # the agent's and the client's rows
+        self.assertMatchesRecount()
+        self.assertEqual(self.stored()[self.agents[0].pk]["talents_recent"], 0)
+
+    def test_endpoint_reads_the_summary(self):
+        Talent.objects.create(added_by_agent=self.agents[1], name="Talent", is_available=True)
+        Job.objects.create(job_created_by=self.clients[1], job_assigned_to=self.agents[1], title="Job", status=Job.Status.ACTIVE)
+        DashboardSummary.objects.filter(user_id=self.agents[1].pk).delete()  # built on first read
+
+        data = self.client.get("/v1/jobs/dashboard/", **auth_header(self.agents[1])).json()["data"]
+        self.assertEqual(data["talents"], {"total": 1, "available": 1, "unavailable": 0, "recent": 1})
+        self.assertEqual(data["jobs_assigned"]["active"], 1)
+        self.assertEqual(data["jobs_assigned"]["total"], 1)
+        self.assertEqual(data["jobs_created"]["total"], 0)
+        self.assertMatchesRecount()
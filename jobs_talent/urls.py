@@ -0,0 +1,41 @@
+from django.urls import path
+from .views import (
+    DashboardView,
+    JobEventView,
+    JobMatchesView,
+    JobSearchView,
+    TalentImageDetailView,
+    TalentImageOrderView,
+    TalentImagePrimaryView,
+    TalentDetailView,
+    TalentImageUploadView,
+    TalentImportView,
+    TalentListView,
+    TalentSearchView,
+)
+
+urlpatterns = [
+    #job search
+    path('', JobSearchView.as_view(), name='job-search'),
+    path('<int:job_id>/matches/', JobMatchesView.as_view(), name='job-matches'),
+
+    #dashboard
+    path('dashboard/', DashboardView.as_view(), name='dashboard'),
+
+    #applications / shortlist / self-tapes
+    path('<int:job_id>/events/', JobEventView.as_view(), name='job-events'),
+
+    #talents
+    path('talents/', TalentListView.as_view(), name='talent-list'),
+    path('talents/<int:talent_id>/', TalentDetailView.as_view(), name='talent-detail'),
+    path('talents/import/', TalentImportView.as_view(), name='talent-import'),
+
+    #talent discovery
+    path('talents/search/', TalentSearchView.as_view(), name='talent-search'),
+
+    #talent images
+    path('talents/<int:talent_id>/images/', TalentImageUploadView.as_view(), name='talent-image-upload'),
+    path('talents/<int:talent_id>/images/order/', TalentImageOrderView.as_view(), name='talent-image-order'),
+    path('talents/<int:talent_id>/images/<int:image_id>/', TalentImageDetailView.as_view(), name='talent-image-detail'),
+    path('talents/<int:talent_id>/images/<int:image_id>/primary/', TalentImagePrimaryView.as_view(), name='talent-image-primary'),
+]
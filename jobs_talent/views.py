@@ -1,3 +1,451 @@
-from django.shortcuts import render
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError
+from django.db.models import Prefetch
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
-# Create your views here.
+from .counters import record_event
+from .dashboard import dashboard_cache, load_summary
+from .matching import MATCHING_MAX_RESULTS, get_job_matches
+from .models import Job, JobEvent, Talent, TalentImage
+from .search import (
+    JOB_LIST_FIELDS,
+    JOB_ORDERING,
+    facet_rows_queryset,
+    filter_jobs,
+    fold_facets,
+    visible_jobs,
+)
+from .serializers import (
+    JobEventSerializer,
+    JobListSerializer,
+    JobSearchParamsSerializer,
+    TalentCardSerializer,
+    TalentDetailSerializer,
+    TalentImageOrderSerializer,
+    TalentImageSerializer,
+    TalentImageUploadSerializer,
+    TalentImportSerializer,
+    TalentListSerializer,
+    TalentSearchParamsSerializer,
+)
+from .talent_images import (
+    TalentNotFound,
+    delete_image,
+    reorder_images,
+    set_primary,
+    upload_images,
+    with_primary_image,
+)
+from .talent_import import EXPORT_FIELDS, import_talents
+from .talent_index import search_talents
+from account.permissions import IsAgent, IsSuperuser
+from core.pagination import apaginate_keyset, get_page_size
+from core.streaming import EXPORT_FORMATS, stream_export
+from core.views import AsyncAPIView
+
+
+class JobSearchView(AsyncAPIView):
+    permission_classes = [IsAuthenticated]
+    query_budget = 2  # page, facets (first page only); checked by core.querycheck. Token auth runs none
+
+    async def get(self, request):
+        params = JobSearchParamsSerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(
+                {"success": False, "message": "Invalid search parameters.", "data": params.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        filters = params.validated_data
+        statuses = filters.get("status", [])
+        job_types = filters.get("job_type", [])
+
+        querysets = filter_jobs(
+            request.user,
+            text=filters.get("q", "").strip(),
+            statuses=statuses,
+            job_types=job_types,
+            location=filters.get("location", "").strip(),
+            budget_min=filters.get("budget_min"),
+            budget_max=filters.get("budget_max"),
+        )
+
+        cursor = request.query_params.get("cursor")
+        page = await apaginate_keyset(
+            querysets["results"].only(*JOB_LIST_FIELDS),
+            JOB_ORDERING,
+            cursor=cursor,
+            page_size=get_page_size(request),
+        )
+
+        data = {
+            "results": JobListSerializer(page["results"], many=True).data,
+            "next_cursor": page["next_cursor"],
+        }
+        # facets don't change while paging, so only the first page pays for them
+        if not cursor:
+            rows = [row async for row in facet_rows_queryset(querysets["facets"])]
+            data["facets"] = fold_facets(rows, statuses, job_types)
+
+        return Response(
+            {"success": True, "message": "Jobs retrieved successfully.", "data": data},
+            status=status.HTTP_200_OK
+        )
+
+
+class TalentSearchView(AsyncAPIView):
+    permission_classes = [IsAuthenticated]
+    query_budget = 2  # snapshot load (when stale), page
+
+    async def get(self, request):
+        params = TalentSearchParamsSerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(
+                {"success": False, "message": "Invalid search parameters.", "data": params.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # snapshot filtering is CPU-bound and the SQL fallback is sync ORM
+        page = await sync_to_async(search_talents)(
+            params.to_filters(),
+            cursor=request.query_params.get("cursor"),
+            page_size=get_page_size(request),
+            fields=TalentListSerializer.Meta.fields,
+        )
+
+        return Response(
+            {
+                "success": True,
+                "message": "Talents retrieved successfully.",
+                "data": {
+                    "results": TalentListSerializer(page["results"], many=True).data,
+                    "next_cursor": page["next_cursor"],
+                },
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class JobMatchesView(AsyncAPIView):
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request, job_id):
+        try:
+            job = await visible_jobs(request.user).only(
+                "job_id", "location", "requirements", "updated_at"
+            ).aget(job_id=job_id)
+        except Job.DoesNotExist:
+            return Response(
+                {"success": False, "message": "Job not found.", "data": None},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", 20)), MATCHING_MAX_RESULTS))
+        except (TypeError, ValueError):
+            return Response(
+                {"success": False, "message": "limit must be an integer.", "data": None},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # scoring is CPU-bound, keep it off the event loop
+        matches = await sync_to_async(get_job_matches)(job, limit)
+
+        talents = {
+            talent.talent_id: talent
+            async for talent in Talent.objects.only(*TalentListSerializer.Meta.fields).filter(
+                talent_id__in=[talent_id for talent_id, _ in matches]
+            )
+        }
+        results = []
+        for talent_id, score in matches:
+            if talent_id in talents:
+                results.append({**TalentListSerializer(talents[talent_id]).data, "score": score})
+
+        return Response(
+            {"success": True, "message": "Matches retrieved successfully.", "data": {"results": results}},
+            status=status.HTTP_200_OK
+        )
+
+
+class JobEventView(AsyncAPIView):
+    """
+    Record an application, shortlist or self-tape for a talent on a job.
+    Agents apply / send self-tapes for their own talents; the job's client
+    or assigned agent shortlists.
+    """
+    permission_classes = [IsAuthenticated]
+
+    async def post(self, request, job_id):
+        serializer = JobEventSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        kind = serializer.validated_data["kind"]
+        talent_id = serializer.validated_data["talent_id"]
+
+        try:
+            job = await visible_jobs(request.user).only(
+                "job_id", "job_created_by_id", "job_assigned_to_id"
+            ).aget(job_id=job_id)
+        except Job.DoesNotExist:
+            return Response(
+                {"success": False, "message": "Job not found.", "data": None},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        user_id = request.user.pk
+        if kind == JobEvent.Kind.SHORTLISTED:
+            allowed = user_id in (job.job_created_by_id, job.job_assigned_to_id)
+            talents = Talent.objects.filter(talent_id=talent_id)
+        else:
+            allowed = True
+            talents = Talent.objects.filter(talent_id=talent_id, added_by_agent_id=user_id)
+        if not allowed or not await talents.aexists():
+            return Response(
+                {"success": False, "message": "You can't record this event for this talent.", "data": None},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        try:
+            serializer.instance = await sync_to_async(record_event)(job, talent_id, kind, request.user)
+        except IntegrityError:
+            return Response(
+                {"success": False, "message": "This event is already recorded.", "data": None},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        return Response(
+            {"success": True, "message": "Event recorded successfully.", "data": serializer.data},
+            status=status.HTTP_201_CREATED
+        )
+
+
+class TalentImageBaseView(AsyncAPIView):
+    """Image management is limited to the agent who added the talent."""
+    permission_classes = [IsAuthenticated]
+
+    async def owns_talent(self, request, talent_id):
+        if request.user.is_superuser:
+            return await Talent.objects.filter(talent_id=talent_id).aexists()
+        return await Talent.objects.filter(talent_id=talent_id, added_by_agent_id=request.user.pk).aexists()
+
+    def talent_not_found(self):
+        return Response(
+            {"success": False, "message": "Talent not found.", "data": None},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    def image_not_found(self):
+        return Response(
+            {"success": False, "message": "Image not found.", "data": None},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+
+class TalentImageUploadView(TalentImageBaseView):
+    async def post(self, request, talent_id):
+        if not await self.owns_talent(request, talent_id):
+            return self.talent_not_found()
+
+        serializer = TalentImageUploadSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"success": False, "message": "Validation failed.", "data": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            images = await sync_to_async(upload_images)(talent_id, serializer.validated_data["images"])
+        except TalentNotFound:
+            return self.talent_not_found()
+
+        return Response(
+            {
+                "success": True,
+                "message": "Images uploaded successfully.",
+                "data": TalentImageSerializer(images, many=True, context={"request": request}).data,
+            },
+            status=status.HTTP_201_CREATED
+        )
+
+
+class TalentImageOrderView(TalentImageBaseView):
+    async def patch(self, request, talent_id):
+        if not await self.owns_talent(request, talent_id):
+            return self.talent_not_found()
+
+        serializer = TalentImageOrderSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            images = await sync_to_async(reorder_images)(talent_id, serializer.validated_data["image_ids"])
+        except TalentNotFound:
+            return self.talent_not_found()
+        if images is None:
+            return Response(
+                {"success": False, "message": "image_ids must list every image of the talent exactly once.", "data": None},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            {
+                "success": True,
+                "message": "Images reordered successfully.",
+                "data": [{"image_id": image.image_id, "sort_order": image.sort_order} for image in images],
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class TalentImagePrimaryView(TalentImageBaseView):
+    async def post(self, request, talent_id, image_id):
+        if not await self.owns_talent(request, talent_id):
+            return self.talent_not_found()
+
+        try:
+            updated = await sync_to_async(set_primary)(talent_id, image_id)
+        except TalentNotFound:
+            return self.talent_not_found()
+        if not updated:
+            return self.image_not_found()
+
+        return Response(
+            {"success": True, "message": "Primary image updated.", "data": {"image_id": image_id}},
+            status=status.HTTP_200_OK
+        )
+
+
+class TalentImageDetailView(TalentImageBaseView):
+    async def delete(self, request, talent_id, image_id):
+        if not await self.owns_talent(request, talent_id):
+            return self.talent_not_found()
+
+        try:
+            deleted = await sync_to_async(delete_image)(talent_id, image_id)
+        except TalentNotFound:
+            return self.talent_not_found()
+        if not deleted:
+            return self.image_not_found()
+
+        return Response(
+            {"success": True, "message": "Image deleted.", "data": None},
+            status=status.HTTP_200_OK
+        )
+
+
+class TalentListView(AsyncAPIView):
+    """Talent grid: one query per page, primary photo included."""
+    permission_classes = [IsAuthenticated]
+    query_budget = 1
+    ordering = ("-created_at", "-talent_id")
+
+    async def get(self, request):
+        talents = Talent.objects.all()
+        if request.query_params.get("mine") in ("1", "true"):
+            talents = talents.filter(added_by_agent_id=request.user.pk)
+
+        # ?export=csv|ndjson streams every matching talent instead of a page;
+        # the file can be fed back to talents/import/. It holds dates of birth
+        # and measurements: agents export their own talents, superusers all
+        export_format = request.query_params.get("export")
+        if export_format:
+            if not IsSuperuser().has_permission(request, self):
+                if not IsAgent().has_permission(request, self):
+                    self.permission_denied(request)
+                talents = talents.filter(added_by_agent_id=request.user.pk)
+            if export_format not in EXPORT_FORMATS:
+                return Response(
+                    {"success": False, "message": "Unsupported export format.", "data": None},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            return stream_export(talents.order_by(*self.ordering), EXPORT_FIELDS, export_format, filename="talents")
+
+        page = await apaginate_keyset(
+            with_primary_image(talents.values(*TalentCardSerializer.fields)),
+            self.ordering,
+            cursor=request.query_params.get("cursor"),
+            page_size=get_page_size(request),
+        )
+
+        return Response(
+            {
+                "success": True,
+                "message": "Talents retrieved successfully.",
+                "data": {
+                    "results": TalentCardSerializer(request).many(page["results"]),
+                    "next_cursor": page["next_cursor"],
+                },
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class TalentImportView(AsyncAPIView):
+    """
+    Bulk-create the caller's talents from a CSV or JSON Lines upload. Large
+    uploads are spooled to a temp file by Django and read back line by line;
+    for very large files use `manage.py import_talents`.
+    """
+    permission_classes = [IsAgent]
+
+    async def post(self, request):
+        serializer = TalentImportSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"success": False, "message": "Validation failed.", "data": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        params = serializer.validated_data
+
+        report = await sync_to_async(import_talents)(
+            request.user.pk, params["file"], params["file_format"], dry_run=params["dry_run"]
+        )
+
+        return Response(
+            {
+                "success": True,
+                "message": f"{report['created']} talents imported, {report['failed']} rows rejected.",
+                "data": report,
+            },
+            status=status.HTTP_201_CREATED if report["created"] and not params["dry_run"] else status.HTTP_200_OK
+        )
+
+
+class TalentDetailView(AsyncAPIView):
+    permission_classes = [IsAuthenticated]
+    query_budget = 2  # talent, images
+
+    async def get(self, request, talent_id):
+        images = TalentImage.objects.only(
+            "image_id", "talent_id", "image", "is_primary", "sort_order", "variants", "variants_status", "created_at"
+        )
+        try:
+            talent = await Talent.objects.prefetch_related(Prefetch("images", queryset=images)).aget(talent_id=talent_id)
+        except Talent.DoesNotExist:
+            return Response(
+                {"success": False, "message": "Talent not found.", "data": None},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(
+            {
+                "success": True,
+                "message": "Talent retrieved successfully.",
+                "data": TalentDetailSerializer(talent, context={"request": request}).data,
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class DashboardView(AsyncAPIView):
+    """Counts for the caller's talents and jobs, read from their DashboardSummary row."""
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+        user_id = request.user.pk
+        data = await dashboard_cache.aget(user_id, lambda: sync_to_async(load_summary)(user_id))
+
+        return Response(
+            {"success": True, "message": "Dashboard retrieved successfully.", "data": data},
+            status=status.HTTP_200_OK
+        )
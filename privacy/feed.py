@@ -0,0 +1,122 @@
+# privacy/feed.py
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework import serializers
+
+from core.redis import get_redis
+from .models import ShareThoughts
+
+logger = logging.getLogger(__name__)
+
+FEED_KEY = "privacy:thoughts:feed"
+FEED_CACHE_SIZE = getattr(settings, "THOUGHTS_FEED_CACHE_SIZE", 200)
+FEED_CACHE_TTL = getattr(settings, "THOUGHTS_FEED_CACHE_TTL", 10 * 60)
+# extra entries read from the head so dropping duplicates still fills a page
+FEED_DUPLICATE_SLACK = 5
+
+FEED_FIELDS = ("id", "user__username", "thoughts", "created_at")
+
+_datetime_field = serializers.DateTimeField()
+
+
+def thought_to_dict(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Feed item shape, built from a .values(*FEED_FIELDS) row."""
+    return {
+        "id": row["id"],
+        "user": row["user__username"],
+        "thoughts": row["thoughts"],
+        "created_at": _datetime_field.to_representation(row["created_at"]),
+    }
+
+
+def feed_queryset():
+    return ShareThoughts.objects.values(*FEED_FIELDS)
+
+
+def _unique(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    seen, unique = set(), []
+    for item in items:
+        if item["id"] not in seen:
+            seen.add(item["id"])
+            unique.append(item)
+    return unique
+
+
+def _rebuild(client) -> List[Dict[str, Any]]:
+    rows = list(feed_queryset().order_by("-created_at", "-id")[:FEED_CACHE_SIZE])
+    items = [thought_to_dict(row) for row in rows]
+    if items:
+        tmp_key = f"{FEED_KEY}:rebuild"
+        pipe = client.pipeline()
+        pipe.delete(tmp_key)
+        pipe.rpush(tmp_key, *[json.dumps(item) for item in items])
+        pipe.expire(tmp_key, FEED_CACHE_TTL)
+        pipe.rename(tmp_key, FEED_KEY)
+        pipe.execute()
+        _catch_up(client, rows[0])
+    return items
+
+
+def _catch_up(client, newest: Dict[str, Any]) -> None:
+    """
+    Re-push thoughts committed after the rebuild's SELECT. Their own
+    push_thought() may have run before the RENAME, against the cold key, and
+    been dropped. One that ran after the RENAME is pushed twice; readers skip
+    the duplicate (_unique).
+    """
+    newer = list(
+        feed_queryset()
+        .filter(Q(created_at__gt=newest["created_at"]) | Q(created_at=newest["created_at"], id__gt=newest["id"]))
+        .order_by("created_at", "id")[:FEED_CACHE_SIZE]
+    )
+    if newer:
+        pipe = client.pipeline()
+        pipe.lpushx(FEED_KEY, *[json.dumps(thought_to_dict(row)) for row in newer])  # newest ends up first
+        pipe.ltrim(FEED_KEY, 0, FEED_CACHE_SIZE - 1)
+        pipe.execute()
+
+
+def get_cached_head(limit: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    Newest `limit + 1` thoughts (the extra one tells the caller there is a next
+    page) from the Redis list, rebuilding it once if cold. Returns None when the
+    cache can't serve the request (page deeper than the cached head, no Redis).
+    """
+    if limit >= FEED_CACHE_SIZE:
+        return None
+    client = get_redis()
+    if client is None:
+        return None
+
+    try:
+        raw = client.lrange(FEED_KEY, 0, limit + FEED_DUPLICATE_SLACK)
+        if raw:
+            return _unique([json.loads(item) for item in raw])[: limit + 1]
+        return _rebuild(client)[: limit + 1]
+    except Exception:
+        logger.warning("Thoughts feed cache unavailable, falling back to DB", exc_info=True)
+        return None
+
+
+def push_thought(item: Dict[str, Any]) -> None:
+    """
+    Prepend a new thought to the cached head. LPUSHX is a no-op on a cold cache,
+    so a single push never masquerades as a full list; the next read rebuilds it.
+    """
+    client = get_redis()
+    if client is None:
+        return
+
+    try:
+        pipe = client.pipeline()
+        pipe.lpushx(FEED_KEY, json.dumps(item))
+        pipe.ltrim(FEED_KEY, 0, FEED_CACHE_SIZE - 1)
+        pipe.execute()
+    except Exception:
+        logger.warning("Could not update thoughts feed cache", exc_info=True)
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-17 21:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('privacy', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='submitquerry',
+            index=models.Index(fields=['-created_at', '-id'], name='privacy_query_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-17 21:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('privacy', '0002_submitquerry_keyset_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sharethoughts',
+            index=models.Index(fields=['-created_at', '-id'], name='privacy_thoughts_created_idx'),
+        ),
+    ]
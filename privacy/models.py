@@ -29,6 +29,11 @@ class SubmitQuerry(models.Model):
     message = models.TextField(max_length=500, null=True, blank=True)
     
     created_at = models.DateField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="privacy_query_created_id_idx"),  # keyset pagination
+        ]
     
 
 class ShareThoughts(models.Model):
@@ -36,6 +41,11 @@ class ShareThoughts(models.Model):
     thoughts = models.TextField()
     
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="privacy_thoughts_created_idx"),  # feed order
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.thoughts[:30]}"
@@ -26,7 +26,7 @@ class SubmitQuerrySerializer(serializers.ModelSerializer):
         
 
 class ShareThoughtsSerializer(serializers.ModelSerializer):
-    user = serializers.StringRelatedField(read_only=True)  # show username instead of id
+    user = serializers.CharField(source="user.username", read_only=True)  # show username instead of id
 
     class Meta:
         model = ShareThoughts
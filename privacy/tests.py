@@ -1,3 +1,215 @@
+import base64
+import json
+import unittest
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils.http import http_date
+
+from account.models import UserAuth
+from account.utils import generate_tokens_for_user
+from core.pagination import encode_cursor
+from . import feed
+from .models import PrivacyPolicy, ShareThoughts, SubmitQuerry
+from .views import content_cache
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+def raw_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+class SubmitQuerryListTests(TestCase):
+    url = "/v1/privacy/submit/querry/"
+
+    def setUp(self):
+        cache.clear()
+        for index in range(3):
+            SubmitQuerry.objects.create(name=f"Name {index}", email=f"q{index}@example.com", message="Hello")
+
+    def test_cursor_pages_through_every_row(self):
+        first = self.client.get(self.url, {"page_size": 2}).json()["data"]
+        self.assertEqual(len(first["results"]), 2)
+        second = self.client.get(self.url, {"page_size": 2, "cursor": first["next_cursor"]}).json()["data"]
+        self.assertEqual(len(second["results"]), 1)
+        self.assertIsNone(second["next_cursor"])
+
+    def test_malformed_cursor_is_a_400(self):
+        for cursor in ("not-base64!", raw_cursor(["x", 1]), raw_cursor([None, 1]), raw_cursor([{}, 1]), encode_cursor([1])):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(self.url, {"cursor": cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("cursor", response.json())
+
+    def export(self, user=None):
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {generate_tokens_for_user(user)['access']}"} if user else {}
+        return self.client.get(self.url, {"export": "csv"}, **headers)
+
+    def test_export_requires_a_superuser(self):
+        self.assertEqual(self.export().status_code, 401)
+        user = UserAuth.objects.create_user(email="user@example.com", full_name="User")
+        self.assertEqual(self.export(user).status_code, 403)
+
+    async def test_superuser_can_export(self):
+        admin = await UserAuth.objects.acreate(email="admin@example.com", full_name="Admin", is_superuser=True)
+        response = await self.async_client.get(
+            self.url, {"export": "csv"}, headers={"Authorization": f"Bearer {generate_tokens_for_user(admin)['access']}"}
+        )
+        self.assertEqual(response.status_code, 200)
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertIn(b"q0@example.com", body)
+
+
+class ContentCacheTests(TestCase):
+    url = "/v1/privacy/privacy-policy/"
+
+    def setUp(self):
+        cache.clear()
+        content_cache.local.clear()
+        self.policy = PrivacyPolicy.objects.create(description="First version")
+        admin = UserAuth.objects.create_user(email="admin@example.com", full_name="Admin", is_superuser=True)
+        self.admin_headers = {"HTTP_AUTHORIZATION": f"Bearer {generate_tokens_for_user(admin)['access']}"}
+
+    def test_validators_and_cached_reads(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"]["description"], "First version")
+        self.assertTrue(response["ETag"].startswith('"'))
+        self.assertEqual(response["Last-Modified"], http_date(self.policy.last_updated.timestamp()))
+        self.assertEqual(response["Cache-Control"], "public, max-age=0, must-revalidate")
+
+        with self.assertNumQueries(0):  # served from the content cache
+            again = self.client.get(self.url)
+        self.assertEqual(again["ETag"], response["ETag"])
+
+    def test_conditional_requests_get_304(self):
+        first = self.client.get(self.url)
+        cases = {
+            "If-None-Match": {"HTTP_IF_NONE_MATCH": first["ETag"]},
+            "If-None-Match list": {"HTTP_IF_NONE_MATCH": f'"other", {first["ETag"]}'},
+            "If-Modified-Since": {"HTTP_IF_MODIFIED_SINCE": first["Last-Modified"]},
+        }
+        for case, headers in cases.items():
+            with self.subTest(case):
+                response = self.client.get(self.url, **headers)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b"")
+                self.assertEqual(response["ETag"], first["ETag"])
+
+        stale = {
+            "other ETag": {"HTTP_IF_NONE_MATCH": '"other"'},
+            "older date": {"HTTP_IF_MODIFIED_SINCE": http_date(self.policy.last_updated.timestamp() - 60)},
+            # If-None-Match wins over a matching date
+            "ETag and date": {"HTTP_IF_NONE_MATCH": '"other"', "HTTP_IF_MODIFIED_SINCE": first["Last-Modified"]},
+        }
+        for case, headers in stale.items():
+            with self.subTest(case):
+                self.assertEqual(self.client.get(self.url, **headers).status_code, 200)
+
+    def test_writes_invalidate_the_cache(self):
+        for method, description in (("put", "Second version"), ("patch", "Third version")):
+            with self.subTest(method):
+                before = self.client.get(self.url)
+                response = getattr(self.client, method)(
+                    self.url, {"description": description}, content_type="application/json", **self.admin_headers
+                )
+                self.assertEqual(response.status_code, 200, response.content)
+
+                after = self.client.get(self.url, HTTP_IF_NONE_MATCH=before["ETag"])
+                self.assertEqual(after.status_code, 200)
+                self.assertNotEqual(after["ETag"], before["ETag"])
+                self.assertEqual(after.json()["data"]["description"], description)
+                self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=after["ETag"]).status_code, 304)
+
+    def test_only_superusers_write(self):
+        user = UserAuth.objects.create_user(email="user@example.com", full_name="User")
+        response = self.client.put(
+            self.url, {"description": "Defaced"}, content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {generate_tokens_for_user(user)['access']}",
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.client.get(self.url).json()["data"]["description"], "First version")
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is not installed")
+class ThoughtsFeedTests(TestCase):
+    url = "/v1/privacy/thoughts/"
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        patcher = mock.patch.object(feed, "get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = UserAuth.objects.create_user(email="thinker@example.com", full_name="Thinker", username="thinker")
+        self.headers = {"HTTP_AUTHORIZATION": f"Bearer {generate_tokens_for_user(self.user)['access']}"}
+
+    def add(self, count):
+        return [ShareThoughts.objects.create(user=self.user, thoughts=f"Thought {index}") for index in range(count)]
+
+    def page(self, **params):
+        response = self.client.get(self.url, params, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["data"]
+
+    def feed_ids(self):
+        return [json.loads(item)["id"] for item in self.redis.lrange(feed.FEED_KEY, 0, -1)]
+
+    def test_pages_follow_the_database_order(self):
+        thoughts = self.add(5)
+        ids = []
+        data = self.page(page_size=2)  # rebuilds the head
+        while True:
+            ids += [item["id"] for item in data["results"]]
+            if not data["next_cursor"]:
+                break
+            data = self.page(page_size=2, cursor=data["next_cursor"])
+        self.assertEqual(ids, [thought.id for thought in reversed(thoughts)])
+
+        with self.assertNumQueries(0):  # the head is cached now
+            self.assertEqual([item["id"] for item in self.page(page_size=2)["results"]], ids[:2])
+
+    def test_posts_are_pushed_onto_a_warm_head(self):
+        self.add(2)
+        response = self.client.post(self.url, {"thoughts": "Cold"}, content_type="application/json", **self.headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.redis.exists(feed.FEED_KEY), 0)  # no partial list
+
+        self.page()
+        self.client.post(self.url, {"thoughts": "Warm"}, content_type="application/json", **self.headers)
+        head = self.page(page_size=2)["results"]
+        self.assertEqual([item["thoughts"] for item in head], ["Warm", "Cold"])
+        self.assertEqual(head[0]["user"], "thinker")
+
+    def test_thought_posted_during_a_rebuild_is_not_lost(self):
+        self.add(3)
+        to_dict = feed.thought_to_dict
+        racing = []
+
+        def post_during_rebuild(row):
+            # runs after the rebuild's SELECT, before its RENAME
+            if not racing:
+                thought = ShareThoughts.objects.create(user=self.user, thoughts="Racing")
+                racing.append(thought)
+                feed.push_thought(to_dict({**row, "id": thought.id, "thoughts": "Racing", "created_at": thought.created_at}))
+            return to_dict(row)
+
+        with mock.patch.object(feed, "thought_to_dict", side_effect=post_during_rebuild):
+            feed.get_cached_head(10)
+        self.assertEqual(self.feed_ids()[0], racing[0].id)
+        self.assertEqual(len(self.feed_ids()), 4)
 
-# Create your tests here.
+    def test_duplicate_pushes_are_skipped(self):
+        thoughts = self.add(3)
+        self.page()
+        row = feed.feed_queryset().get(id=thoughts[-1].id)
+        feed.push_thought(feed.thought_to_dict(row))  # pushed again after the rebuild
+        self.assertEqual(self.feed_ids()[:2], [row["id"], row["id"]])
+        data = self.page(page_size=2)
+        self.assertEqual([item["id"] for item in data["results"]], [thoughts[2].id, thoughts[1].id])
+        rest = self.page(page_size=2, cursor=data["next_cursor"])
+        self.assertEqual([item["id"] for item in rest["results"]], [thoughts[0].id])
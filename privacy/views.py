@@ -1,9 +1,15 @@
+import hashlib
+import json
+
 from rest_framework import generics, status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.views import APIView
-from django.db import transaction
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 
+from .feed import feed_queryset, get_cached_head, push_thought, thought_to_dict
 from .models import PrivacyPolicy, AboutUs, TermsConditions, SubmitQuerry, ShareThoughts
 from .serializers import (
     PrivacyPolicySerializer,
@@ -12,88 +18,102 @@ from .serializers import (
     SubmitQuerrySerializer,
     ShareThoughtsSerializer
 )
-from account.permissions import IsSuperuserOrReadOnly
+from account.permissions import IsSuperuser, IsSuperuserOrReadOnly
+from core.cache import TwoTierCache
+from core.pagination import apaginate_keyset, encode_cursor, get_page_size
+from core.streaming import EXPORT_FORMATS, stream_export
+from core.throttling import IdentifierRateThrottle, IPRateThrottle
+from core.views import AsyncAPIView
+
+# Static pages: Redis-backed, with a short per-process tier in front of it.
+content_cache = TwoTierCache(
+    prefix="privacy:content",
+    shared_ttl=getattr(settings, "CONTENT_CACHE_TTL", 60 * 60),
+    local_ttl=getattr(settings, "CONTENT_LOCAL_CACHE_TTL", 5),
+)
 
 
 class SingleObjectViewMixin:
-    def get_object(self):
-        return self.queryset.first()
+    async def aget_object(self):
+        return await self.queryset.afirst()
 
 
-class BaseSingleObjectView(SingleObjectViewMixin, generics.RetrieveUpdateAPIView):
+class BaseSingleObjectView(SingleObjectViewMixin, AsyncAPIView, generics.GenericAPIView):
     permission_classes = [IsSuperuserOrReadOnly]
 
-    def get(self, request, *args, **kwargs):
-        instance = self.get_object()
+    def get_cache_key(self):
+        return self.queryset.model._meta.label_lower
+
+    async def build_cache_entry(self):
+        instance = await self.aget_object()
         if not instance:
+            return None
+
+        data = dict(self.get_serializer(instance).data)
+        payload = json.dumps(data, sort_keys=True, default=str).encode()
+        return {
+            "data": data,
+            "etag": f'"{hashlib.sha1(payload).hexdigest()}"',
+            "last_modified": instance.last_updated.timestamp(),
+        }
+
+    async def get(self, request, *args, **kwargs):
+        entry = await content_cache.aget(self.get_cache_key(), self.build_cache_entry)
+        if not entry:
             return Response(
                 {"success": False, "message": "No content found.", "data": None},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        serializer = self.get_serializer(instance)
+        headers = {
+            "ETag": entry["etag"],
+            "Last-Modified": http_date(entry["last_modified"]),
+            "Cache-Control": "public, max-age=0, must-revalidate",
+        }
+        not_modified = get_conditional_response(
+            request, etag=entry["etag"], last_modified=int(entry["last_modified"])
+        )
+        if not_modified is not None:
+            for name, value in headers.items():
+                not_modified[name] = value
+            return not_modified
+
         return Response(
-            {"success": True, "message": "Content retrieved successfully.", "data": serializer.data},
-            status=status.HTTP_200_OK
+            {"success": True, "message": "Content retrieved successfully.", "data": entry["data"]},
+            status=status.HTTP_200_OK,
+            headers=headers,
         )
 
-    @transaction.atomic
-    def put(self, request, *args, **kwargs):
-        instance = self.get_object()
+    async def save_content(self, request, partial):
+        instance = await self.aget_object()
 
         if instance:
-            serializer = self.get_serializer(instance, data=request.data)
-            if serializer.is_valid():
-                serializer.save()
-                return Response(
-                    {"success": True, "message": "Content updated successfully.", "data": serializer.data},
-                    status=status.HTTP_200_OK
-                )
-            return Response(
-                {"success": False, "message": "Validation failed.", "data": serializer.errors},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+            serializer = self.get_serializer(instance, data=request.data, partial=partial)
+            success_message = "Content partially updated successfully." if partial else "Content updated successfully."
+            success_status = status.HTTP_200_OK
         else:
             serializer = self.get_serializer(data=request.data)
-            if serializer.is_valid():
-                serializer.save()
-                return Response(
-                    {"success": True, "message": "Content created successfully.", "data": serializer.data},
-                    status=status.HTTP_201_CREATED
-                )
+            success_message = "Content created successfully."
+            success_status = status.HTTP_201_CREATED
+
+        if not serializer.is_valid():
             return Response(
                 {"success": False, "message": "Validation failed.", "data": serializer.errors},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-    @transaction.atomic
-    def patch(self, request, *args, **kwargs):
-        instance = self.get_object()
+        await sync_to_async(serializer.save)()
+        await content_cache.adelete(self.get_cache_key())
+        return Response(
+            {"success": True, "message": success_message, "data": serializer.data},
+            status=success_status
+        )
 
-        if instance:
-            serializer = self.get_serializer(instance, data=request.data, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-                return Response(
-                    {"success": True, "message": "Content partially updated successfully.", "data": serializer.data},
-                    status=status.HTTP_200_OK
-                )
-            return Response(
-                {"success": False, "message": "Validation failed.", "data": serializer.errors},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        else:
-            serializer = self.get_serializer(data=request.data)
-            if serializer.is_valid():
-                serializer.save()
-                return Response(
-                    {"success": True, "message": "Content created successfully.", "data": serializer.data},
-                    status=status.HTTP_201_CREATED
-                )
-            return Response(
-                {"success": False, "message": "Validation failed.", "data": serializer.errors},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+    async def put(self, request, *args, **kwargs):
+        return await self.save_content(request, partial=False)
+
+    async def patch(self, request, *args, **kwargs):
+        return await self.save_content(request, partial=True)
 
 
 class PrivacyPolicyView(BaseSingleObjectView):
@@ -111,35 +131,65 @@ class TermsConditionsView(BaseSingleObjectView):
     serializer_class = TermsConditionsSerializer
 
 
-class SubmitQuerryView(APIView):
+class SubmitQuerryView(AsyncAPIView):
     permission_classes = [AllowAny]
+    throttle_classes = [IPRateThrottle, IdentifierRateThrottle]  # POST only
+    throttle_scope = "contact"
+    ordering = ("-created_at", "-id")
+    export_fields = ("id", "name", "email", "message", "created_at")
 
-    def post(self, request):
+    async def post(self, request):
         serializer = SubmitQuerrySerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        serializer.instance = await SubmitQuerry.objects.acreate(**serializer.validated_data)
 
         return Response(
             {"success": True, "message": "User query submitted successfully!", "data": serializer.data},
             status=status.HTTP_201_CREATED
         )
 
-    def get(self, request):
-        queries = SubmitQuerry.objects.all().only('id', 'name', 'email', 'message', 'created_at')
-        serializer = SubmitQuerrySerializer(queries, many=True)
+    async def get(self, request):
+        queries = SubmitQuerry.objects.only('id', 'name', 'email', 'message', 'created_at')
+
+        # ?export=csv|ndjson streams the whole table instead of a page;
+        # superusers only, it's every contact's email and message
+        export_format = request.query_params.get("export")
+        if export_format:
+            if not IsSuperuser().has_permission(request, self):
+                self.permission_denied(request)
+            if export_format not in EXPORT_FORMATS:
+                return Response(
+                    {"success": False, "message": "Unsupported export format.", "data": None},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            return stream_export(
+                queries.order_by(*self.ordering), self.export_fields, export_format, filename="queries"
+            )
+
+        page = await apaginate_keyset(
+            queries,
+            self.ordering,
+            cursor=request.query_params.get("cursor"),
+            page_size=get_page_size(request),
+        )
+        serializer = SubmitQuerrySerializer(page["results"], many=True)
 
         return Response(
-            {"success": True, "message": "All queries retrieved successfully.", "data": serializer.data},
+            {
+                "success": True,
+                "message": "All queries retrieved successfully.",
+                "data": {"results": serializer.data, "next_cursor": page["next_cursor"]},
+            },
             status=status.HTTP_200_OK
         )
 
 
-class SubmitQuerryDetailView(APIView):
+class SubmitQuerryDetailView(AsyncAPIView):
     permission_classes = [AllowAny]
 
-    def get(self, request, pk):
+    async def get(self, request, pk):
         try:
-            query = SubmitQuerry.objects.only('id', 'name', 'email', 'message', 'created_at').get(pk=pk)
+            query = await SubmitQuerry.objects.only('id', 'name', 'email', 'message', 'created_at').aget(pk=pk)
         except SubmitQuerry.DoesNotExist:
             return Response(
                 {"success": False, "message": "Query not found.", "data": None},
@@ -153,24 +203,44 @@ class SubmitQuerryDetailView(APIView):
         )
 
 
-class ShareThoughtsView(APIView):
+class ShareThoughtsView(AsyncAPIView):
     permission_classes = [IsAuthenticated]
+    ordering = ("-created_at", "-id")
+
+    async def get(self, request):
+        cursor = request.query_params.get("cursor")
+        page_size = get_page_size(request)
+
+        # First page comes from the Redis head of the feed; deeper pages seek in the DB.
+        items = None if cursor else await sync_to_async(get_cached_head)(page_size)
+        if items is not None:
+            next_cursor = None
+            if len(items) > page_size:
+                items = items[:page_size]
+                next_cursor = encode_cursor([items[-1]["created_at"], items[-1]["id"]])
+        else:
+            page = await apaginate_keyset(feed_queryset(), self.ordering, cursor=cursor, page_size=page_size)
+            items = [thought_to_dict(row) for row in page["results"]]
+            next_cursor = page["next_cursor"]
 
-    def get(self, request):
-        thoughts = ShareThoughts.objects.select_related('user') \
-            .only('id', 'thoughts', 'created_at', 'user__username') \
-            .order_by('-created_at')
-
-        serializer = ShareThoughtsSerializer(thoughts, many=True)
         return Response(
-            {"success": True, "message": "Retrieved successfully!", "data": serializer.data},
+            {"success": True, "message": "Retrieved successfully!", "data": {"results": items, "next_cursor": next_cursor}},
             status=status.HTTP_200_OK
         )
 
-    def post(self, request):
+    async def post(self, request):
         serializer = ShareThoughtsSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save(user=request.user)
+        thought = await ShareThoughts.objects.acreate(user=request.user, **serializer.validated_data)
+        serializer.instance = thought
+
+        item = thought_to_dict({
+            "id": thought.id,
+            "user__username": request.user.username,
+            "thoughts": thought.thoughts,
+            "created_at": thought.created_at,
+        })
+        await sync_to_async(push_thought)(item)
 
         return Response(
             {"success": True, "message": "Created successfully!", "data": serializer.data},